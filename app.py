@@ -1,19 +1,42 @@
+import io
 import os
+import threading
+import time
+import random
 import pandas as pd
 import requests
 import json
-import plotly.express as px
-import numpy as np
+import gzip
+import hashlib
+import hmac
+import mimetypes
 from datetime import date, datetime
 from dotenv import load_dotenv
-from flask import Flask, render_template, request, redirect, url_for, send_file
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib.units import inch
-from reportlab.lib.enums import TA_CENTER
-from reportlab.lib.styles import ParagraphStyle
-from flask import jsonify, session
+from flask import Flask, render_template, request, redirect, url_for, send_file, make_response, Response
+from flask import jsonify, session, g
+import data_cache
+import delta_sync
+import drilldown
+import report_kernel
+import rollups
+import columnar_snapshot
+import ingest
+import time_index
+import result_cache
+import pdf_jobs
+import singleflight
+import http_client
+import notifications
+import metrics
+import profiler
+import static_assets
+from relatorio_rea import COL_MAPPING, build_relatorio, generate_pdf_report
+
+# brotli é opcional: sem ele a API responde apenas com gzip
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 # Carrega as variáveis de ambiente
 load_dotenv()
@@ -110,30 +133,10 @@ def get_questoes_manuais():
 # Funções auxiliares existentes (mantidas)
 # ---------------------------------------------------
 
-def get_data_from_url():
-    """
-    Obtém os dados JSON diretamente da URL do Ploomnes.
-    """
-    try:
-        response = requests.get(JSON_DATA_URL)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        print(f"Erro ao obter dados da URL: {e}")
-        send_to_chat = globals().get('send_to_chat', None)
-        if callable(send_to_chat):
-            send_to_chat(f"Alerta: Erro ao obter dados do Ploomnes. URL: {JSON_DATA_URL}. Erro: {e}")
-        return None
-
-def calculate_working_days(start_date, end_date):
-    """
-    Calcula o número de dias úteis entre duas datas (excluindo sábados e domingos).
-    """
-    if pd.isna(start_date) or pd.isna(end_date):
-        return None
-    start_date = start_date.date()
-    end_date = end_date.date()
-    return np.busday_count(start_date, end_date)
+def _alert_fetch_error(e):
+    send_to_chat = globals().get('send_to_chat', None)
+    if callable(send_to_chat):
+        send_to_chat(f"Alerta: Erro ao obter dados do Ploomnes. URL: {JSON_DATA_URL}. Erro: {e}")
 
 def log_access(username, ip_address):
     """
@@ -146,9 +149,11 @@ def log_access(username, ip_address):
     except IOError as e:
         print(f"Erro ao escrever no arquivo de log: {e}")
 
-def send_to_chat(message):
+def _post_to_chat(message):
     """
     Envia uma mensagem de notificação para o Google Chat via webhook.
+    Chamada apenas pela thread de alert_dispatcher; a falha é propagada para
+    que o dispatcher a conte em metrics['failed'].
     """
     if not GOOGLE_CHAT_WEBHOOK_URL:
         print("URL do webhook do Google Chat não configurada.")
@@ -156,223 +161,434 @@ def send_to_chat(message):
     headers = {'Content-Type': 'application/json; charset=UTF-8'}
     data = {'text': message}
     try:
-        response = requests.post(GOOGLE_CHAT_WEBHOOK_URL, headers=headers, data=json.dumps(data))
+        response = http_client.post(GOOGLE_CHAT_WEBHOOK_URL, headers=headers, data=json.dumps(data))
         response.raise_for_status()
         print("Mensagem enviada com sucesso para o Google Chat.")
     except requests.exceptions.RequestException as e:
         print(f"Falha ao enviar mensagem para o Google Chat: {e}")
+        raise
+
+alert_dispatcher = notifications.AlertDispatcher(_post_to_chat).register_shutdown()
+
+def send_to_chat(message):
+    """
+    Enfileira um alerta para o Google Chat sem bloquear a requisição; o envio
+    (deduplicado, agrupado e com limite de taxa) fica com alert_dispatcher.
+    """
+    alert_dispatcher.enqueue(message)
 
 # ---------------------------------------------------
 # Processamento dos dados
 # ---------------------------------------------------
 
-def process_data(data, start_date=None, end_date=None):
+def normalize_data(data):
     """
-    Processa os dados e retorna um dicionário com todos os indicadores do relatório.
+    Converte os dados brutos do Ploomnes em DataFrame com as colunas renomeadas
+    (COL_MAPPING), as datas convertidas e as linhas ordenadas por data_manifestacao. Um
+    DataFrame já normalizado (ex.: o snapshot colunar) é devolvido como está.
     """
+    if isinstance(data, pd.DataFrame):
+        return data
     if not data:
         return None
     df = pd.DataFrame(data)
 
-    col_mapping = {
-        '*Tipo da Manifestação': 'tipo_manifestacao',
-        '*Tema da Manifestação': 'tema_manifestacao',
-        '*Forma de Entrada do Contato': 'forma_entrada_contato',
-        '*Data da manifestação': 'data_manifestacao',
-        '*Data da Resposta': 'data_resposta',
-        'Atendimento para:': 'atendimento_para',
-        '* Vínculo com o  beneficiário referenciado': 'vinculo_beneficiario',
-    }
+    col_mapping = COL_MAPPING
     missing_cols = [col for col in col_mapping.keys() if col not in df.columns]
     if missing_cols:
-        message = f"Alerta: As seguintes colunas não foram encontradas no JSON do Ploomnes: {', '.join(missing_cols)}."
-        send_to_chat(message)
+        _alert_missing_columns(missing_cols)
     df.rename(columns={key: val for key, val in col_mapping.items() if key in df.columns}, inplace=True)
-    if 'data_manifestacao' in df.columns:
-        df['data_manifestacao'] = pd.to_datetime(df['data_manifestacao'])
-        df['data_manifestacao_formatada'] = df['data_manifestacao'].dt.strftime('%d/%m/%Y')
-    if 'data_resposta' in df.columns:
-        df['data_resposta'] = pd.to_datetime(df['data_resposta'])
-        df['data_resposta_formatada'] = df['data_resposta'].dt.strftime('%d/%m/%Y')
+    # Datas com formato explícito; a formatação para exibição fica com time_index.format_dates
+    parser = time_index.DateParser()
+    for coluna in ('data_manifestacao', 'data_resposta'):
+        if coluna in df.columns:
+            df[coluna] = parser.parse(df[coluna], coluna)
+    if parser.invalidos:
+        _alert_invalid_dates(parser.invalidos)
+    # A ordem do feed desempata os contadores ranqueados (ver report_kernel)
+    return time_index.sort_by_date(report_kernel.with_feed_position(df))
+
+def process_data(data, start_date=None, end_date=None):
+    """
+    Processa os dados e retorna um dicionário com todos os indicadores do relatório.
+    O intervalo de datas é inclusivo em dias (todo o dia de end_date entra no filtro).
+    Usada fora das rotas (benchmark e testes de equivalência): as rotas montam o
+    relatório a partir do rollup diário (get_report).
+    """
+    df = normalize_data(data)
+    if df is None:
+        return None
     if start_date and end_date:
-        df = df[(df['data_manifestacao'] >= start_date) & (df['data_manifestacao'] <= end_date)]
-    relatorio = {}
-    ano_atual = date.today().year
-    relatorio['ano_dados_informados'] = ano_atual
-    relatorio['email_responsavel'] = "cleide@elosaude.com.br"
-    relatorio['telefone_contato'] = "(48)3298-5555"
-    df_reanalise = df[df['tipo_manifestacao'] == 'Reanálise'] if 'tipo_manifestacao' in df.columns else pd.DataFrame()
-    quantitativo_reanalise = len(df_reanalise)
-    relatorio['quantitativo_reanalise'] = quantitativo_reanalise
-    relatorio['recebeu_reanalise'] = "SIM" if quantitativo_reanalise > 0 else "NÃO"
-    relatorio['conversao_reanalise'] = 2
-    relatorio['motivo_conversao'] = "Recebimento de documentação incompleta, necessitando documentação complementar para avaliação da auditoria médica."
-    if 'forma_entrada_contato' in df.columns:
-        quantitativo_proprias = len(df)
-        relatorio['quantitativo_manifestacoes_proprias'] = quantitativo_proprias
-        relatorio['recebeu_manifestacao_propria'] = "SIM" if quantitativo_proprias > 0 else "NÃO"
-    else:
-        relatorio['quantitativo_manifestacoes_proprias'] = 0
-        relatorio['recebeu_manifestacao_propria'] = "NÃO"
-    contagem_canais = df['forma_entrada_contato'].value_counts().to_dict() if 'forma_entrada_contato' in df.columns else {}
-    relatorio['quantitativo_canais'] = contagem_canais
-    contagem_temas = df['tema_manifestacao'].value_counts().to_dict() if 'tema_manifestacao' in df.columns else {}
-    relatorio['quantitativo_temas'] = contagem_temas
-    contagem_tipos = df['tipo_manifestacao'].value_counts().to_dict() if 'tipo_manifestacao' in df.columns else {}
-    relatorio['quantitativo_tipos'] = contagem_tipos
-    df_reclamacoes = df[df['tipo_manifestacao'] == 'Reclamação'] if 'tipo_manifestacao' in df.columns else pd.DataFrame()
-    relatorio['reclamacoes_por_tema'] = df_reclamacoes['tema_manifestacao'].value_counts().to_dict() if 'tema_manifestacao' in df_reclamacoes.columns else {}
-    df_reclamacoes_coletivo_empresarial = df_reclamacoes[df_reclamacoes['atendimento_para'] == 'Coletivo empresarial'] if 'atendimento_para' in df_reclamacoes.columns else pd.DataFrame()
-    df_reclamacoes_coletivo_adesao = df_reclamacoes[df_reclamacoes['atendimento_para'] == 'Coletivo adesão'] if 'atendimento_para' in df_reclamacoes.columns else pd.DataFrame()
-    df_reclamacoes_individual_familiar = df_reclamacoes[df_reclamacoes['atendimento_para'] == 'Individual/Familiar'] if 'atendimento_para' in df_reclamacoes.columns else pd.DataFrame()
-    relatorio['reclamacoes_coletivo_adesao'] = len(df_reclamacoes_coletivo_adesao)
-    relatorio['reclamacoes_coletivo_empresarial'] = len(df_reclamacoes_coletivo_empresarial)
-    relatorio['reclamacoes_individual_familiar'] = len(df_reclamacoes_individual_familiar)
-    relatorio['reclamacoes_outros_contratos'] = 0
-    df_reclamacoes_beneficiario = df_reclamacoes[df_reclamacoes['atendimento_para'] == 'Beneficiário'] if 'atendimento_para' in df_reclamacoes.columns else pd.DataFrame()
-    relatorio['reclamacoes_beneficiario'] = len(df_reclamacoes_beneficiario)
-    relatorio['reclamacoes_corretor'] = 0
-    relatorio['reclamacoes_gestor'] = 0
-    relatorio['reclamacoes_prestador'] = 0
-    relatorio['reclamacoes_outros_demandantes'] = 0
-    contagem_vinculo = df['vinculo_beneficiario'].value_counts().to_dict() if 'vinculo_beneficiario' in df.columns else {}
-    relatorio['quantitativo_vinculo_beneficiario'] = contagem_vinculo
-    df_com_resposta = df[df['data_resposta'].notna()].copy() if 'data_resposta' in df.columns else pd.DataFrame()
-    total_com_resposta = len(df_com_resposta)
-
-    if total_com_resposta > 0 and 'data_manifestacao' in df_com_resposta.columns and 'data_resposta' in df_com_resposta.columns:
-        df_com_resposta['dias_uteis_resposta'] = df_com_resposta.apply(lambda row: calculate_working_days(row['data_manifestacao'], row['data_resposta']), axis=1)
-        tmro = df_com_resposta['dias_uteis_resposta'].mean()
-        relatorio['tmro'] = round(tmro, 2) if not pd.isna(tmro) else 0
-        dentro_prazo_7dias = df_com_resposta[df_com_resposta['dias_uteis_resposta'] <= 7]
-        prdp = (len(dentro_prazo_7dias) / total_com_resposta) * 100
-        relatorio['prdp'] = round(prdp, 2) if not pd.isna(prdp) else 0
-        dentro_prazo_pactuado = df_com_resposta[(df_com_resposta['dias_uteis_resposta'] > 7) & (df_com_resposta['dias_uteis_resposta'] <= 30)]
-        prdpp = (len(dentro_prazo_pactuado) / total_com_resposta) * 100
-        relatorio['prdpp'] = round(prdpp, 2) if not pd.isna(prdpp) else 0
-        fora_prazo = df_com_resposta[df_com_resposta['dias_uteis_resposta'] > 30]
-        prfp = (len(fora_prazo) / total_com_resposta) * 100
-        relatorio['prfp'] = round(prfp, 2) if not pd.isna(prfp) else 0
-    else:
-        relatorio['tmro'] = 0
-        relatorio['prdp'] = 0
-        relatorio['prdpp'] = 0
-        relatorio['prfp'] = 0
-    relatorio['motivo_nao_cumprimento_prazo'] = "Afetado pela dependência de retorno da rede prestadora envolvida para conclusão final da manifestação."
-    relatorio['possui_avaliacao_atendimento'] = "NÃO"
-    relatorio['total_respondentes'] = "Verificar fonte"
-    relatorio['como_avaliacao'] = "Verificar fonte"
-    relatorio['fez_recomendacoes'] = "SIM"
-    relatorio['recomendacoes_propostas'] = "Recomendou-se conduzir através de linguajar mais acessível as negativas entregues aos beneficiários, proporcionando uma transmissão de maior clareza nas razões pelas quais foram negadas suas solicitações."
-    relatorio['estagio_implementacao'] = "Não houve recomendações propostas no período anterior"
-    relatorio['pessoas_unidade_ouvidoria'] = 1
-    relatorio['divulgacao_ouvidoria'] = "Site, Email"
-    relatorio['acompanha_nip'] = "SIM"
-    relatorio['acoes_para_reduzir_nips'] = "Sim, a condução de analise conjunta entre a ouvidoria e demais áreas envolvidas, a fim de proporcionar analise com maior minucia e realizar o atendimento de solicitações cabíveis previamente a notificação, adiantando o entendimento do processo e possíveis consequências da resposta da ouvidoria."
-    relatorio['conhece_idss_pesquisa_satisfacao'] = "SIM"
-    relatorio['sugestao_melhoria_documentos'] = "Não"
-    return relatorio
+        # Recorte contíguo do DataFrame ordenado por data (busca binária)
+        df = time_index.slice_period(df, start_date, end_date)
+    # Todos os contadores (questões 4 a 45) saem de uma única passada agregada
+    tabela = report_kernel.AggregateTable.from_dataframe(df)
+    return build_relatorio(tabela, tem_canal='forma_entrada_contato' in df.columns)
+
+def _alert_missing_columns(missing_cols):
+    message = f"Alerta: As seguintes colunas não foram encontradas no JSON do Ploomnes: {', '.join(missing_cols)}."
+    send_to_chat(message)
+
+def _alert_invalid_dates(invalidos):
+    detalhes = ', '.join(f"{coluna} ({quantidade})" for coluna, quantidade in invalidos.items())
+    send_to_chat(f"Alerta: Datas não reconhecidas no JSON do Ploomnes (viraram vazias): {detalhes}.")
+
+def _build_normalized_snapshot(meta):
+    """
+    Lê em streaming o corpo JSON apontado por `meta` (o arquivo tem o hash da
+    versão no nome), mantendo apenas as colunas de COL_MAPPING, para que o pico
+    de memória acompanhe as colunas projetadas e não o JSON bruto.
+    """
+    caminho = data_cache.body_path(meta)
+    if caminho is None or not os.path.exists(caminho):
+        # Na sincronização incremental não há corpo JSON: o snapshot colunar é a fonte
+        return None
+    parser = time_index.DateParser()
+    with metrics.stage('normalize_dataset'):
+        # Id e data de atualização também entram, para identificar as linhas no drill-down
+        df, missing_cols = ingest.read_projected(
+            caminho,
+            delta_sync.sync_mapping(COL_MAPPING),
+            categorical=columnar_snapshot.COLUNAS_CATEGORICAS,
+            dates=('data_manifestacao', 'data_resposta', delta_sync.COLUNA_ATUALIZACAO),
+            parser=parser,
+        )
+    metrics.DATASET_ROWS.observe(len(df))
+    if df.empty:
+        return None
+    if delta_sync.COLUNA_ID in df.columns:
+        df = delta_sync.normalize_ids(df)
+    df = time_index.sort_by_date(report_kernel.with_feed_position(df))
+    missing_cols = [col for col in missing_cols if col in COL_MAPPING]
+    if missing_cols:
+        _alert_missing_columns(missing_cols)
+    if parser.invalidos:
+        _alert_invalid_dates(parser.invalidos)
+    return df
+
+def _sync_feed(url, meta):
+    """
+    Sincronização incremental (DATA_SYNC_MODE=incremental): busca só os registros
+    novos ou alterados e os mescla ao snapshot colunar (ver delta_sync.py).
+    """
+    return delta_sync.sync(url, meta, COL_MAPPING, on_missing_columns=_alert_missing_columns,
+                           on_invalid_dates=_alert_invalid_dates)
+
+# Coalescência de chamadas concorrentes idênticas (dados e relatórios)
+SINGLEFLIGHT_CROSS_WORKER = os.environ.get("SINGLEFLIGHT_CROSS_WORKER", "1") == "1"
+request_flight = singleflight.SingleFlight()
+
+def get_dataset():
+    """
+    Retorna (versão, DataFrame normalizado) dos dados atuais. O DataFrame vem do
+    snapshot colunar em disco (memory-map), de modo que requisições com os dados
+    já sincronizados não decodificam JSON. Em caso de erro retorna (None, None).
+    Chamadas concorrentes compartilham a mesma busca/montagem em andamento.
+    """
+    return request_flight.do('dataset', _load_dataset)
+
+def _load_dataset():
+    try:
+        fetch = _sync_feed if delta_sync.SYNC_MODE == 'incremental' else None
+        meta = data_cache.ensure_snapshot(JSON_DATA_URL, on_error=_alert_fetch_error, fetch=fetch)
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print(f"Erro ao obter dados da URL: {e}")
+        _alert_fetch_error(e)
+        return None, None
+    version = meta.get('version')
+    df = columnar_snapshot.load_dataframe(version, lambda: _build_normalized_snapshot(meta),
+                                          cross_worker=SINGLEFLIGHT_CROSS_WORKER,
+                                          on_coalesced=request_flight.record_cross_worker)
+    return version, df
+
+# Relatórios já calculados, por (versão dos dados, início, fim)
+REPORT_CACHE_SIZE = int(os.environ.get("REPORT_CACHE_SIZE", "64"))
+report_cache = result_cache.LRUCache(maxsize=REPORT_CACHE_SIZE)
+
+# Rollup diário do snapshot atual, reconstruído quando a versão dos dados muda
+_rollup_cache = {'version': None, 'rollup': None}
+_rollup_lock = threading.Lock()
+
+def get_daily_rollup():
+    """
+    Retorna (versão, rollup diário) dos dados atuais, montando o rollup
+    (rollups.DailyRollup) apenas quando o snapshot do Ploomnes muda de versão.
+    Se a nova versão veio de uma sincronização incremental sobre a versão do
+    rollup atual, só o delta é aplicado (linhas substituídas com peso -1).
+    """
+    version, df = get_dataset()
+    if df is None:
+        return None, None
+    with _rollup_lock:
+        if version is not None and _rollup_cache['version'] == version:
+            return version, _rollup_cache['rollup']
+        delta = None
+        meta = data_cache.read_meta()
+        if meta and meta.get('version') == version:
+            delta = delta_sync.load_delta(meta, _rollup_cache['version'])
+        if delta is not None:
+            # Cópia: requisições em andamento continuam com o rollup da versão anterior
+            removidos, adicionados = delta
+            rollup = _rollup_cache['rollup'].copy()
+            with metrics.stage('update_rollup'):
+                rollup.add(removidos, weight=-1)
+                rollup.add(adicionados)
+        else:
+            rollup = rollups.DailyRollup()
+            with metrics.stage('build_rollup'):
+                rollup.add(df)
+        _rollup_cache['version'] = version
+        _rollup_cache['rollup'] = rollup
+        # Resultados calculados sobre versões anteriores não servem mais
+        report_cache.discard_if(lambda chave: chave[0] != version)
+        return version, rollup
+
+# Índices de posições para a listagem das manifestações (drill-down), por versão
+_drilldown_cache = {'version': None, 'index': None}
+_drilldown_lock = threading.Lock()
+
+def get_drilldown_index():
+    """
+    Retorna o drilldown.DrilldownIndex dos dados atuais, montado uma vez por
+    versão do snapshot (ou None se os dados não puderem ser obtidos).
+    """
+    version, df = get_dataset()
+    if df is None:
+        return None
+    with _drilldown_lock:
+        if version is not None and _drilldown_cache['version'] == version:
+            return _drilldown_cache['index']
+        with metrics.stage('build_drilldown_index'):
+            indice = drilldown.DrilldownIndex(df, version)
+        _drilldown_cache['version'] = version
+        _drilldown_cache['index'] = indice
+        return indice
+
+def _date_key(value):
+    return pd.Timestamp(value).date().isoformat() if value else None
+
+def get_report(start_date=None, end_date=None):
+    """
+    Retorna {'relatorio': ..., 'graficos': ...} do intervalo. O relatório é montado a
+    partir do rollup diário (somas acumuladas por dia, sem reprocessar as
+    manifestações) e memoizado por (versão dos dados, start_date, end_date).
+    """
+    version, rollup = get_daily_rollup()
+    if rollup is None:
+        return None
+    if not (start_date and end_date):
+        start_date = end_date = None
+
+    def calcular():
+        with metrics.stage('compute_report'):
+            contagens = rollup.query(start_date, end_date)
+            relatorio = build_relatorio(contagens, tem_canal=rollup.has_column('forma_entrada_contato'))
+            graficos = build_chart_data(relatorio)
+        metrics.REPORT_ROWS.observe(contagens.count(), route=metrics.current_route.get())
+        with metrics.stage('encode_json'):
+            corpo_json = json.dumps({'relatorio': relatorio, 'graficos': graficos}, ensure_ascii=False).encode('utf-8')
+        # 'comprimidos' guarda o corpo da API já comprimido, por codificação
+        return {'relatorio': relatorio, 'graficos': graficos, 'json': corpo_json, 'comprimidos': {}}
+
+    if version is None:
+        return calcular()
+    chave = (version, _date_key(start_date), _date_key(end_date))
+    return request_flight.do(('relatorio',) + chave, lambda: report_cache.get_or_compute(chave, calcular))
+
+def get_relatorio(start_date=None, end_date=None):
+    """
+    Retorna apenas o dicionário do relatório do intervalo (ver get_report).
+    """
+    report = get_report(start_date, end_date)
+    return report['relatorio'] if report else None
+
+def get_trend(ano, granularidade='mes'):
+    """
+    Retorna {'tendencia': ..., 'json': ...} com os contadores do relatório
+    (quantidades, TMRO, PRDP, PRDPP e PRFP) de cada mês, trimestre, semana ou dia do ano.
+    Todos os períodos saem de uma só leitura das somas acumuladas do rollup
+    diário; o resultado é memoizado por (versão dos dados, ano, granularidade).
+    """
+    periodos = time_index.period_bounds(ano, granularidade)
+    version, rollup = get_daily_rollup()
+    if rollup is None:
+        return None
+
+    def calcular():
+        with metrics.stage('compute_trend'):
+            tem_canal = rollup.has_column('forma_entrada_contato')
+            contagens = rollup.query_periods([(inicio, fim) for _, inicio, fim in periodos])
+            series = []
+            for (rotulo, inicio, fim), tabela in zip(periodos, contagens):
+                contadores = report_kernel.compute_counters(tabela, tem_canal=tem_canal)
+                contadores.update({
+                    'periodo': rotulo,
+                    'inicio': inicio.date().isoformat(),
+                    'fim': fim.date().isoformat(),
+                    'total': tabela.count(),
+                })
+                series.append(contadores)
+        tendencia = {'ano': ano, 'granularidade': granularidade, 'periodos': series}
+        with metrics.stage('encode_json'):
+            corpo_json = json.dumps({'tendencia': tendencia}, ensure_ascii=False).encode('utf-8')
+        return {'tendencia': tendencia, 'json': corpo_json, 'comprimidos': {}}
+
+    if version is None:
+        return calcular()
+    chave = (version, 'tendencia', ano, granularidade)
+    return request_flight.do(('tendencia',) + chave, lambda: report_cache.get_or_compute(chave, calcular))
+
+# Abreviações dos temas usadas no eixo do gráfico de temas
+abreviacoes_temas = {
+    'Administrativo': 'Admin.',
+    'Cobertura Assistencial': 'Cob. Assis.',
+    'Financeiro': 'Financeiro',
+    'Rede Credenciada/referenciada': 'Rede Cred/Ref',
+    'Serviço de Atendimento ao Cliente (SAC)': 'SAC'
+}
+
+def get_plotly_js_url():
+    """
+    URL do plotly.js carregado uma única vez pelo dashboard: a cópia local com
+    hash no nome (ver static_assets.py), ou PLOTLY_JS_URL se definida.
+    """
+    if os.environ.get("PLOTLY_JS_URL"):
+        return os.environ["PLOTLY_JS_URL"]
+    return asset_url(static_assets.PLOTLY_JS)
+
+def build_chart_data(relatorio):
+    """
+    Extrai do relatório apenas os dados (rótulos e quantidades) dos gráficos do dashboard.
+    """
+    tipos = relatorio.get('quantitativo_tipos') or {}
+    canais = relatorio.get('quantitativo_canais') or {}
+    temas = relatorio.get('quantitativo_temas') or {}
+    vinculo = relatorio.get('quantitativo_vinculo_beneficiario') or {}
+    return {
+        'tipos': {'labels': [f"{k} ({v})" for k, v in tipos.items()], 'values': list(tipos.values())},
+        'canais': {'labels': [f"{k} ({v})" for k, v in canais.items()], 'values': list(canais.values())},
+        'temas': {'labels': [abreviacoes_temas.get(str(k).strip(), str(k).strip()) for k in temas], 'values': list(temas.values())},
+        'vinculo': {'labels': list(vinculo.keys()), 'values': list(vinculo.values())},
+    }
+
+# PDFs prontos, por hash do conteúdo (relatório + respostas manuais + data de geração)
+PDF_CACHE_SIZE = int(os.environ.get("PDF_CACHE_SIZE", "32"))
+pdf_cache = result_cache.LRUCache(maxsize=PDF_CACHE_SIZE)
+
+def _pdf_cache_key(relatorio, questoes_manuais):
+    # A data do dia entra na chave porque é impressa no documento
+    conteudo = json.dumps([relatorio, questoes_manuais or [], date.today().isoformat()], sort_keys=True, default=str)
+    return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+
+def get_pdf_report(relatorio, questoes_manuais=None):
+    """
+    Retorna os bytes do PDF do relatório, reaproveitando um PDF idêntico já gerado.
+    """
+    chave = _pdf_cache_key(relatorio, questoes_manuais)
+    def gerar():
+        with metrics.stage('render_pdf'):
+            return generate_pdf_report(relatorio, questoes_manuais)
+    return pdf_cache.get_or_compute(chave, gerar)
+
+# Geração assíncrona: 'sincrono' (padrão) gera o PDF na própria requisição;
+# 'assincrono' envia o job para o pool de processos e devolve o id do job
+PDF_MODE = os.environ.get("PDF_MODE", "sincrono")
+pdf_job_queue = pdf_jobs.PDFJobQueue(generate_pdf_report, cache=pdf_cache)
 
 # ---------------------------------------------------
-# Geração do PDF (ajustada para imprimir as questões com o número original)
+# Métricas e profiler por requisição
 # ---------------------------------------------------
 
-def generate_pdf_report(relatorio, questoes_manuais=None):
-    """
-    Gera o PDF do relatório REA. Se houver questoes_manuais (lista de dicts
-    com 'questao' e 'resposta'), imprime cada 'questao' exatamente como veio
-    (ex.: '49) Texto...') para preservar o número original.
-    """
-    doc = SimpleDocTemplate("relatorio_rea.pdf", pagesize=letter)
-    story = []
-    styles = getSampleStyleSheet()
-    styles['Normal'].leading = 14
-    header_style = ParagraphStyle('HeaderStyle', parent=styles['Normal'], alignment=TA_CENTER, fontSize=14)
-    story.append(Paragraph("<b>Operadora:</b> 417297 - ELOSAÚDE - ASSOCIAÇÃO DE ASSISTÊNCIA À SAÚDE", header_style))
-    story.append(Paragraph("<b>Processo Número nº:</b> 33910028928202421", header_style))
-    story.append(Paragraph("<b>Ouvidoria - REA-Ouvidorias</b>", header_style))
-    story.append(Spacer(1, 0.2*inch))
-    story.append(Paragraph("----------------------------------------------------------------------------------------------------------------------------------------", styles['Normal']))
-    story.append(Spacer(1, 0.2*inch))
-    story.append(Paragraph("Eu CLEIDE DE CALDAS NOGUEIRA, declaro que enviei as informações abaixo da operadora ELOSAÚDE - ASSOCIAÇÃO DE ASSISTÊNCIA À SAÚDE (417297) conforme solicitado.", styles['Normal']))
-    story.append(Spacer(1, 0.2*inch))
-    story.append(Paragraph(f"1) Ano dos dados informados: {date.today().year}", styles['Normal']))
-    story.append(Paragraph(f"2) E-mail do responsável pela Ouvidoria: {relatorio.get('email_responsavel', '')}", styles['Normal']))
-    story.append(Paragraph(f"3) Telefone de contato: {relatorio.get('telefone_contato', '')}", styles['Normal']))
-    story.append(Paragraph(f"4) [REANÁLISE] A Ouvidoria recebeu algum requerimento de reanálise assistencial em {date.today().year}?: {relatorio.get('recebeu_reanalise', '')}", styles['Normal']))
-    story.append(Paragraph(f"5) [REANÁLISE] Por que a Ouvidoria não recebeu requerimentos de reanálise assistencial?: {'Não houve requerimentos no período' if relatorio.get('recebeu_reanalise') == 'NÃO' else relatorio.get('motivo_conversao', '')}", styles['Normal']))
-    story.append(Paragraph(f"6) [REANÁLISE] Quantidade de requerimentos de reanálise convertidos em manifestação de ouvidoria: {relatorio.get('conversao_reanalise', 0)}", styles['Normal']))
-    story.append(Paragraph(f"11) [MANIFESTAÇÃO] A operadora recebeu manifestações próprias?: {relatorio.get('recebeu_manifestacao_propria', '')}", styles['Normal']))
-    story.append(Paragraph(f"12) [CANAL] Quantidade de manifestações recebidas pelo canal E-mail: {relatorio.get('quantitativo_canais', {}).get('E-mail', 0)}", styles['Normal']))
-    story.append(Paragraph(f"13) [CANAL] Quantidade de manifestações recebidas pelo canal Telefone: {relatorio.get('quantitativo_canais', {}).get('Telefone', 0)}", styles['Normal']))
-    story.append(Paragraph(f"14) [CANAL] Quantidade de manifestações recebidas pelo canal Site: {relatorio.get('quantitativo_canais', {}).get('Site', 0)}", styles['Normal']))
-    story.append(Paragraph(f"15) [CANAL] Quantidade de manifestações recebidas pelo canal Aplicativo ou Redes sociais da operadora: {relatorio.get('quantitativo_canais', {}).get('Aplicativo ou Redes sociais da operadora', 0)}", styles['Normal']))
-    story.append(Paragraph(f"16) [CANAL] Quantidade de manifestações recebidas pelo canal Presencialmente: {relatorio.get('quantitativo_canais', {}).get('Presencialmente', 0)}", styles['Normal']))
-    story.append(Paragraph(f"17) [CANAL] Quantidade de manifestações recebidas por outros canais: {relatorio.get('quantitativo_canais', {}).get('Outros', 0)}", styles['Normal']))
-    story.append(Paragraph(f"18) [TEMA] Quantidade de manifestações sobre o tema Administrativo: {relatorio.get('quantitativo_temas', {}).get('Administrativo', 0)}", styles['Normal']))
-    story.append(Paragraph(f"19) [TEMA] Quantidade de manifestações sobre o tema Cobertura assistencial: {relatorio.get('quantitativo_temas', {}).get('Cobertura assistencial', 0)}", styles['Normal']))
-    story.append(Paragraph(f"20) [TEMA] Quantidade de manifestações sobre o tema Financeiro: {relatorio.get('quantitativo_temas', {}).get('Financeiro', 0)}", styles['Normal']))
-    story.append(Paragraph(f"21) [TEMA] Quantidade de manifestações sobre o tema Rede credenciada/referenciada: {relatorio.get('quantitativo_temas', {}).get('Rede credenciada/referenciada', 0)}", styles['Normal']))
-    story.append(Paragraph(f"22) [TEMA] Quantidade de manifestações sobre o tema Serviço de Atendimento ao Cliente (SAC): {relatorio.get('quantitativo_temas', {}).get('Serviço de Atendimento ao Cliente (SAC)', 0)}", styles['Normal']))
-    story.append(Paragraph(f"23) [TIPO] Quantidade de manifestações do tipo Consulta: {relatorio.get('quantitativo_tipos', {}).get('Consulta', 0)}", styles['Normal']))
-    story.append(Paragraph(f"24) [TIPO] Quantidade de manifestações do tipo Denúncia: {relatorio.get('quantitativo_tipos', {}).get('Denúncia', 0)}", styles['Normal']))
-    story.append(Paragraph(f"25) [TIPO] Quantidade de manifestações do tipo Elogio: {relatorio.get('quantitativo_tipos', {}).get('Elogio', 0)}", styles['Normal']))
-    story.append(Paragraph(f"26) [TIPO] Quantidade de manifestações do tipo Reclamação: {relatorio.get('quantitativo_tipos', {}).get('Reclamação', 0)}", styles['Normal']))
-    story.append(Paragraph(f"27) [TIPO] Quantidade de manifestações do tipo Sugestão: {relatorio.get('quantitativo_tipos', {}).get('Sugestão', 0)}", styles['Normal']))
-    story.append(Paragraph(f"28) [RECLAMAÇÕES - TEMA] Quantidade de RECLAMAÇÕES sobre o tema Administrativo: {relatorio.get('reclamacoes_por_tema', {}).get('Administrativo', 0)}", styles['Normal']))
-    story.append(Paragraph(f"29) [RECLAMAÇÕES - TEMA] Quantidade de RECLAMAÇÕES sobre o tema Cobertura assistencial: {relatorio.get('reclamacoes_por_tema', {}).get('Cobertura assistencial', 0)}", styles['Normal']))
-    story.append(Paragraph(f"30) [RECLAMAÇÕES - TEMA] Quantidade de RECLAMAÇÕES sobre o tema Financeiro: {relatorio.get('reclamacoes_por_tema', {}).get('Financeiro', 0)}", styles['Normal']))
-    story.append(Paragraph(f"31) [RECLAMAÇÕES - TEMA] Quantidade de RECLAMAÇÕES sobre o tema Rede credenciada/referenciada: {relatorio.get('reclamacoes_por_tema', {}).get('Rede credenciada/referenciada', 0)}", styles['Normal']))
-    story.append(Paragraph(f"32) [RECLAMAÇÕES - TEMA] Quantidade de RECLAMAÇÕES sobre o tema SAC: {relatorio.get('reclamacoes_por_tema', {}).get('Serviço de Atendimento ao Cliente (SAC)', 0)}", styles['Normal']))
-    story.append(Paragraph(f"33) [RECLAMAÇÕES - TIPO] Quantidade de RECLAMAÇÕES vindas do tipo de contrato Coletivo adesão: {relatorio.get('reclamacoes_coletivo_adesao', 0)}", styles['Normal']))
-    story.append(Paragraph(f"34) [RECLAMAÇÕES - TIPO] Quantidade de RECLAMAÇÕES vindas do tipo de contrato Coletivo empresarial: {relatorio.get('reclamacoes_coletivo_empresarial', 0)}", styles['Normal']))
-    story.append(Paragraph(f"35) [RECLAMAÇÕES - TIPO] Quantidade de RECLAMAÇÕES vindas do tipo de contrato Individual/Familiar: {relatorio.get('reclamacoes_individual_familiar', 0)}", styles['Normal']))
-    story.append(Paragraph(f"36) [RECLAMAÇÕES - TIPO] Quantidade de RECLAMAÇÕES vindas de Outro tipo de contrato: {relatorio.get('reclamacoes_outros_contratos', 0)}", styles['Normal']))
-    story.append(Paragraph(f"37) [RECLAMAÇÕES - DEMANDANTE] Quantidade de RECLAMAÇÕES realizadas por Beneficiário ou interlocutor: {relatorio.get('reclamacoes_beneficiario', 0)}", styles['Normal']))
-    story.append(Paragraph(f"38) [RECLAMAÇÕES - DEMANDANTE] Quantidade de RECLAMAÇÕES realizadas por Corretor: {relatorio.get('reclamacoes_corretor', 0)}", styles['Normal']))
-    story.append(Paragraph(f"39) [RECLAMAÇÕES - DEMANDANTE] Quantidade de RECLAMAÇÕES realizadas por Gestor contrato coletivo: {relatorio.get('reclamacoes_gestor', 0)}", styles['Normal']))
-    story.append(Paragraph(f"40) [RECLAMAÇÕES - DEMANDANTE] Quantidade de RECLAMAÇÕES realizadas por Prestador de serviços: {relatorio.get('reclamacoes_prestador', 0)}", styles['Normal']))
-    story.append(Paragraph(f"41) [RECLAMAÇÕES - DEMANDANTE] Quantidade de RECLAMAÇÕES realizadas por Outros demandantes: {relatorio.get('reclamacoes_outros_demandantes', 0)}", styles['Normal']))
-    story.append(Paragraph(f"42) [INDICADORES] Tempo Médio de Resposta da Ouvidoria (TMRO): {relatorio.get('tmro', 0)}", styles['Normal']))
-    story.append(Paragraph(f"43) [INDICADORES] Percentual de Resposta Dentro do Prazo (PRDP): {relatorio.get('prdp', 0)}", styles['Normal']))
-    story.append(Paragraph(f"44) [INDICADORES] Percentual de Resposta Dentro de Prazo Pactuado (PRDPP): {relatorio.get('prdpp', 0)}", styles['Normal']))
-    story.append(Paragraph(f"45) [INDICADORES] Percentual de Resposta Fora do Prazo (PRFP): {relatorio.get('prfp', 0)}", styles['Normal']))
-    story.append(Paragraph(f"46) [INDICADORES] Motivo(s) para o não cumprimento do prazo: {relatorio.get('motivo_nao_cumprimento_prazo', '')}", styles['Normal']))
-    story.append(Paragraph(f"47) [AVALIAÇÃO-OUVIDORIA] A Ouvidoria possui avaliação de seu atendimento?: {relatorio.get('possui_avaliacao_atendimento', '')}", styles['Normal']))
-    story.append(Paragraph(f"48) [AVALIAÇÃO-OUVIDORIA] Informar o total de respondentes: {relatorio.get('total_respondentes', '')}", styles['Normal']))
-    
-    # Substitui as respostas automáticas pelas manuais, se existirem
-    resposta_q49 = next((qm['resposta'] for qm in (questoes_manuais or []) if qm['questao'].startswith("49)")), relatorio.get('como_avaliacao', ''))
-    story.append(Paragraph(f"49) [AVALIAÇÃO-OUVIDORIA] De uma forma geral, como o seu atendimento foi avaliado?: {resposta_q49}", styles['Normal']))
-
-    story.append(Paragraph(f"50) [RECOMENDAÇÕES] A Ouvidoria fez recomendações para melhoria do processo de trabalho da operadora?: {relatorio.get('fez_recomendacoes', '')}", styles['Normal']))
-    story.append(Paragraph(f"51) [RECOMENDAÇÕES] Informar, resumidamente, as recomendações propostas.: {relatorio.get('recomendacoes_propostas', '')}", styles['Normal']))
-
-    resposta_q52 = next((qm['resposta'] for qm in (questoes_manuais or []) if qm['questao'].startswith("52)")), 'Não aplicável' if relatorio.get('fez_recomendacoes') == 'SIM' else relatorio.get('motivo_nao_cumprimento_prazo', ''))
-    story.append(Paragraph(f"52) [RECOMENDAÇÕES] Por que a ouvidoria não fez recomendações de melhoria?: {resposta_q52}", styles['Normal']))
-
-    story.append(Paragraph(f"53) [RECOMENDAÇÕES] Como considera o estágio de implementação das recomendações feitas em 2023?: {relatorio.get('estagio_implementacao', '')}", styles['Normal']))
-    story.append(Paragraph(f"54) [ESTRUTURA] Quantas pessoas compõem exclusivamente a unidade de Ouvidoria?: {relatorio.get('pessoas_unidade_ouvidoria', 0)}", styles['Normal']))
-    story.append(Paragraph(f"55) [DIVULGAÇÃO] Como a operadora divulga a existência da Ouvidoria?: {relatorio.get('divulgacao_ouvidoria', '')}", styles['Normal']))
-    story.append(Paragraph(f"56) [ACOMPANHAMENTO] A Ouvidoria acompanha o desempenho da operadora na Notificação de Intermediação Preliminar (NIP)?: {relatorio.get('acompanha_nip', '')}", styles['Normal']))
-
-    resposta_q57 = next((qm['resposta'] for qm in (questoes_manuais or []) if qm['questao'].startswith("57)")), relatorio.get('acoes_para_reduzir_nips', ''))
-    story.append(Paragraph(f"57) [ACOMPANHAMENTO] A Ouvidoria tomou alguma ação para tentar reduzir a quantidade de NIPs? Se sim, descreva.: {resposta_q57}", styles['Normal']))
-
-    story.append(Paragraph(f"58) [ACOMPANHAMENTO] A Ouvidoria conhece o Índice de Desempenho da Saúde Suplementar (IDSS) da operadora e a pesquisa de satisfação junto ao consumidor que o integra?: {relatorio.get('conhece_idss_pesquisa_satisfacao', '')}", styles['Normal']))
-
-    resposta_q59 = next((qm['resposta'] for qm in (questoes_manuais or []) if qm['questao'].startswith("59)")), relatorio.get('sugestao_melhoria_documentos', ''))
-    story.append(Paragraph(f"59) [ACOMPANHAMENTO] A Ouvidoria fez alguma sugestão de melhoria com base nesses documentos? Se sim, descreva.: {resposta_q59}", styles['Normal']))
-
-    story.append(Spacer(1, 0.2*inch))
-    story.append(Paragraph(f"Este documento foi gerado automaticamente pelo sistema Protocolo Eletrônico em {datetime.now().strftime('%d/%m/%Y')}.", styles['Normal']))
-    doc.build(story)
-    return "relatorio_rea.pdf"
+def _cache_counts():
+    contagens = {}
+    for nome, cache in (('relatorio', report_cache), ('pdf', pdf_cache)):
+        stats = cache.stats()
+        contagens[(nome, 'hit')] = stats['hits']
+        contagens[(nome, 'miss')] = stats['misses']
+    return contagens
+
+metrics.register_source(metrics.CACHE_REQUESTS, _cache_counts)
+
+# Profiler opcional: ?profile=1 (com PROFILER_ENABLED=1) ou uma fração
+# PROFILE_SAMPLE_RATE das requisições; grava apenas as mais lentas que PROFILE_MIN_MS
+PROFILER_ENABLED = os.environ.get("PROFILER_ENABLED", "0") == "1"
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_MIN_MS = float(os.environ.get("PROFILE_MIN_MS", "500"))
+PROFILE_DIR = os.path.join(metrics.METRICS_DIR, "profiles")
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+@app.before_request
+def _start_request_metrics():
+    rota = request.url_rule.rule if request.url_rule else 'desconhecida'
+    g.metrics_route = rota
+    g.metrics_token = metrics.current_route.set(rota)
+    g.metrics_start = time.perf_counter()
+    g.sampler = None
+    if PROFILER_ENABLED and (request.args.get('profile') == '1' or random.random() < PROFILE_SAMPLE_RATE):
+        g.sampler = profiler.StackSampler().start()
+
+@app.after_request
+def _record_request_metrics(response):
+    inicio = g.get('metrics_start')
+    if inicio is None:
+        return response
+    duracao = time.perf_counter() - inicio
+    rota = g.metrics_route
+    metrics.REQUEST_DURATION.observe(duracao, route=rota, method=request.method, status=response.status_code)
+    if response.content_length is not None:
+        metrics.RESPONSE_BYTES.observe(response.content_length, route=rota)
+    if g.sampler is not None:
+        g.sampler.stop()
+        if duracao * 1000 >= PROFILE_MIN_MS:
+            g.sampler.write_folded(profiler.profile_path(PROFILE_DIR, rota, duracao))
+        g.sampler = None
+    metrics.flush()
+    return response
+
+@app.teardown_request
+def _finish_request_metrics(exc):
+    # Também roda quando a view levanta exceção (e after_request não é chamado)
+    if g.get('sampler') is not None:
+        g.sampler.stop()
+    if g.get('metrics_token') is not None:
+        metrics.current_route.reset(g.metrics_token)
 
 # ---------------------------------------------------
 # ROTAS
 # ---------------------------------------------------
 
+# ---------------------------------------------------
+# Arquivos estáticos com hash no nome e cache longo
+# ---------------------------------------------------
+
+# Montados no build da imagem (python static_assets.py); aqui só o manifesto é
+# lido, e o app não sobe sem ele
+static_assets.load_manifest()
+
+@app.template_global()
+def asset_url(nome):
+    """
+    URL do asset lógico `nome` (ex.: 'style.css') com o hash do conteúdo no nome.
+    """
+    return url_for('asset', nome=static_assets.asset_name(nome))
+
+@app.route("/assets/<nome>")
+def asset(nome):
+    encontrado = static_assets.resolve(nome)
+    if encontrado is None:
+        return make_response('', 404)
+    caminho, codificacoes = encontrado
+    encoding = request.accept_encodings.best_match(codificacoes, default='identity')
+    extensao = {'br': '.br', 'gzip': '.gz'}.get(encoding, '')
+    mimetype = mimetypes.guess_type(nome)[0] or 'application/octet-stream'
+    response = send_file(caminho + extensao, mimetype=mimetype, conditional=True, max_age=static_assets.MAX_AGE)
+    if extensao:
+        response.headers['Content-Encoding'] = encoding
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    response.vary.add('Accept-Encoding')
+    return response
+
 @app.route("/")
 def index():
     return redirect(url_for("login"))
@@ -400,185 +616,174 @@ def logout():
 def dashboard():
     if not session.get('logged_in'):
         return redirect(url_for('login'))
-        
-    start_date_str = request.args.get('start_date')
-    end_date_str = request.args.get('end_date')
-    start_date = pd.to_datetime(start_date_str) if start_date_str else None
-    end_date = pd.to_datetime(end_date_str) if end_date_str else None
-    data = get_data_from_url()
-    relatorio = process_data(data, start_date, end_date)
-    if relatorio is None:
-        return "Erro ao obter dados. Verifique sua URL e a conexão.", 500
-
-    color_palette = ["#59BEAF", "#467090", "#96E5E5", "#167F7F", '#931C76', '#9B182C']
-    
-    # Geração dos gráficos
-    # --- Gráfico de Tipos de Manifestação (Pizza) ---
-    df_tipos = pd.DataFrame(list(relatorio['quantitativo_tipos'].items()), columns=['Tipo', 'Quantidade']) if relatorio.get('quantitativo_tipos') else pd.DataFrame(columns=['Tipo', 'Quantidade'])
-    df_tipos['Tipo_com_Quantidade'] = df_tipos.apply(lambda row: f"{row['Tipo']} ({row['Quantidade']})", axis=1)
-    fig_tipos = px.pie(
-        df_tipos,
-        values='Quantidade',
-        names='Tipo_com_Quantidade',
-        title='Distribuição por Tipo de Manifestação',
-        color_discrete_sequence=color_palette
-    )
-    fig_tipos.update_traces(
-        textinfo='percent',
-        textposition='inside',
-        marker_line_width=1,
-        marker_line_color='black',
-        textfont=dict(size=17),
-        hovertemplate="<b>%{label}</b><br>Quantidade: %{value}<br>Percentual: %{percent}<extra></extra>"
-    )
-    fig_tipos.update_layout(
-        autosize=True,
-        margin=dict(l=40, r=40, t=40, b=40),
-        paper_bgcolor='#e0e5ec',
-        plot_bgcolor='#e0e5ec',
-        legend=dict(
-            orientation="v",
-            yanchor="middle",
-            y=0.5,
-            xanchor="left",
-            x=-0.2,
-            title_text='',
-            font=dict(size=17)
-        )
-    )
-    div_tipos = fig_tipos.to_html(
-        full_html=False,
-        include_plotlyjs='cdn',
-        config={'responsive': True}
-    )
-
-    # --- Gráfico de Canais de Entrada (Pizza) ---
-    df_canais = pd.DataFrame(list(relatorio['quantitativo_canais'].items()), columns=['Canal', 'Quantidade']) if relatorio.get('quantitativo_canais') else pd.DataFrame(columns=['Canal', 'Quantidade'])
-    df_canais['Canal_com_Quantidade'] = df_canais.apply(lambda row: f"{row['Canal']} ({row['Quantidade']})", axis=1)
-    fig_canais = px.pie(
-        df_canais,
-        values='Quantidade',
-        names='Canal_com_Quantidade',
-        title='Distribuição por Canal de Entrada',
-        color_discrete_sequence=color_palette
-    )
-    fig_canais.update_traces(
-        textinfo='percent',
-        textposition='inside',
-        marker_line_width=1,
-        marker_line_color='black',
-        textfont=dict(size=17),
-        hovertemplate="<b>%{label}</b><br>Quantidade: %{value}<br>Percentual: %{percent}<extra></extra>"
-    )
-    fig_canais.update_layout(
-        autosize=True,
-        margin=dict(l=40, r=40, t=40, b=40),
-        paper_bgcolor='#e0e5ec',
-        plot_bgcolor='#e0e5ec',
-        legend=dict(
-            orientation="v",
-            yanchor="middle",
-            y=0.5,
-            xanchor="left",
-            x=-0.2,
-            title_text='',
-            font=dict(size=17)
+
+    # A página é só a estrutura; os números e gráficos vêm de /api/relatorio
+    with metrics.stage('render_template'):
+        return render_template("dashboard.html",
+            plotly_js_url=get_plotly_js_url(),
+            pdf_modo=PDF_MODE,
+            start_date=request.args.get('start_date'),
+            end_date=request.args.get('end_date'),
+            ano_tendencia=(request.args.get('end_date') or str(date.today().year))[:4],
+            questoes_predefinidas=get_questoes_manuais()
         )
-    )
-    div_canais = fig_canais.to_html(
-        full_html=False,
-        include_plotlyjs='cdn',
-        config={'responsive': True}
-    )
-
-    # --- Gráfico de Tema de Manifestação (Barras) ---
-    df_temas = pd.DataFrame(list(relatorio['quantitativo_temas'].items()), columns=['Tema', 'Quantidade']) if relatorio.get('quantitativo_temas') else pd.DataFrame(columns=['Tema', 'Quantidade'])
-    abreviacoes = {
-        'Administrativo': 'Admin.',
-        'Cobertura Assistencial': 'Cob. Assis.',
-        'Financeiro': 'Financeiro',
-        'Rede Credenciada/referenciada': 'Rede Cred/Ref',
-        'Serviço de Atendimento ao Cliente (SAC)': 'SAC'
-    }
-    df_temas['Tema'] = df_temas['Tema'].str.strip().replace(abreviacoes)
-    fig_temas = px.bar(
-        df_temas,
-        x='Tema',
-        y='Quantidade',
-        title='Quantidade por Tema de Manifestação',
-        color_discrete_sequence=color_palette,
-        text='Quantidade'
-    )
-    fig_temas.update_traces(
-        textposition='outside',
-        textfont_size=17,
-        marker_color='#467090'
-    )
-    fig_temas.update_layout(
-        autosize=True,
-        margin=dict(l=40, r=40, t=40, b=40),
-        xaxis_title="",
-        yaxis_title="",
-        paper_bgcolor='#e0e5ec',
-        plot_bgcolor='#e0e5ec',
-        xaxis=dict(tickfont=dict(size=17), title_font=dict(size=17)),
-        yaxis=dict(tickfont=dict(size=17), showticklabels=False, title_font=dict(size=17))
-    )
-    div_temas = fig_temas.to_html(
-        full_html=False,
-        include_plotlyjs='cdn',
-        config={'responsive': True}
-    )
-
-    # --- Gráfico de Vínculo do Beneficiário (Barras) ---
-    df_vinculo = pd.DataFrame(list(relatorio['quantitativo_vinculo_beneficiario'].items()), columns=['Vínculo', 'Quantidade']) if relatorio.get('quantitativo_vinculo_beneficiario') else pd.DataFrame(columns=['Vínculo', 'Quantidade'])
-    fig_vinculo = px.bar(
-        df_vinculo,
-        x='Vínculo',
-        y='Quantidade',
-        title='Quantidade por Vínculo do Beneficiário',
-        color_discrete_sequence=color_palette,
-        text='Quantidade'
-    )
-    fig_vinculo.update_traces(
-        textposition='outside',
-        textfont_size=17,
-        marker_color='#467090'
-    )
-    fig_vinculo.update_layout(
-        autosize=True,
-        margin=dict(l=40, r=40, t=40, b=40),
-        xaxis_title="",
-        yaxis_title="",
-        paper_bgcolor='#e0e5ec',
-        plot_bgcolor='#e0e5ec',
-        xaxis=dict(tickfont=dict(size=17), title_font=dict(size=17)),
-        yaxis=dict(tickfont=dict(size=17), showticklabels=False, title_font=dict(size=17))
-    )
-    div_vinculo = fig_vinculo.to_html(
-        full_html=False,
-        include_plotlyjs='cdn',
-        config={'responsive': True}
-    )
-
-    return render_template("dashboard.html",
-        relatorio=relatorio,
-        div_tipos=div_tipos,
-        div_temas=div_temas,
-        div_canais=div_canais,
-        div_vinculo=div_vinculo,
-        start_date=start_date_str,
-        end_date=end_date_str,
-        questoes_predefinidas=get_questoes_manuais()
-    )
+
+def _report_etag(version, start_date, end_date, encoding):
+    """
+    ETag forte do relatório: depende só da versão dos dados, do período, do ano
+    corrente (usado no relatório) e da codificação da resposta.
+    """
+    chave = f"{version}|{_date_key(start_date)}|{_date_key(end_date)}|{date.today().year}"
+    return f"{hashlib.sha256(chave.encode('utf-8')).hexdigest()[:32]}-{encoding}"
+
+def _compress(corpo, encoding):
+    if encoding == 'br':
+        return brotli.compress(corpo)
+    if encoding == 'gzip':
+        return gzip.compress(corpo, compresslevel=6)
+    return corpo
+
+def _negotiate_encoding():
+    codificacoes = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return request.accept_encodings.best_match(codificacoes, default='identity')
+
+def _cached_json_response(etag, encoding, obter):
+    """
+    Resposta JSON revalidável por ETag. `obter()` devolve o resultado memoizado
+    ({'json': ..., 'comprimidos': {...}}) e só é chamado se o cliente não tiver
+    a versão atual; o corpo comprimido fica guardado junto do resultado.
+    """
+    # Revalidação: responde 304 sem recalcular nada
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+    else:
+        resultado = obter()
+        if resultado is None:
+            return jsonify({'erro': 'Erro ao obter dados. Verifique sua URL e a conexão.'}), 500
+        corpo = resultado['comprimidos'].get(encoding)
+        if corpo is None:
+            with metrics.stage('compress'):
+                corpo = _compress(resultado['json'], encoding)
+            resultado['comprimidos'][encoding] = corpo
+        response = make_response(corpo)
+        response.mimetype = 'application/json'
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.vary.add('Accept-Encoding')
+    response.vary.add('Cookie')
+    return response
+
+def _parse_period(valores):
+    """
+    Lê start_date e end_date de `valores` (request.args ou request.values).
+    Sem as duas datas, o período é o total (None, None). Levanta ValueError ou
+    TypeError se alguma data for inválida.
+    """
+    start_date = pd.to_datetime(valores['start_date']) if valores.get('start_date') else None
+    end_date = pd.to_datetime(valores['end_date']) if valores.get('end_date') else None
+    if pd.isna(start_date) or pd.isna(end_date):
+        return None, None
+    return start_date, end_date
+
+@app.route("/api/relatorio")
+def api_relatorio():
+    if not session.get('logged_in'):
+        return jsonify({'erro': 'Não autenticado.'}), 401
+
+    try:
+        start_date, end_date = _parse_period(request.args)
+    except (ValueError, TypeError):
+        return jsonify({'erro': 'Período inválido.'}), 400
+
+    version, _ = get_dataset()
+    if version is None:
+        return jsonify({'erro': 'Erro ao obter dados. Verifique sua URL e a conexão.'}), 500
+
+    encoding = _negotiate_encoding()
+    etag = _report_etag(version, start_date, end_date, encoding)
+    return _cached_json_response(etag, encoding, lambda: get_report(start_date, end_date))
+
+@app.route("/api/tendencia")
+def api_tendencia():
+    if not session.get('logged_in'):
+        return jsonify({'erro': 'Não autenticado.'}), 401
+
+    granularidade = request.args.get('granularidade', 'mes')
+    try:
+        ano = int(request.args.get('ano') or date.today().year)
+    except ValueError:
+        return jsonify({'erro': 'Ano inválido.'}), 400
+    if granularidade not in time_index.GRANULARIDADES:
+        return jsonify({'erro': f"Granularidade inválida (use {', '.join(time_index.GRANULARIDADES)})."}), 400
+
+    version, _ = get_dataset()
+    if version is None:
+        return jsonify({'erro': 'Erro ao obter dados. Verifique sua URL e a conexão.'}), 500
+
+    encoding = _negotiate_encoding()
+    chave = f"{version}|tendencia|{ano}|{granularidade}"
+    etag = f"{hashlib.sha256(chave.encode('utf-8')).hexdigest()[:32]}-{encoding}"
+    return _cached_json_response(etag, encoding, lambda: get_trend(ano, granularidade))
+
+@app.route("/api/manifestacoes")
+def api_manifestacoes():
+    """
+    Lista as manifestações por trás dos contadores, filtradas por tipo, tema,
+    canal, atendimento_para, vinculo, faixa_prazo e período. Paginação por
+    cursor (?apos=<proximo>); com formato=csv, o resultado a partir do cursor é
+    enviado em streaming e X-Total-Count informa quantas linhas ele terá.
+    """
+    if not session.get('logged_in'):
+        return jsonify({'erro': 'Não autenticado.'}), 401
+
+    filtros = {coluna: request.args[nome] for nome, coluna in drilldown.FILTROS.items() if request.args.get(nome)}
+    faixa = request.args.get('faixa_prazo')
+    if faixa:
+        if faixa not in report_kernel.FAIXAS_PRAZO:
+            return jsonify({'erro': f"faixa_prazo inválida (use {', '.join(report_kernel.FAIXAS_PRAZO)})."}), 400
+        filtros[drilldown.FILTRO_FAIXA] = faixa
+    try:
+        start_date = pd.to_datetime(request.args['start_date']) if request.args.get('start_date') else None
+        end_date = pd.to_datetime(request.args['end_date']) if request.args.get('end_date') else None
+        limite = min(int(request.args.get('limite') or 100), drilldown.MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({'erro': 'Parâmetros inválidos.'}), 400
+    if limite < 1:
+        return jsonify({'erro': 'Parâmetros inválidos.'}), 400
+
+    indice = get_drilldown_index()
+    if indice is None:
+        return jsonify({'erro': 'Erro ao obter dados. Verifique sua URL e a conexão.'}), 500
+    with metrics.stage('query_drilldown'):
+        posicoes = indice.positions(filtros, start_date, end_date)
+        try:
+            restantes = indice.after(posicoes, request.args.get('apos'))
+        except drilldown.InvalidCursorError as e:
+            return jsonify({'erro': str(e)}), 409
+
+    if request.args.get('formato') == 'csv':
+        response = Response(indice.iter_csv(restantes), mimetype='text/csv')
+        response.headers['Content-Disposition'] = 'attachment; filename=manifestacoes.csv'
+        response.headers['X-Total-Count'] = str(len(restantes))
+        return response
+
+    with metrics.stage('render_drilldown'):
+        linhas, proximo = indice.page(restantes, limite=limite)
+    return jsonify({'total': len(posicoes), 'itens': linhas.to_dict(orient='records'), 'proximo': proximo})
 
 @app.route("/download-pdf", methods=['GET', 'POST'])
 def download_pdf():
     if not session.get('logged_in'):
         return redirect(url_for('login'))
 
-    data = get_data_from_url()
-    relatorio = process_data(data)
+    # Usa o mesmo período filtrado no dashboard (campos ocultos do formulário)
+    try:
+        start_date, end_date = _parse_period(request.values)
+    except (ValueError, TypeError):
+        return "Período inválido.", 400
+    relatorio = get_relatorio(start_date, end_date)
     if relatorio is None:
         return "Erro ao obter dados para gerar o PDF.", 500
     questoes_manuais = []
@@ -589,8 +794,74 @@ def download_pdf():
                 questoes_manuais = json.loads(questoes_json)
             except json.JSONDecodeError:
                 print("Erro ao decodificar JSON de questões manuais")
-    pdf_path = generate_pdf_report(relatorio, questoes_manuais)
-    return send_file(pdf_path, as_attachment=True)
+    modo = request.values.get('modo') or PDF_MODE
+    if modo == 'assincrono':
+        chave = _pdf_cache_key(relatorio, questoes_manuais)
+        pdf = pdf_cache.get(chave)
+        if pdf is None:
+            try:
+                job_id = pdf_job_queue.submit(chave, relatorio, questoes_manuais)
+            except pdf_jobs.QueueFullError as e:
+                response = jsonify({'erro': str(e)})
+                response.status_code = 503
+                response.headers['Retry-After'] = '5'
+                return response
+            return jsonify({
+                'job_id': job_id,
+                'status_url': url_for('pdf_job_status', job_id=job_id),
+                'download_url': url_for('pdf_job_download', job_id=job_id),
+            }), 202
+    else:
+        pdf = get_pdf_report(relatorio, questoes_manuais)
+    return send_file(io.BytesIO(pdf), mimetype='application/pdf', as_attachment=True, download_name='relatorio_rea.pdf')
+
+@app.route("/pdf-jobs/<job_id>")
+def pdf_job_status(job_id):
+    if not session.get('logged_in'):
+        return jsonify({'erro': 'Não autenticado.'}), 401
+    status = pdf_job_queue.status(job_id)
+    if status is None:
+        return jsonify({'erro': 'Job não encontrado.'}), 404
+    resposta = {'job_id': job_id, 'status': status}
+    if status == 'concluido':
+        resposta['download_url'] = url_for('pdf_job_download', job_id=job_id)
+    return jsonify(resposta)
+
+@app.route("/pdf-jobs/<job_id>/download")
+def pdf_job_download(job_id):
+    if not session.get('logged_in'):
+        return redirect(url_for('login'))
+    caminho = pdf_job_queue.result_path(job_id)
+    if caminho is None:
+        return "PDF ainda não disponível.", 404
+    return send_file(caminho, mimetype='application/pdf', as_attachment=True, download_name='relatorio_rea.pdf')
+
+@app.route("/metrics")
+def metrics_endpoint():
+    # Sem sessão, para o scraper do Prometheus: exige "Authorization: Bearer
+    # <METRICS_TOKEN>" e fica desativado enquanto METRICS_TOKEN não for definido
+    if not METRICS_TOKEN:
+        return "Não encontrado.", 404
+    esperado = f"Bearer {METRICS_TOKEN}".encode('utf-8')
+    if not hmac.compare_digest(request.headers.get('Authorization', '').encode('utf-8'), esperado):
+        return "Não autorizado.", 401
+    response = make_response(metrics.render())
+    response.mimetype = 'text/plain'
+    response.headers['Content-Type'] = 'text/plain; version=0.0.4; charset=utf-8'
+    return response
+
+@app.route("/cache-stats")
+def cache_stats():
+    if not session.get('logged_in'):
+        return redirect(url_for('login'))
+    return jsonify({
+        'report_cache': report_cache.stats(),
+        'pdf_cache': pdf_cache.stats(),
+        'pdf_jobs': pdf_job_queue.stats(),
+        'singleflight': dict(request_flight.stats(), **data_cache.stats),
+        'circuit_breakers': http_client.stats(),
+        'alerts': alert_dispatcher.stats(),
+    })
 
 if __name__ == "__main__":
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,124 @@
+import os
+from datetime import date, timedelta
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+# ---------------------------------------------------
+# Cálculo de dias úteis em lote, com calendário de feriados
+# ---------------------------------------------------
+
+HOLIDAYS_FILE = os.environ.get("HOLIDAYS_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "feriados_sc.txt"))
+
+# Feriados nacionais de data fixa (mês, dia)
+FERIADOS_NACIONAIS_FIXOS = [
+    (1, 1),    # Confraternização Universal
+    (4, 21),   # Tiradentes
+    (5, 1),    # Dia do Trabalho
+    (9, 7),    # Independência do Brasil
+    (10, 12),  # Nossa Senhora Aparecida
+    (11, 2),   # Finados
+    (11, 15),  # Proclamação da República
+    (11, 20),  # Dia Nacional de Zumbi e da Consciência Negra (a partir de 2024)
+    (12, 25),  # Natal
+]
+
+
+def easter_sunday(year):
+    """
+    Calcula o domingo de Páscoa (algoritmo de Meeus/Jones/Butcher).
+    """
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def national_holidays(year):
+    """
+    Retorna os feriados nacionais do ano (fixos + Sexta-feira Santa).
+    """
+    feriados = [date(year, m, d) for m, d in FERIADOS_NACIONAIS_FIXOS if not (m == 11 and d == 20 and year < 2024)]
+    feriados.append(easter_sunday(year) - timedelta(days=2))
+    return feriados
+
+
+def load_holidays_file(path):
+    """
+    Lê um arquivo de feriados adicionais. Cada linha contém uma data no formato
+    AAAA-MM-DD (feriado único) ou MM-DD (feriado anual), opcionalmente seguida de
+    ';' e uma descrição. Linhas vazias e iniciadas por '#' são ignoradas.
+    Retorna (datas_unicas, feriados_anuais).
+    """
+    unicas, anuais = [], []
+    if not path or not os.path.exists(path):
+        return unicas, anuais
+    with open(path, 'r', encoding='utf-8') as f:
+        for linha in f:
+            linha = linha.split(';', 1)[0].strip()
+            if not linha or linha.startswith('#'):
+                continue
+            partes = [int(p) for p in linha.split('-')]
+            if len(partes) == 3:
+                unicas.append(date(*partes))
+            elif len(partes) == 2:
+                anuais.append(tuple(partes))
+            else:
+                raise ValueError(f"Linha inválida no arquivo de feriados {path}: {linha}")
+    return unicas, anuais
+
+
+@lru_cache(maxsize=32)
+def get_busdaycalendar(first_year, last_year, holidays_file=HOLIDAYS_FILE):
+    """
+    Monta (e memoriza) o calendário de dias úteis do NumPy para o intervalo de anos,
+    com feriados nacionais e os do arquivo de feriados (estaduais/municipais).
+    """
+    unicas, anuais = load_holidays_file(holidays_file)
+    feriados = set(unicas)
+    for year in range(first_year, last_year + 1):
+        feriados.update(national_holidays(year))
+        feriados.update(date(year, m, d) for m, d in anuais)
+    return np.busdaycalendar(holidays=np.array(sorted(feriados), dtype='datetime64[D]'))
+
+
+def to_day_array(values):
+    """
+    Converte uma Series/array de datas em datetime64[D], preservando a data local
+    de valores com fuso horário (equivalente a chamar .date() em cada Timestamp).
+    """
+    series = pd.Series(values) if not isinstance(values, pd.Series) else values
+    series = pd.to_datetime(series)
+    if series.dt.tz is not None:
+        series = series.dt.tz_localize(None)
+    return series.to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')
+
+
+def working_days_between(start, end, holidays=True, holidays_file=HOLIDAYS_FILE):
+    """
+    Calcula, em uma única chamada a np.busday_count, o número de dias úteis entre
+    cada par de datas (start[i], end[i]). Pares com data ausente resultam em NaN.
+    Com holidays=False considera apenas sábados e domingos como não úteis.
+    """
+    start_days = to_day_array(start)
+    end_days = to_day_array(end)
+    resultado = np.full(start_days.shape, np.nan)
+    validos = ~(np.isnat(start_days) | np.isnat(end_days))
+    if not validos.any():
+        return resultado
+    start_days = start_days[validos]
+    end_days = end_days[validos]
+    if holidays:
+        anos = np.concatenate([start_days, end_days]).astype('datetime64[Y]').astype(int) + 1970
+        calendario = get_busdaycalendar(int(anos.min()), int(anos.max()), holidays_file)
+        resultado[validos] = np.busday_count(start_days, end_days, busdaycal=calendario)
+    else:
+        resultado[validos] = np.busday_count(start_days, end_days)
+    return resultado
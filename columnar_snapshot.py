@@ -0,0 +1,185 @@
+import os
+import glob
+import tempfile
+import threading
+import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as feather
+import data_cache
+import singleflight
+import metrics
+
+# ---------------------------------------------------
+# Snapshot colunar (Arrow/Feather) das manifestações normalizadas
+# ---------------------------------------------------
+# O feed JSON é normalizado uma única vez por versão e gravado sem compressão
+# em formato Arrow IPC, para que os workers o leiam por memory-map e
+# compartilhem as páginas pelo page cache do sistema operacional.
+#
+# A conversão para pandas só reaproveita o buffer mapeado (sem cópia) em
+# colunas de largura fixa sem bitmap de nulos. Por isso os textos das
+# dimensões são gravados como dicionário (viram category com os códigos
+# mapeados; só as poucas categorias são copiadas) e as datas vazias são
+# gravadas como o próprio NaT (int64 mínimo), sem bitmap. Colunas de texto
+# livre (ex.: ids não numéricos) ainda são copiadas para cada worker.
+
+SNAPSHOT_PREFIX = "manifestacoes-"
+SNAPSHOT_SUFFIX = ".arrow"
+DELTA_PREFIX = "delta-"
+LOCK_FILE = os.path.join(data_cache.CACHE_DIR, "manifestacoes.lock")
+
+# Colunas de texto de baixa cardinalidade gravadas como dicionário (categoria)
+COLUNAS_CATEGORICAS = [
+    'tipo_manifestacao',
+    'tema_manifestacao',
+    'forma_entrada_contato',
+    'atendimento_para',
+    'vinculo_beneficiario',
+]
+
+_memo = {'version': None, 'df': None}
+_memo_lock = threading.Lock()
+
+
+def snapshot_path(version):
+    return os.path.join(data_cache.CACHE_DIR, f"{SNAPSHOT_PREFIX}{version[:32]}{SNAPSHOT_SUFFIX}")
+
+
+def write_snapshot(df, version):
+    """
+    Grava o DataFrame normalizado como snapshot colunar da versão, com substituição
+    atômica, e remove os snapshots de versões anteriores.
+    """
+    os.makedirs(data_cache.CACHE_DIR, exist_ok=True)
+    destino = snapshot_path(version)
+    _write_feather_atomic(_categorize(df), destino)
+    _remove_others(SNAPSHOT_PREFIX, destino)
+    return destino
+
+
+def _categorize(df):
+    df = df.copy()
+    for coluna in COLUNAS_CATEGORICAS:
+        if coluna in df.columns and not isinstance(df[coluna].dtype, pd.CategoricalDtype):
+            df[coluna] = df[coluna].astype('category')
+    return df
+
+
+def _without_null_bitmaps(tabela):
+    # Datas vazias gravadas como NaT (int64 mínimo): sem nulos, a leitura não copia a coluna
+    for i, campo in enumerate(tabela.schema):
+        coluna = tabela.column(i)
+        if pa.types.is_timestamp(campo.type) and coluna.null_count:
+            nat = pa.scalar(np.iinfo(np.int64).min, type=campo.type)
+            tabela = tabela.set_column(i, campo, pc.fill_null(coluna, nat))
+    return tabela
+
+
+def _write_feather_atomic(df, destino):
+    fd, tmp_path = tempfile.mkstemp(dir=data_cache.CACHE_DIR, prefix=".tmp-", suffix=SNAPSHOT_SUFFIX)
+    os.close(fd)
+    try:
+        tabela = _without_null_bitmaps(pa.Table.from_pandas(df.reset_index(drop=True), preserve_index=False))
+        feather.write_feather(tabela, tmp_path, compression='uncompressed')
+        os.replace(tmp_path, destino)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _remove_others(prefixo, destino):
+    # Workers que ainda têm o arquivo antigo mapeado continuam lendo normalmente
+    for antigo in glob.glob(os.path.join(data_cache.CACHE_DIR, f"{prefixo}*{SNAPSHOT_SUFFIX}")):
+        if antigo != destino:
+            try:
+                os.remove(antigo)
+            except OSError:
+                pass
+
+
+def delta_path(version):
+    return os.path.join(data_cache.CACHE_DIR, f"{DELTA_PREFIX}{version[:32]}{SNAPSHOT_SUFFIX}")
+
+
+def write_delta(removidos, adicionados, version):
+    """
+    Grava as linhas substituídas (peso -1) e as novas (peso +1) de uma
+    sincronização incremental que gerou `version`, para que cada worker atualize
+    o seu rollup diário sem remontá-lo. Só o delta mais recente é mantido.
+    """
+    os.makedirs(data_cache.CACHE_DIR, exist_ok=True)
+    partes = [removidos.assign(_peso=-1), adicionados.assign(_peso=1)]
+    destino = delta_path(version)
+    _write_feather_atomic(_categorize(pd.concat(partes, ignore_index=True)), destino)
+    _remove_others(DELTA_PREFIX, destino)
+    return destino
+
+
+def read_delta(version):
+    """
+    Retorna (removidos, adicionados) do delta que gerou `version`, ou None se ele não existir.
+    """
+    try:
+        df = feather.read_table(delta_path(version)).to_pandas()
+    except (FileNotFoundError, pa.ArrowInvalid):
+        return None
+    peso = df.pop('_peso')
+    return df[peso < 0].reset_index(drop=True), df[peso > 0].reset_index(drop=True)
+
+
+def read_snapshot(version):
+    """
+    Lê o snapshot colunar da versão via memory-map (categorias, datas e números
+    sem cópia, ver o cabeçalho do módulo). Retorna None se ele não existir.
+    """
+    caminho = snapshot_path(version)
+    with metrics.stage('read_snapshot'):
+        try:
+            tabela = feather.read_table(caminho, memory_map=True)
+        except (FileNotFoundError, pa.ArrowInvalid):
+            return None
+        return tabela.to_pandas(split_blocks=True)
+
+
+def _build_and_write(version, build):
+    df = build()
+    if df is None:
+        return None
+    if version is not None:
+        write_snapshot(df, version)
+        df = read_snapshot(version)
+    return df
+
+
+def load_dataframe(version, build, cross_worker=True, on_coalesced=None):
+    """
+    Retorna o DataFrame normalizado da versão: da memória do processo, do snapshot
+    colunar em disco, ou, se ainda não existir, chamando build() (que normaliza o
+    JSON) e gravando o snapshot para os demais workers.
+
+    Com cross_worker=True, um lock de arquivo garante que só um worker monte o
+    snapshot; os outros esperam e o leem pronto (chamando on_coalesced()).
+    """
+    with _memo_lock:
+        if version is not None and _memo['version'] == version:
+            return _memo['df']
+        df = read_snapshot(version) if version is not None else None
+        if df is None:
+            if cross_worker and version is not None:
+                with singleflight.file_lock(LOCK_FILE):
+                    df = read_snapshot(version)
+                    if df is not None:
+                        if on_coalesced:
+                            on_coalesced()
+                    else:
+                        df = _build_and_write(version, build)
+            else:
+                df = _build_and_write(version, build)
+            if df is None:
+                return None
+        _memo['version'] = version
+        _memo['df'] = df
+        return df
@@ -0,0 +1,236 @@
+import os
+import glob
+import json
+import time
+import fcntl
+import hashlib
+import tempfile
+import threading
+import requests
+import ingest
+import http_client
+import metrics
+
+# ---------------------------------------------------
+# Cache em disco do feed JSON do Ploomnes
+# ---------------------------------------------------
+# O snapshot fica em disco (um arquivo com o corpo e outro com os metadados),
+# sempre gravado com substituição atômica, para que todos os workers do
+# gunicorn compartilhem a mesma cópia e apenas um deles busque o feed por vez.
+# O corpo tem o hash do conteúdo no nome (feed-<sha256>.json) e os metadados
+# apontam para ele: trocar os metadados é a única troca atômica, e quem os lê
+# nunca combina o corpo novo com a versão antiga (ou vice-versa).
+
+CACHE_DIR = os.environ.get("DATA_CACHE_DIR", os.path.join(tempfile.gettempdir(), "rea_cache"))
+CACHE_TTL = int(os.environ.get("DATA_CACHE_TTL", "300"))
+CACHE_STALE_TTL = int(os.environ.get("DATA_CACHE_STALE_TTL", "3600"))
+FETCH_TIMEOUT = float(os.environ.get("DATA_FETCH_TIMEOUT", "30"))
+
+BODY_PREFIX = "feed-"
+META_FILE = os.path.join(CACHE_DIR, "feed.meta.json")
+LOCK_FILE = os.path.join(CACHE_DIR, "feed.lock")
+
+_refresh_lock = threading.Lock()
+
+# Buscas feitas por este processo e buscas evitadas porque outro worker já havia atualizado
+stats = {'fetches': 0, 'coalesced_fetches': 0}
+
+
+def _write_atomic(path, content):
+    """
+    Grava o conteúdo em um arquivo temporário no mesmo diretório e o substitui
+    atomicamente, para que leitores nunca vejam um arquivo pela metade.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def read_meta():
+    """
+    Retorna os metadados do snapshot (fetched_at, etag, last_modified, version)
+    ou None se ainda não houver snapshot.
+    """
+    try:
+        with open(META_FILE, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_meta(meta):
+    """
+    Grava os metadados do snapshot (substituição atômica).
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    _write_atomic(META_FILE, json.dumps(meta).encode('utf-8'))
+
+
+def body_path(meta):
+    """
+    Caminho do corpo JSON apontado pelos metadados, ou None se não houver
+    (ex.: sincronização incremental, em que o snapshot é colunar).
+    """
+    if not meta or not meta.get('body'):
+        return None
+    return os.path.join(CACHE_DIR, os.path.basename(meta['body']))
+
+
+def _body_file(version):
+    return os.path.join(CACHE_DIR, f"{BODY_PREFIX}{version}.json")
+
+
+def _remove_old_bodies(*manter):
+    # O corpo anterior é mantido para quem ainda leu os metadados antigos
+    for antigo in glob.glob(os.path.join(CACHE_DIR, f"{BODY_PREFIX}*.json")):
+        if antigo not in manter:
+            try:
+                os.remove(antigo)
+            except OSError:
+                pass
+
+
+def _fetch(url, meta):
+    """
+    Busca o feed usando revalidação condicional (ETag/Last-Modified) e atualiza o snapshot.
+    Deve ser chamada com o lock de arquivo já adquirido.
+    """
+    headers = {}
+    if meta and body_path(meta) and os.path.exists(body_path(meta)):
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+    # Novas tentativas com backoff e circuit breaker ficam a cargo do http_client;
+    # com o circuito aberto a busca falha na hora e ensure_snapshot serve o snapshot antigo
+    timeout = (http_client.HTTP_CONNECT_TIMEOUT, FETCH_TIMEOUT)
+    with http_client.get(url, headers=headers, timeout=timeout, stream=True) as response:
+        if response.status_code == 304:
+            metrics.FEED_FETCHES.inc(result='not_modified')
+            meta = dict(meta, fetched_at=time.time())
+            write_meta(meta)
+            return meta
+        response.raise_for_status()
+        # O corpo é gravado em disco à medida que chega, sem ficar inteiro em memória
+        fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, prefix=".tmp-")
+        try:
+            digest = hashlib.sha256()
+            with os.fdopen(fd, 'wb') as f:
+                for bloco in response.iter_content(chunk_size=ingest.READ_SIZE):
+                    digest.update(bloco)
+                    f.write(bloco)
+                    metrics.FEED_BYTES.inc(len(bloco))
+            # Valida o JSON antes de publicá-lo; o snapshot bom só é trocado pelos metadados
+            ingest.validate_json_file(tmp_path)
+            destino = _body_file(digest.hexdigest())
+            os.replace(tmp_path, destino)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        new_meta = {
+            'fetched_at': time.time(),
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'version': digest.hexdigest(),
+            'body': os.path.basename(destino),
+        }
+    write_meta(new_meta)
+    _remove_old_bodies(destino, body_path(meta))
+    metrics.FEED_FETCHES.inc(result='updated')
+    return new_meta
+
+
+def _has_snapshot(meta):
+    # Na sincronização incremental os dados ficam em meta['snapshot'], não no corpo JSON
+    caminho = meta.get('snapshot') or body_path(meta)
+    return caminho is not None and os.path.exists(caminho)
+
+
+def _is_fresh(meta, max_age):
+    return meta is not None and _has_snapshot(meta) and time.time() - meta.get('fetched_at', 0) < max_age
+
+
+def refresh(url, blocking=True, fetch=None):
+    """
+    Atualiza o snapshot a partir da URL. Com blocking=False, desiste se outro
+    processo já estiver atualizando. Retorna True se esta chamada fez a busca.
+
+    `fetch(url, meta)` substitui a busca do feed inteiro (ex.: a sincronização
+    incremental de delta_sync.py); ela roda com o lock de arquivo adquirido,
+    grava os dados e os metadados e devolve os novos metadados.
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(LOCK_FILE, 'a') as lock:
+        flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+        try:
+            fcntl.flock(lock, flags)
+        except BlockingIOError:
+            return False
+        try:
+            # Outro worker pode ter atualizado enquanto esperávamos pelo lock
+            if _is_fresh(read_meta(), CACHE_TTL):
+                stats['coalesced_fetches'] += 1
+                return False
+            stats['fetches'] += 1
+            try:
+                with metrics.stage('fetch_feed'):
+                    (fetch or _fetch)(url, read_meta())
+            except BaseException:
+                metrics.FEED_FETCHES.inc(result='error')
+                raise
+            return True
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _refresh_in_background(url, on_error, fetch=None):
+    if not _refresh_lock.acquire(blocking=False):
+        return
+
+    def run():
+        try:
+            refresh(url, blocking=False, fetch=fetch)
+        except (requests.exceptions.RequestException, ValueError, OSError) as e:
+            print(f"Erro ao revalidar o cache de dados: {e}")
+            if on_error:
+                on_error(e)
+        finally:
+            _refresh_lock.release()
+
+    threading.Thread(target=run, name="data-cache-refresh", daemon=True).start()
+
+
+def ensure_snapshot(url, on_error=None, fetch=None):
+    """
+    Garante que exista um snapshot utilizável em disco e retorna seus metadados,
+    sem decodificar o JSON.
+
+    - Snapshot com menos de CACHE_TTL segundos: usado direto.
+    - Snapshot vencido, mas dentro de CACHE_STALE_TTL: usado imediatamente e
+      revalidado em segundo plano (stale-while-revalidate).
+    - Sem snapshot ou snapshot velho demais: busca síncrona. Se a busca falhar e
+      houver um snapshot antigo, ele é usado; caso contrário o erro é propagado.
+    """
+    meta = read_meta()
+    if _is_fresh(meta, CACHE_TTL):
+        return meta
+    if _is_fresh(meta, CACHE_STALE_TTL):
+        _refresh_in_background(url, on_error, fetch)
+        return meta
+    try:
+        refresh(url, fetch=fetch)
+    except (requests.exceptions.RequestException, ValueError) as e:
+        if meta is None or not _has_snapshot(meta):
+            raise
+        print(f"Erro ao atualizar o cache de dados, servindo snapshot antigo: {e}")
+        if on_error:
+            on_error(e)
+        return meta
+    return read_meta()
@@ -0,0 +1,281 @@
+import os
+import math
+import time
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import data_cache
+import columnar_snapshot
+import http_client
+import ingest
+import metrics
+import report_kernel
+import time_index
+
+# ---------------------------------------------------
+# Sincronização incremental do feed do Ploomnes
+# ---------------------------------------------------
+# Em vez de baixar o histórico inteiro a cada atualização, guardamos uma marca
+# d'água (maior id e maior data de atualização já vistos) e pedimos ao feed
+# paginado apenas os registros novos ou alterados. Eles são mesclados ao
+# snapshot colunar por id (upsert) e as linhas substituídas/novas ficam em um
+# arquivo de delta, que os workers usam para atualizar o rollup diário.
+# A carga completa (primeira sincronização e recargas periódicas, que trazem
+# também as exclusões) busca as páginas em paralelo em um pool limitado.
+
+SYNC_MODE = os.environ.get("DATA_SYNC_MODE", "completo")
+ID_FIELD = os.environ.get("DATA_ID_FIELD", "Id")
+UPDATED_FIELD = os.environ.get("DATA_UPDATED_FIELD", "Data de atualização")
+SINCE_PARAM = os.environ.get("DATA_SINCE_PARAM", "atualizado_desde")
+AFTER_ID_PARAM = os.environ.get("DATA_AFTER_ID_PARAM", "id_maior_que")
+PAGE_PARAM = os.environ.get("DATA_PAGE_PARAM", "pagina")
+PAGE_SIZE_PARAM = os.environ.get("DATA_PAGE_SIZE_PARAM", "tamanho_pagina")
+PAGE_SIZE = int(os.environ.get("DATA_PAGE_SIZE", "5000"))
+TOTAL_HEADER = os.environ.get("DATA_TOTAL_HEADER", "X-Total-Count")
+FETCH_WORKERS = int(os.environ.get("DATA_FETCH_WORKERS", "4"))
+# Recarga completa periódica: o feed incremental não informa registros excluídos
+FULL_SYNC_INTERVAL = int(os.environ.get("DATA_FULL_SYNC_INTERVAL", "86400"))
+
+COLUNA_ID = 'id_manifestacao'
+COLUNA_ATUALIZACAO = 'data_atualizacao'
+
+
+def sync_mapping(col_mapping):
+    """
+    Acrescenta ao mapeamento de colunas o id e a data de atualização dos registros.
+    """
+    return dict(col_mapping, **{ID_FIELD: COLUNA_ID, UPDATED_FIELD: COLUNA_ATUALIZACAO})
+
+
+def fetch_page(url, params, pagina):
+    """
+    Busca uma página do feed. Retorna (registros, total informado pelo servidor
+    ou None, hash do corpo).
+    """
+    params = dict(params, **{PAGE_PARAM: pagina, PAGE_SIZE_PARAM: PAGE_SIZE})
+    timeout = (http_client.HTTP_CONNECT_TIMEOUT, data_cache.FETCH_TIMEOUT)
+    with http_client.get(url, params=params, timeout=timeout) as response:
+        response.raise_for_status()
+        corpo = response.content
+        total = response.headers.get(TOTAL_HEADER)
+    metrics.FEED_BYTES.inc(len(corpo))
+    registros = response.json() if corpo else []
+    if not isinstance(registros, list):
+        raise ValueError(f"Página {pagina} do feed não é uma lista de registros.")
+    return registros, int(total) if total else None, hashlib.sha256(corpo).hexdigest()
+
+
+def iter_pages(url, params=None, workers=FETCH_WORKERS):
+    """
+    Itera, em ordem, sobre (registros, hash) de todas as páginas do feed. Depois
+    da primeira página, as demais são buscadas em paralelo por até `workers`
+    threads: todas de uma vez se o servidor informar o total (TOTAL_HEADER), ou
+    em levas de `workers` páginas até a primeira página incompleta.
+    """
+    params = dict(params or {})
+    registros, total, digest = fetch_page(url, params, 1)
+    yield registros, digest
+    if len(registros) < PAGE_SIZE:
+        return
+
+    def buscar(pagina):
+        registros, _, digest = fetch_page(url, params, pagina)
+        return registros, digest
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="feed-page") as pool:
+        if total is not None:
+            yield from pool.map(buscar, range(2, math.ceil(total / PAGE_SIZE) + 1))
+            return
+        proxima = 2
+        while True:
+            for registros, digest in pool.map(buscar, range(proxima, proxima + workers)):
+                yield registros, digest
+                if len(registros) < PAGE_SIZE:
+                    return
+            proxima += workers
+
+
+def _fetch_frame(url, params, col_mapping, on_missing_columns=None, on_invalid_dates=None):
+    """
+    Busca as páginas e as projeta (ver ingest.project_records) à medida que
+    chegam, sem reter os registros brutos. Retorna (df, hash do conteúdo).
+    """
+    parser = time_index.DateParser()
+    partes = []
+    digest = hashlib.sha256()
+    ausentes = None
+    for registros, hash_pagina in iter_pages(url, params):
+        digest.update(hash_pagina.encode('ascii'))
+        if not registros:
+            continue
+        df, faltando = ingest.project_records(registros, col_mapping,
+                                              categorical=columnar_snapshot.COLUNAS_CATEGORICAS,
+                                              dates=('data_manifestacao', 'data_resposta', COLUNA_ATUALIZACAO),
+                                              parser=parser)
+        ausentes = set(faltando) if ausentes is None else ausentes & set(faltando)
+        partes.append(df)
+    if ausentes and on_missing_columns:
+        on_missing_columns([campo for campo in col_mapping if campo in ausentes])
+    if parser.invalidos and on_invalid_dates:
+        on_invalid_dates(parser.invalidos)
+    if not partes:
+        return pd.DataFrame(columns=list(col_mapping.values())), digest.hexdigest()
+    df = pd.concat(partes, ignore_index=True) if len(partes) > 1 else partes[0]
+    return normalize_ids(df), digest.hexdigest()
+
+
+def normalize_ids(df):
+    # Ids numéricos viram int64; os demais são comparados como texto
+    if COLUNA_ID not in df.columns:
+        raise ValueError(f"O feed não traz o campo de id '{ID_FIELD}' necessário para a sincronização incremental.")
+    try:
+        df[COLUNA_ID] = pd.to_numeric(df[COLUNA_ID]).astype('int64')
+    except (ValueError, TypeError):
+        df[COLUNA_ID] = df[COLUNA_ID].astype(str)
+    return df
+
+
+def watermark(df, anterior=None):
+    """
+    Marca d'água dos registros de df, combinada com a anterior: maior id e maior
+    data de atualização (ISO 8601) já vistos.
+    """
+    marca = dict(anterior or {})
+    if len(df) and COLUNA_ID in df.columns:
+        maior = df[COLUNA_ID].max()
+        maior = maior.item() if hasattr(maior, 'item') else maior
+        if marca.get('max_id') is None or maior > marca['max_id']:
+            marca['max_id'] = maior
+    if len(df) and COLUNA_ATUALIZACAO in df.columns and df[COLUNA_ATUALIZACAO].notna().any():
+        maior = df[COLUNA_ATUALIZACAO].max().isoformat()
+        if marca.get('max_updated') is None or maior > marca['max_updated']:
+            marca['max_updated'] = maior
+    return marca
+
+
+def delta_params(marca):
+    """
+    Parâmetros da busca incremental: registros alterados desde a maior data de
+    atualização (inclusive; registros repetidos são absorvidos pelo upsert) ou,
+    sem essa data, apenas os ids acima do maior já visto.
+    """
+    if marca.get('max_updated'):
+        return {SINCE_PARAM: marca['max_updated']}
+    if marca.get('max_id') is not None:
+        return {AFTER_ID_PARAM: marca['max_id']}
+    return {}
+
+
+def _alinhar_ids(atual, novos):
+    if atual[COLUNA_ID].dtype != novos[COLUNA_ID].dtype:
+        atual = atual.assign(**{COLUNA_ID: atual[COLUNA_ID].astype(str)})
+        novos = novos.assign(**{COLUNA_ID: novos[COLUNA_ID].astype(str)})
+    return atual, novos
+
+
+def changed_records(atual, novos):
+    """
+    Descarta de `novos` os registros que já estão em `atual` com a mesma data de
+    atualização (a busca "desde" é inclusiva e devolve de novo os da marca d'água).
+    """
+    if COLUNA_ATUALIZACAO not in atual.columns or COLUNA_ATUALIZACAO not in novos.columns:
+        return novos
+    atual, novos = _alinhar_ids(atual, novos)
+    vistos = pd.MultiIndex.from_arrays([atual[COLUNA_ID], atual[COLUNA_ATUALIZACAO]])
+    chaves = pd.MultiIndex.from_arrays([novos[COLUNA_ID], novos[COLUNA_ATUALIZACAO]])
+    return novos[~chaves.isin(vistos)].reset_index(drop=True)
+
+
+def upsert(atual, novos):
+    """
+    Mescla `novos` em `atual` pelo id (o registro mais recente vence).
+    Retorna (mesclado, linhas de `atual` substituídas, linhas novas aplicadas).
+    Registros alterados mantêm a posição no feed; os novos entram no final.
+    """
+    novos = novos.drop_duplicates(COLUNA_ID, keep='last')
+    atual, novos = _alinhar_ids(atual, novos)
+    if report_kernel.COLUNA_POSICAO in atual.columns:
+        posicoes = novos[COLUNA_ID].map(atual.set_index(COLUNA_ID)[report_kernel.COLUNA_POSICAO])
+        faltando = posicoes.isna().to_numpy()
+        proxima = int(atual[report_kernel.COLUNA_POSICAO].max()) + 1 if len(atual) else 0
+        posicoes[faltando] = np.arange(proxima, proxima + faltando.sum())
+        novos = novos.assign(**{report_kernel.COLUNA_POSICAO: posicoes.astype(np.int64).to_numpy()})
+    substituidas = atual[COLUNA_ID].isin(novos[COLUNA_ID]).to_numpy()
+    removidos = atual[substituidas]
+    mesclado = pd.concat([atual[~substituidas], novos], ignore_index=True)
+    mesclado.attrs = {}
+    return time_index.sort_by_date(mesclado), removidos, novos
+
+
+def _full_reload(url, col_mapping, on_missing_columns, on_invalid_dates):
+    with metrics.stage('sync_full'):
+        df, digest = _fetch_frame(url, {}, col_mapping, on_missing_columns, on_invalid_dates)
+        df.attrs = {}
+        # As páginas chegam na ordem do feed
+        df = time_index.sort_by_date(report_kernel.with_feed_position(df))
+        agora = time.time()
+        meta = {
+            'modo': 'incremental',
+            'fetched_at': agora,
+            'full_sync_at': agora,
+            'version': digest,
+            'watermark': watermark(df),
+            'delta': None,
+        }
+        meta['snapshot'] = columnar_snapshot.write_snapshot(df, digest)
+    data_cache.write_meta(meta)
+    metrics.FEED_FETCHES.inc(result='full_sync')
+    return meta
+
+
+def _apply_delta(url, meta, atual, col_mapping, on_missing_columns, on_invalid_dates):
+    with metrics.stage('sync_delta'):
+        novos, digest = _fetch_frame(url, delta_params(meta.get('watermark') or {}), col_mapping,
+                                     on_missing_columns, on_invalid_dates)
+        if not novos.empty:
+            novos = changed_records(atual, novos)
+        if novos.empty:
+            meta = dict(meta, fetched_at=time.time())
+            data_cache.write_meta(meta)
+            metrics.FEED_FETCHES.inc(result='not_modified')
+            return meta
+        mesclado, removidos, adicionados = upsert(atual, novos)
+        version = hashlib.sha256(f"{meta['version']}|{digest}".encode('ascii')).hexdigest()
+        # O delta é gravado antes do snapshot: quem vir a nova versão já o encontra
+        columnar_snapshot.write_delta(removidos, adicionados, version)
+        snapshot = columnar_snapshot.write_snapshot(mesclado, version)
+    meta = dict(meta, fetched_at=time.time(), version=version, snapshot=snapshot,
+                watermark=watermark(adicionados, meta.get('watermark')),
+                delta={'de': meta['version'], 'removidos': len(removidos), 'adicionados': len(adicionados)})
+    data_cache.write_meta(meta)
+    metrics.FEED_FETCHES.inc(result='delta')
+    return meta
+
+
+def sync(url, meta, col_mapping, on_missing_columns=None, on_invalid_dates=None):
+    """
+    Sincroniza o snapshot colunar com o feed paginado e retorna os novos
+    metadados. Faz a carga completa se ainda não houver snapshot incremental,
+    se ele tiver sido apagado ou se a última carga completa tiver mais de
+    FULL_SYNC_INTERVAL segundos; caso contrário aplica apenas o delta.
+    Usada como `fetch` de data_cache.refresh (com o lock de arquivo adquirido).
+    """
+    col_mapping = sync_mapping(col_mapping)
+    atual = None
+    if meta and meta.get('modo') == 'incremental' and time.time() - meta.get('full_sync_at', 0) < FULL_SYNC_INTERVAL:
+        atual = columnar_snapshot.read_snapshot(meta['version'])
+    if atual is None:
+        return _full_reload(url, col_mapping, on_missing_columns, on_invalid_dates)
+    return _apply_delta(url, meta, atual, col_mapping, on_missing_columns, on_invalid_dates)
+
+
+def load_delta(meta, version_anterior):
+    """
+    Retorna (removidos, adicionados) se `meta` veio de um delta aplicado sobre
+    `version_anterior`; caso contrário None (o chamador remonta do zero).
+    """
+    delta = (meta or {}).get('delta')
+    if not delta or version_anterior is None or delta.get('de') != version_anterior:
+        return None
+    return columnar_snapshot.read_delta(meta['version'])
@@ -0,0 +1,178 @@
+import base64
+import binascii
+import numpy as np
+import pandas as pd
+import report_kernel
+import time_index
+
+# ---------------------------------------------------
+# Índices para listar as manifestações por trás de cada contador
+# ---------------------------------------------------
+# Para cada valor de cada dimensão (e para cada faixa de prazo) guardamos as
+# posições das linhas do DataFrame normalizado, em ordem crescente. Como o
+# DataFrame está ordenado por data, um período é um intervalo de posições
+# (time_index.period_positions), e uma combinação de filtros vira a interseção de
+# poucos vetores ordenados, sem varrer as linhas. A paginação é por chave: o
+# cursor guarda a última posição entregue e a próxima página começa por busca
+# binária.
+
+# Filtros aceitos pela API -> coluna normalizada
+FILTROS = {
+    'tipo': 'tipo_manifestacao',
+    'tema': 'tema_manifestacao',
+    'canal': 'forma_entrada_contato',
+    'atendimento_para': 'atendimento_para',
+    'vinculo': 'vinculo_beneficiario',
+}
+FILTRO_FAIXA = 'faixa_prazo'
+
+# Colunas da listagem, na ordem do CSV
+COLUNAS_SAIDA = ['id_manifestacao', 'data_manifestacao', 'data_resposta', *report_kernel.DIMENSOES,
+                 'dias_uteis_resposta', 'faixa_prazo']
+
+MAX_PAGE_SIZE = 1000
+CSV_CHUNK_ROWS = 5000
+
+
+class InvalidCursorError(ValueError):
+    """
+    Cursor de paginação malformado ou de outra versão dos dados.
+    """
+
+
+def _posicoes_por_codigo(codigos, n_codigos):
+    """
+    Retorna uma lista com, para cada código 0..n_codigos-1, o vetor ordenado
+    das posições em que ele aparece (uma só ordenação estável para todos).
+    """
+    ordem = np.argsort(codigos, kind='stable').astype(np.int32)
+    limites = np.searchsorted(codigos[ordem], np.arange(n_codigos + 1))
+    return [ordem[limites[c]:limites[c + 1]] for c in range(n_codigos)]
+
+
+def _intersect(a, b):
+    # Interseção de vetores ordenados sem repetição: busca binária dos elementos do menor no maior
+    if len(a) > len(b):
+        a, b = b, a
+    if not len(a):
+        return a
+    indices = np.searchsorted(b, a)
+    indices[indices == len(b)] = 0
+    return a[b[indices] == a]
+
+
+class DrilldownIndex:
+    """
+    Índices de posições de um DataFrame normalizado (ordenado por sort_by_date),
+    válidos para uma versão dos dados.
+    """
+
+    def __init__(self, df, version=None):
+        self.df = time_index.sort_by_date(df)
+        self.version = version
+        self.n = len(self.df)
+        self.indices = {}
+        for coluna in FILTROS.values():
+            if coluna not in self.df.columns:
+                continue
+            categorias = pd.Categorical(self.df[coluna])
+            posicoes = _posicoes_por_codigo(categorias.codes.astype(np.int64) + 1, len(categorias.categories) + 1)
+            # A posição 0 (valor ausente) não é filtrável
+            self.indices[coluna] = dict(zip(categorias.categories, posicoes[1:]))
+        self.dias_uteis, tem_resposta = report_kernel.response_working_days(self.df)
+        self.faixas = report_kernel.classify_deadlines(self.dias_uteis, tem_resposta)
+        self.indices[FILTRO_FAIXA] = dict(zip(report_kernel.FAIXAS_PRAZO,
+                                              _posicoes_por_codigo(self.faixas, len(report_kernel.FAIXAS_PRAZO))))
+
+    def _intervalo(self, start_date, end_date):
+        if not (start_date is not None and end_date is not None) or 'data_manifestacao' not in self.df.columns:
+            return 0, self.n
+        return time_index.period_positions(self.df, start_date, end_date)
+
+    def positions(self, filtros=None, start_date=None, end_date=None):
+        """
+        Posições (ordenadas) das linhas que atendem a todos os filtros
+        ({coluna ou 'faixa_prazo': valor}) e estão no período (dias inclusivos).
+        """
+        inicio, fim = self._intervalo(start_date, end_date)
+        vetores = []
+        for coluna, valor in (filtros or {}).items():
+            vetor = self.indices.get(coluna, {}).get(valor)
+            if vetor is None:
+                return np.empty(0, dtype=np.int32)
+            # Recorte do período por busca binária em cada vetor
+            vetores.append(vetor[np.searchsorted(vetor, inicio):np.searchsorted(vetor, fim)])
+        if not vetores:
+            return np.arange(inicio, fim, dtype=np.int32)
+        vetores.sort(key=len)
+        resultado = vetores[0]
+        for vetor in vetores[1:]:
+            resultado = _intersect(resultado, vetor)
+        return resultado
+
+    def rows(self, posicoes):
+        """
+        DataFrame de saída (COLUNAS_SAIDA presentes nos dados, datas formatadas) das posições.
+        """
+        linhas = self.df.iloc[posicoes]
+        colunas = {}
+        for coluna in COLUNAS_SAIDA:
+            if coluna == 'dias_uteis_resposta':
+                dias = self.dias_uteis[posicoes]
+                valores = np.full(len(posicoes), None, dtype=object)
+                calculados = ~np.isnan(dias)
+                valores[calculados] = np.round(dias[calculados]).astype(np.int64).tolist()
+            elif coluna == 'faixa_prazo':
+                valores = np.asarray(report_kernel.FAIXAS_PRAZO, dtype=object)[self.faixas[posicoes]]
+            elif coluna not in linhas.columns:
+                continue
+            elif coluna in ('data_manifestacao', 'data_resposta'):
+                valores = time_index.format_dates(linhas[coluna]).to_numpy(dtype=object)
+            else:
+                valores = linhas[coluna].to_numpy(dtype=object)
+                valores[pd.isna(valores)] = None
+            colunas[coluna] = valores
+        return pd.DataFrame(colunas, index=pd.RangeIndex(len(posicoes)))
+
+    def encode_cursor(self, posicao):
+        return base64.urlsafe_b64encode(f"{self.version}:{int(posicao)}".encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, cursor):
+        """
+        Retorna a última posição entregue pelo cursor. Levanta InvalidCursorError
+        se ele for inválido ou de outra versão dos dados.
+        """
+        try:
+            version, _, posicao = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').rpartition(':')
+            posicao = int(posicao)
+        except (ValueError, binascii.Error, UnicodeError):
+            raise InvalidCursorError("Cursor inválido.")
+        if version != str(self.version):
+            raise InvalidCursorError("Os dados foram atualizados; reinicie a listagem.")
+        return posicao
+
+    def after(self, posicoes, cursor=None):
+        """
+        Posições depois da última entregue pelo cursor (busca binária).
+        """
+        if not cursor:
+            return posicoes
+        return posicoes[int(np.searchsorted(posicoes, self.decode_cursor(cursor), side='right')):]
+
+    def page(self, posicoes, cursor=None, limite=100):
+        """
+        Retorna (linhas, próximo cursor ou None) da página que começa depois do cursor.
+        """
+        restantes = self.after(posicoes, cursor)
+        pagina = restantes[:limite]
+        proximo = self.encode_cursor(pagina[-1]) if len(restantes) > limite else None
+        return self.rows(pagina), proximo
+
+    def iter_csv(self, posicoes, chunk_rows=CSV_CHUNK_ROWS):
+        """
+        Gera o CSV das posições em blocos de texto, sem montar o arquivo inteiro.
+        """
+        yield ','.join(COLUNAS_SAIDA) + '\n'
+        for inicio in range(0, len(posicoes), chunk_rows):
+            bloco = self.rows(posicoes[inicio:inicio + chunk_rows]).reindex(columns=COLUNAS_SAIDA)
+            yield bloco.to_csv(index=False, header=False)
@@ -0,0 +1,52 @@
+import os
+import sys
+import multiprocessing
+
+# ---------------------------------------------------
+# Configuração do gunicorn para produção
+# ---------------------------------------------------
+# O app é carregado uma vez no master (preload) e os workers herdam pandas,
+# numpy e os módulos do app por copy-on-write. Cada worker atende requisições
+# em várias threads (o trabalho pesado libera o GIL ou espera I/O) e é
+# reciclado após max_requests requisições, com jitter para não reciclar todos
+# ao mesmo tempo. Todos os valores podem ser sobrescritos por variáveis de ambiente.
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5000")
+
+cpus = multiprocessing.cpu_count()
+workers = int(os.environ.get("GUNICORN_WORKERS", max(2, cpus)))
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+worker_class = "gthread" if threads > 1 else "sync"
+
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") == "1"
+
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", "1000"))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", "100"))
+
+# A primeira busca do feed e a geração de PDFs podem levar dezenas de segundos
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", "5"))
+
+accesslog = os.environ.get("GUNICORN_ACCESSLOG", "-")
+errorlog = "-"
+
+
+def on_starting(server):
+    # Métricas de uma execução anterior do servidor não valem mais
+    import metrics
+    metrics.reset_dir()
+
+
+def worker_exit(server, worker):
+    # Envia os alertas pendentes e grava as métricas finais do worker
+    app_module = sys.modules.get("app")
+    if app_module is not None:
+        app_module.alert_dispatcher.flush()
+    import metrics
+    metrics.flush(force=True)
+
+
+def child_exit(server, worker):
+    import metrics
+    metrics.mark_process_dead(worker.pid)
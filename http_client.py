@@ -0,0 +1,176 @@
+import os
+import time
+import random
+import threading
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+
+# ---------------------------------------------------
+# Cliente HTTP compartilhado (Ploomnes e webhook do Google Chat)
+# ---------------------------------------------------
+# Uma sessão por processo com pool de conexões keep-alive, timeouts explícitos
+# de conexão e leitura, novas tentativas com backoff exponencial + jitter para
+# requisições idempotentes e um circuit breaker por host, que falha
+# imediatamente enquanto o upstream estiver fora do ar.
+
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", "30"))
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", "10"))
+HTTP_RETRIES = int(os.environ.get("HTTP_RETRIES", "3"))
+HTTP_BACKOFF_BASE = float(os.environ.get("HTTP_BACKOFF_BASE", "0.5"))
+HTTP_BACKOFF_MAX = float(os.environ.get("HTTP_BACKOFF_MAX", "8"))
+CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_TIMEOUT = float(os.environ.get("CIRCUIT_RESET_TIMEOUT", "60"))
+
+# Status que indicam falha transitória do upstream
+RETRY_STATUS = {429, 502, 503, 504}
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """
+    O circuit breaker do host está aberto: a requisição nem foi enviada.
+    """
+
+
+class CircuitBreaker:
+    """
+    Abre após `failure_threshold` falhas seguidas; enquanto aberto, recusa as
+    chamadas. Depois de `reset_timeout` segundos deixa passar uma chamada de
+    teste (meio-aberto): sucesso fecha o circuito, falha o reabre.
+    """
+
+    def __init__(self, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, reset_timeout=CIRCUIT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_progress = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self):
+        with self._lock:
+            estado = self.state
+            if estado == 'closed':
+                return True
+            if estado == 'half-open' and not self._trial_in_progress:
+                self._trial_in_progress = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_progress = False
+
+    def release_trial(self):
+        """
+        Libera a chamada de teste sem contá-la como sucesso nem falha (ex.: a
+        requisição foi interrompida antes de terminar).
+        """
+        with self._lock:
+            self._trial_in_progress = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_progress = False
+            if self.failures >= self.failure_threshold or self.opened_at is not None:
+                self.opened_at = time.monotonic()
+
+
+_local = {'pid': None, 'session': None}
+_breakers = {}
+_lock = threading.Lock()
+
+
+def get_session():
+    """
+    Sessão requests do processo atual (recriada após fork), com pool keep-alive.
+    """
+    with _lock:
+        if _local['pid'] != os.getpid():
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=0)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _local['pid'] = os.getpid()
+            _local['session'] = session
+        return _local['session']
+
+
+def get_breaker(url):
+    host = urlsplit(url).netloc
+    with _lock:
+        if host not in _breakers:
+            _breakers[host] = CircuitBreaker()
+        return _breakers[host]
+
+
+def backoff_delay(tentativa, base=HTTP_BACKOFF_BASE, maximo=HTTP_BACKOFF_MAX):
+    """
+    Espera antes da tentativa seguinte: backoff exponencial com jitter completo.
+    """
+    return random.uniform(0, min(maximo, base * (2 ** tentativa)))
+
+
+def request(method, url, retries=0, timeout=None, **kwargs):
+    """
+    Faz a requisição pela sessão compartilhada, passando pelo circuit breaker do
+    host. `retries` novas tentativas são feitas em erros de conexão, timeouts e
+    status transitórios (RETRY_STATUS); use retries > 0 só para requisições
+    idempotentes. A resposta final é devolvida sem raise_for_status.
+    """
+    breaker = get_breaker(url)
+    if timeout is None:
+        timeout = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+    tentativa = 0
+    while True:
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuito aberto para {urlsplit(url).netloc}; upstream indisponível.")
+        try:
+            response = get_session().request(method, url, timeout=timeout, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            breaker.record_failure()
+            if tentativa >= retries:
+                raise
+        except Exception:
+            # Qualquer outro erro (ChunkedEncodingError, SSL, proxy, URL inválida...)
+            # também conta como falha e libera a chamada de teste do meio-aberto
+            breaker.record_failure()
+            raise
+        except BaseException:
+            breaker.release_trial()
+            raise
+        else:
+            if response.status_code < 500 and response.status_code != 429:
+                breaker.record_success()
+                return response
+            breaker.record_failure()
+            if response.status_code not in RETRY_STATUS or tentativa >= retries:
+                return response
+            response.close()
+        time.sleep(backoff_delay(tentativa))
+        tentativa += 1
+
+
+def get(url, retries=HTTP_RETRIES, **kwargs):
+    return request('GET', url, retries=retries, **kwargs)
+
+
+def post(url, retries=0, **kwargs):
+    return request('POST', url, retries=retries, **kwargs)
+
+
+def stats():
+    with _lock:
+        return {host: {'state': b.state, 'failures': b.failures} for host, b in _breakers.items()}
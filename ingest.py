@@ -0,0 +1,169 @@
+import io
+import json
+import pandas as pd
+from pandas.api.types import union_categoricals
+import time_index
+
+# ---------------------------------------------------
+# Leitura incremental (streaming) do feed do Ploomnes
+# ---------------------------------------------------
+# O feed é um array JSON de registros. Em vez de decodificar o arquivo inteiro
+# em uma lista de dicts, os registros são lidos um a um e apenas os campos
+# usados pelo relatório são guardados, convertidos em colunas a cada bloco.
+
+READ_SIZE = 1 << 20
+CHUNK_ROWS = 50_000
+
+
+def iter_json_array(fileobj, read_size=READ_SIZE):
+    """
+    Itera sobre os elementos de um array JSON lido de um arquivo binário, sem
+    carregar o documento inteiro. Se o documento não for um array, ele é
+    decodificado por completo e devolvido como um único elemento.
+    """
+    texto = io.TextIOWrapper(fileobj, encoding='utf-8')
+    decoder = json.JSONDecoder()
+    buf = texto.read(read_size)
+    pos = 0
+    fim_arquivo = not buf
+
+    def pular_espacos(buf, pos):
+        while pos < len(buf) and buf[pos] in ' \t\r\n':
+            pos += 1
+        return pos
+
+    pos = pular_espacos(buf, pos)
+    while pos >= len(buf) and not fim_arquivo:
+        buf = texto.read(read_size)
+        fim_arquivo = not buf
+        pos = pular_espacos(buf, 0)
+    if pos >= len(buf) or buf[pos] != '[':
+        yield json.loads(buf[pos:] + texto.read())
+        return
+    pos += 1
+    esperando_valor = True
+    while True:
+        pos = pular_espacos(buf, pos)
+        if pos >= len(buf) or (not fim_arquivo and len(buf) - pos < 64):
+            if fim_arquivo and pos >= len(buf):
+                raise ValueError("JSON truncado: array não foi fechado")
+            mais = texto.read(read_size)
+            fim_arquivo = not mais
+            buf = buf[pos:] + mais
+            pos = 0
+            continue
+        caractere = buf[pos]
+        if caractere == ']':
+            return
+        if caractere == ',' and not esperando_valor:
+            pos += 1
+            esperando_valor = True
+            continue
+        try:
+            valor, pos_final = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if fim_arquivo:
+                raise
+            # Registro cortado no fim do buffer: lê mais e tenta de novo
+            mais = texto.read(read_size)
+            fim_arquivo = not mais
+            buf = buf[pos:] + mais
+            pos = 0
+            continue
+        yield valor
+        pos = pos_final
+        esperando_valor = False
+
+
+def validate_json_file(path):
+    """
+    Percorre o arquivo JSON inteiro (em streaming) para garantir que ele é válido.
+    """
+    with open(path, 'rb') as f:
+        for _ in iter_json_array(f):
+            pass
+
+
+def _to_column(valores, categorica, data, parser=None, coluna=None):
+    serie = pd.Series(valores, dtype=object)
+    if data:
+        return (parser or time_index.DateParser()).parse(serie, coluna)
+    if categorica:
+        return serie.astype('category')
+    return serie
+
+
+def read_projected(path, col_mapping, categorical=(), dates=(), chunk_rows=CHUNK_ROWS, parser=None):
+    """
+    Lê o feed em streaming e monta um DataFrame apenas com os campos de
+    col_mapping (já renomeados). Colunas em `dates` viram datetime64 (com o
+    formato detectado no primeiro bloco, ver time_index.DateParser) e colunas em
+    `categorical` viram category; os demais campos dos registros são descartados.
+    Retorna (df, colunas_ausentes), onde colunas_ausentes lista as chaves de
+    col_mapping que não apareceram em nenhum registro. `parser` (um
+    time_index.DateParser) permite ao chamador consultar as datas inválidas.
+    """
+    campos = list(col_mapping)
+    vistos = set()
+    blocos = {campo: [] for campo in campos}
+    pendentes = {campo: [] for campo in campos}
+    linhas = 0
+    parser = parser or time_index.DateParser()
+
+    def fechar_bloco():
+        for campo in campos:
+            destino = col_mapping[campo]
+            blocos[campo].append(_to_column(pendentes[campo], destino in categorical, destino in dates, parser, destino))
+            pendentes[campo] = []
+
+    with open(path, 'rb') as f:
+        for registro in iter_json_array(f):
+            if not isinstance(registro, dict):
+                # Documento que não é um array de registros: converte de uma vez
+                registros = registro if isinstance(registro, list) else [registro]
+                df = pd.DataFrame(registros)
+                faltando = [c for c in campos if c not in df.columns]
+                df = df.rename(columns=col_mapping)[[col_mapping[c] for c in campos if c in df.columns]]
+                for coluna in df.columns:
+                    df[coluna] = _to_column(df[coluna].tolist(), coluna in categorical, coluna in dates, parser, coluna)
+                return df, faltando
+            for campo in campos:
+                valor = registro.get(campo)
+                if campo in registro:
+                    vistos.add(campo)
+                pendentes[campo].append(valor)
+            linhas += 1
+            if linhas % chunk_rows == 0:
+                fechar_bloco()
+    if linhas % chunk_rows or not linhas:
+        fechar_bloco()
+
+    colunas = {}
+    for campo in campos:
+        if campo not in vistos:
+            continue
+        destino = col_mapping[campo]
+        partes = blocos[campo]
+        if destino in categorical:
+            colunas[destino] = pd.Series(union_categoricals(partes, ignore_order=True)) if len(partes) > 1 else partes[0].reset_index(drop=True)
+        else:
+            colunas[destino] = pd.concat(partes, ignore_index=True) if len(partes) > 1 else partes[0]
+    faltando = [campo for campo in campos if campo not in vistos]
+    return pd.DataFrame(colunas, index=pd.RangeIndex(linhas)), faltando
+
+
+def project_records(registros, col_mapping, categorical=(), dates=(), parser=None):
+    """
+    Mesma projeção de read_projected para uma lista de registros já decodificados
+    (ex.: uma página da sincronização incremental). Retorna (df, colunas_ausentes).
+    """
+    parser = parser or time_index.DateParser()
+    colunas = {}
+    faltando = []
+    for campo, destino in col_mapping.items():
+        if not any(campo in registro for registro in registros):
+            faltando.append(campo)
+            continue
+        valores = [registro.get(campo) for registro in registros]
+        colunas[destino] = _to_column(valores, destino in categorical, destino in dates, parser, destino).reset_index(drop=True)
+    return pd.DataFrame(colunas, index=pd.RangeIndex(len(registros))), faltando
@@ -0,0 +1,280 @@
+import os
+import glob
+import json
+import math
+import time
+import tempfile
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# ---------------------------------------------------
+# Métricas de latência e volume (formato texto do Prometheus)
+# ---------------------------------------------------
+# Cada processo acumula contadores e histogramas em memória e os grava, no
+# máximo a cada METRICS_FLUSH_INTERVAL segundos, em um arquivo próprio
+# (<pid>.json) em METRICS_DIR. O endpoint /metrics soma os arquivos de todos
+# os workers do gunicorn, então qualquer worker responde pelo conjunto.
+
+METRICS_DIR = os.environ.get("METRICS_DIR", os.path.join(tempfile.gettempdir(), "rea_metrics"))
+METRICS_FLUSH_INTERVAL = float(os.environ.get("METRICS_FLUSH_INTERVAL", "1"))
+
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+BYTES_BUCKETS = (1e3, 1e4, 1e5, 1e6, 1e7, 1e8, 1e9)
+ROWS_BUCKETS = (0, 10, 100, 1e3, 1e4, 1e5, 1e6, 1e7)
+
+# Rota da requisição em andamento, usada como rótulo das etapas
+current_route = contextvars.ContextVar('metrics_route', default='-')
+
+_registry = {}
+_sources = []
+_lock = threading.Lock()
+_state = {'last_flush': 0.0}
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        _registry[name] = self
+
+    def _key(self, labels):
+        return tuple(str(labels.get(nome, '')) for nome in self.labelnames)
+
+    def _reset(self):
+        self._values = {}
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        chave = self._key(labels)
+        with _lock:
+            self._values[chave] = self._values.get(chave, 0) + amount
+
+    def _dump(self):
+        return [[list(k), v] for k, v in self._values.items()]
+
+    def _merge(self, total, dados):
+        for labels, valor in dados:
+            chave = tuple(labels)
+            total[chave] = total.get(chave, 0) + valor
+
+    def _render(self, total):
+        linhas = []
+        for chave, valor in sorted(total.items()):
+            linhas.append(f"{self.name}{_labels(self.labelnames, chave)} {_number(valor)}")
+        return linhas
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DURATION_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        chave = self._key(labels)
+        with _lock:
+            serie = self._values.get(chave)
+            if serie is None:
+                serie = self._values[chave] = [[0] * len(self.buckets), 0.0, 0]
+            for i, limite in enumerate(self.buckets):
+                if value <= limite:
+                    serie[0][i] += 1
+                    break
+            serie[1] += value
+            serie[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - inicio, **labels)
+
+    def _dump(self):
+        return [[list(k), v] for k, v in self._values.items()]
+
+    def _merge(self, total, dados):
+        for labels, (contagens, soma, quantidade) in dados:
+            chave = tuple(labels)
+            serie = total.setdefault(chave, [[0] * len(self.buckets), 0.0, 0])
+            for i, c in enumerate(contagens[:len(self.buckets)]):
+                serie[0][i] += c
+            serie[1] += soma
+            serie[2] += quantidade
+
+    def _render(self, total):
+        linhas = []
+        nomes = self.labelnames + ('le',)
+        for chave, (contagens, soma, quantidade) in sorted(total.items()):
+            acumulado = 0
+            for limite, c in zip(self.buckets, contagens):
+                acumulado += c
+                linhas.append(f"{self.name}_bucket{_labels(nomes, chave + (_number(limite),))} {acumulado}")
+            linhas.append(f"{self.name}_bucket{_labels(nomes, chave + ('+Inf',))} {quantidade}")
+            linhas.append(f"{self.name}_sum{_labels(self.labelnames, chave)} {_number(soma)}")
+            linhas.append(f"{self.name}_count{_labels(self.labelnames, chave)} {quantidade}")
+        return linhas
+
+
+def _labels(nomes, valores):
+    if not nomes:
+        return ''
+    pares = []
+    for nome, valor in zip(nomes, valores):
+        valor = str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pares.append(f'{nome}="{valor}"')
+    return '{' + ','.join(pares) + '}'
+
+
+def _number(valor):
+    if isinstance(valor, float):
+        if math.isinf(valor):
+            return '+Inf' if valor > 0 else '-Inf'
+        if valor.is_integer():
+            return str(int(valor))
+    return repr(valor) if isinstance(valor, float) else str(valor)
+
+
+def register_source(counter, fn):
+    """
+    Associa ao contador uma função que devolve {tupla de rótulos: valor acumulado}
+    lida a cada gravação (para contadores que já existem em outros módulos,
+    como os acertos dos caches).
+    """
+    _sources.append((counter, fn))
+
+
+@contextmanager
+def stage(nome):
+    """
+    Mede a duração de uma etapa, rotulada com a rota da requisição em andamento.
+    """
+    with STAGE_DURATION.time(stage=nome, route=current_route.get()):
+        yield
+
+
+def _reset_after_fork():
+    # Valores herdados do processo pai (preload) já estão no arquivo dele
+    global _lock
+    _lock = threading.Lock()
+    for metrica in _registry.values():
+        metrica._reset()
+    _state['last_flush'] = 0.0
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _snapshot():
+    for counter, fn in _sources:
+        try:
+            valores = fn()
+        except Exception as e:
+            print(f"Erro ao coletar métrica {counter.name}: {e}")
+            continue
+        with _lock:
+            for labels, valor in valores.items():
+                counter._values[tuple(str(v) for v in labels)] = valor
+    with _lock:
+        return {nome: metrica._dump() for nome, metrica in _registry.items() if metrica._values}
+
+
+def flush(force=False):
+    """
+    Grava as métricas deste processo em METRICS_DIR/<pid>.json, no máximo a
+    cada METRICS_FLUSH_INTERVAL segundos (ou sempre, com force=True).
+    """
+    agora = time.monotonic()
+    if not force and agora - _state['last_flush'] < METRICS_FLUSH_INTERVAL:
+        return
+    _state['last_flush'] = agora
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    destino = os.path.join(METRICS_DIR, f"{os.getpid()}.json")
+    tmp_path = f"{destino}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(_snapshot(), f)
+    os.replace(tmp_path, destino)
+
+
+def _merge_files(caminhos):
+    totais = {nome: {} for nome in _registry}
+    for caminho in caminhos:
+        try:
+            with open(caminho, 'r') as f:
+                dados = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for nome, valores in dados.items():
+            if nome in _registry:
+                _registry[nome]._merge(totais[nome], valores)
+    return totais
+
+
+def render():
+    """
+    Soma os arquivos de todos os processos e devolve o texto no formato do Prometheus.
+    """
+    flush(force=True)
+    totais = _merge_files(glob.glob(os.path.join(METRICS_DIR, "*.json")))
+    linhas = []
+    for nome, metrica in _registry.items():
+        linhas.append(f"# HELP {nome} {metrica.documentation}")
+        linhas.append(f"# TYPE {nome} {metrica.kind}")
+        linhas.extend(metrica._render(totais[nome]))
+    return "\n".join(linhas) + "\n"
+
+
+def mark_process_dead(pid):
+    """
+    Incorpora o arquivo de um worker encerrado ao acumulado dos workers mortos
+    (mortos.json), para que a reciclagem de workers não multiplique arquivos
+    nem faça os contadores voltarem. Chamada pelo master do gunicorn.
+    """
+    caminho = os.path.join(METRICS_DIR, f"{pid}.json")
+    if not os.path.exists(caminho):
+        return
+    acumulado = os.path.join(METRICS_DIR, "mortos.json")
+    totais = _merge_files([acumulado, caminho])
+    dados = {nome: [[list(k), v] for k, v in valores.items()] for nome, valores in totais.items() if valores}
+    tmp_path = f"{acumulado}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(dados, f)
+    os.replace(tmp_path, acumulado)
+    os.remove(caminho)
+
+
+def reset_dir():
+    """
+    Apaga os arquivos de métricas (ao iniciar o servidor, antes dos workers).
+    """
+    for caminho in glob.glob(os.path.join(METRICS_DIR, "*.json")):
+        try:
+            os.remove(caminho)
+        except OSError:
+            pass
+
+
+REQUEST_DURATION = Histogram('rea_http_request_duration_seconds', 'Duração das requisições HTTP por rota.',
+                             ('route', 'method', 'status'))
+STAGE_DURATION = Histogram('rea_stage_duration_seconds', 'Duração de cada etapa do processamento.',
+                           ('stage', 'route'))
+RESPONSE_BYTES = Histogram('rea_http_response_bytes', 'Tamanho do corpo das respostas HTTP por rota.',
+                           ('route',), buckets=BYTES_BUCKETS)
+FEED_FETCHES = Counter('rea_feed_fetches_total', 'Buscas do feed do Ploomnes por resultado.', ('result',))
+FEED_BYTES = Counter('rea_feed_bytes_fetched_total', 'Bytes do feed do Ploomnes baixados.')
+DATASET_ROWS = Histogram('rea_dataset_rows', 'Manifestações no dataset normalizado, por montagem.',
+                         buckets=ROWS_BUCKETS)
+REPORT_ROWS = Histogram('rea_report_rows', 'Manifestações no período de cada relatório calculado.',
+                        ('route',), buckets=ROWS_BUCKETS)
+CACHE_REQUESTS = Counter('rea_cache_requests_total', 'Consultas aos caches de resultados por resultado.',
+                         ('cache', 'result'))
@@ -0,0 +1,148 @@
+import os
+import time
+import queue
+import atexit
+import threading
+
+# ---------------------------------------------------
+# Envio assíncrono de alertas (Google Chat)
+# ---------------------------------------------------
+# A requisição só enfileira o alerta; uma thread em segundo plano descarta
+# repetições dentro da janela de deduplicação, junta os alertas pendentes em
+# uma única mensagem e respeita um intervalo mínimo entre envios. O que ainda
+# estiver na fila é enviado quando o processo termina.
+
+ALERT_QUEUE_SIZE = int(os.environ.get("ALERT_QUEUE_SIZE", "100"))
+ALERT_DEDUP_WINDOW = float(os.environ.get("ALERT_DEDUP_WINDOW", "600"))
+ALERT_BATCH_SIZE = int(os.environ.get("ALERT_BATCH_SIZE", "20"))
+# Tempo que o primeiro alerta espera por outros antes do envio
+ALERT_BATCH_WAIT = float(os.environ.get("ALERT_BATCH_WAIT", "2"))
+# Intervalo mínimo entre duas mensagens enviadas ao webhook
+ALERT_MIN_INTERVAL = float(os.environ.get("ALERT_MIN_INTERVAL", "10"))
+ALERT_FLUSH_TIMEOUT = float(os.environ.get("ALERT_FLUSH_TIMEOUT", "5"))
+
+
+def format_batch(mensagens):
+    """
+    Junta os alertas de um lote em um único texto.
+    """
+    if len(mensagens) == 1:
+        return mensagens[0]
+    return f"{len(mensagens)} alertas:\n" + "\n".join(f"- {m}" for m in mensagens)
+
+
+class AlertDispatcher:
+    """
+    Fila limitada de alertas com deduplicação, agrupamento e limite de taxa.
+    send(texto) é chamada apenas pela thread de envio (ou por flush()).
+    """
+
+    def __init__(self, send, max_queue=ALERT_QUEUE_SIZE, dedup_window=ALERT_DEDUP_WINDOW,
+                 batch_size=ALERT_BATCH_SIZE, batch_wait=ALERT_BATCH_WAIT, min_interval=ALERT_MIN_INTERVAL):
+        self.send = send
+        self.dedup_window = dedup_window
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.min_interval = min_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._recent = {}
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._thread_pid = None
+        self._last_sent = 0.0
+        self.metrics = {'enqueued': 0, 'deduplicated': 0, 'dropped': 0, 'sent_messages': 0,
+                        'sent_alerts': 0, 'failed': 0}
+
+    def enqueue(self, mensagem):
+        """
+        Enfileira o alerta sem bloquear. Retorna False se ele foi descartado
+        (repetido dentro da janela ou fila cheia).
+        """
+        agora = time.monotonic()
+        with self._lock:
+            ultimo = self._recent.get(mensagem)
+            if ultimo is not None and agora - ultimo < self.dedup_window:
+                self.metrics['deduplicated'] += 1
+                return False
+            if len(self._recent) > 4 * self._queue.maxsize:
+                self._recent = {m: t for m, t in self._recent.items() if agora - t < self.dedup_window}
+            self._recent[mensagem] = agora
+            self._ensure_thread()
+        try:
+            self._queue.put_nowait(mensagem)
+        except queue.Full:
+            with self._lock:
+                self._recent.pop(mensagem, None)
+                self.metrics['dropped'] += 1
+            return False
+        with self._lock:
+            self.metrics['enqueued'] += 1
+        return True
+
+    def _ensure_thread(self):
+        # Threads não sobrevivem ao fork: cada worker do gunicorn inicia a sua
+        if self._thread_pid != os.getpid():
+            self._thread_pid = os.getpid()
+            threading.Thread(target=self._run, name="alert-dispatcher", daemon=True).start()
+
+    def _collect(self, primeira):
+        lote = [primeira]
+        limite = time.monotonic() + self.batch_wait
+        while len(lote) < self.batch_size:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                break
+            try:
+                lote.append(self._queue.get(timeout=restante))
+            except queue.Empty:
+                break
+        return lote
+
+    def _deliver(self, lote):
+        with self._send_lock:
+            try:
+                self.send(format_batch(lote))
+            except Exception as e:
+                print(f"Falha ao enviar alertas: {e}")
+                with self._lock:
+                    self.metrics['failed'] += len(lote)
+                return
+            finally:
+                self._last_sent = time.monotonic()
+            with self._lock:
+                self.metrics['sent_messages'] += 1
+                self.metrics['sent_alerts'] += len(lote)
+
+    def _run(self):
+        while True:
+            # Alertas que chegarem durante a espera ficam na fila e saem no mesmo lote
+            espera = self._last_sent + self.min_interval - time.monotonic()
+            if espera > 0:
+                time.sleep(espera)
+            primeira = self._queue.get()
+            self._deliver(self._collect(primeira))
+
+    def flush(self, timeout=ALERT_FLUSH_TIMEOUT):
+        """
+        Envia imediatamente, ignorando o limite de taxa, o que estiver na fila.
+        Usada no encerramento do processo.
+        """
+        limite = time.monotonic() + timeout
+        while time.monotonic() < limite:
+            lote = []
+            while len(lote) < self.batch_size:
+                try:
+                    lote.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not lote:
+                return
+            self._deliver(lote)
+
+    def stats(self):
+        with self._lock:
+            return dict(self.metrics, queued=self._queue.qsize(), max_queue=self._queue.maxsize)
+
+    def register_shutdown(self):
+        atexit.register(self.flush)
+        return self
@@ -0,0 +1,223 @@
+import os
+import json
+import time
+import uuid
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import data_cache
+import metrics
+
+# ---------------------------------------------------
+# Fila de geração de PDFs em segundo plano (pool de processos)
+# ---------------------------------------------------
+# A montagem do PDF (ReportLab) roda em um pool de processos, fora da thread
+# da requisição. O resultado e o estado de cada job ficam em arquivos em
+# JOBS_DIR, para que qualquer worker do gunicorn consiga informar o status e
+# entregar o PDF, não apenas o worker que recebeu o pedido. O timeout é
+# aplicado dentro do processo do pool (SIGALRM), contado a partir do início da
+# montagem; o tempo de espera na fila não conta. Um arquivo .error é final.
+
+JOBS_DIR = os.path.join(data_cache.CACHE_DIR, "pdf_jobs")
+PDF_JOB_WORKERS = int(os.environ.get("PDF_JOB_WORKERS", "2"))
+PDF_JOB_QUEUE_SIZE = int(os.environ.get("PDF_JOB_QUEUE_SIZE", "16"))
+PDF_JOB_TIMEOUT = float(os.environ.get("PDF_JOB_TIMEOUT", "120"))
+# Tempo que um PDF pronto fica disponível para download
+PDF_JOB_TTL = float(os.environ.get("PDF_JOB_TTL", "3600"))
+
+
+# Conteúdo do .error de um job que excedeu PDF_JOB_TIMEOUT
+TIMEOUT_MESSAGE = "Tempo limite excedido"
+
+
+class QueueFullError(Exception):
+    """
+    A fila de jobs de PDF atingiu o limite de jobs pendentes.
+    """
+
+
+class JobTimeoutError(Exception):
+    """
+    A montagem do PDF excedeu o tempo limite do job.
+    """
+
+
+def _job_path(job_id, extensao):
+    return os.path.join(JOBS_DIR, f"{job_id}.{extensao}")
+
+
+def _write_atomic(caminho, conteudo):
+    tmp_path = f"{caminho}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(conteudo)
+    os.replace(tmp_path, caminho)
+
+
+def _write_error(job_id, mensagem):
+    # O primeiro erro gravado vale: um job expirado não volta a ser outro estado
+    if not os.path.exists(_job_path(job_id, 'error')):
+        _write_atomic(_job_path(job_id, 'error'), mensagem.encode('utf-8'))
+
+
+def _alarme(signum, frame):
+    raise JobTimeoutError(TIMEOUT_MESSAGE)
+
+
+def _run_job(render, job_id, relatorio, questoes_manuais, timeout=None):
+    """
+    Executado no processo do pool: gera o PDF e grava o resultado em disco,
+    interrompendo a montagem (SIGALRM) se ela passar de `timeout` segundos.
+    Retorna a duração da montagem em segundos.
+    """
+    inicio = time.monotonic()
+    alarme = timeout and hasattr(signal, 'setitimer')
+    if alarme:
+        anterior = signal.signal(signal.SIGALRM, _alarme)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        pdf = render(relatorio, questoes_manuais)
+    except JobTimeoutError:
+        _write_error(job_id, TIMEOUT_MESSAGE)
+        raise
+    except Exception as e:
+        _write_error(job_id, str(e) or type(e).__name__)
+        raise
+    finally:
+        if alarme:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, anterior)
+    _write_atomic(_job_path(job_id, 'pdf'), pdf)
+    return time.monotonic() - inicio
+
+
+class PDFJobQueue:
+    """
+    Fila limitada de jobs de PDF com timeout por job e métricas de duração.
+    Um job ocupa a fila até o processo do pool terminar de fato. Se `cache`
+    (result_cache.LRUCache) for informado, os PDFs prontos são guardados nele
+    pela chave do job, compartilhando o resultado com a geração síncrona.
+    """
+
+    def __init__(self, render, max_workers=PDF_JOB_WORKERS, max_pending=PDF_JOB_QUEUE_SIZE, timeout=PDF_JOB_TIMEOUT,
+                 cache=None):
+        self.render = render
+        self.cache = cache
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._executor = None
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.metrics = {'submitted': 0, 'completed': 0, 'failed': 0, 'timed_out': 0, 'rejected': 0,
+                        'duration_total': 0.0, 'duration_max': 0.0}
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def _submit_job(self, job_id, relatorio, questoes_manuais):
+        argumentos = (_run_job, self.render, job_id, relatorio, questoes_manuais, self.timeout)
+        try:
+            return self._get_executor().submit(*argumentos)
+        except BrokenProcessPool:
+            # Um processo do pool morreu (ex.: OOM): recria o pool; os jobs
+            # que estavam nele terminam com erro em _finished
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            return self._get_executor().submit(*argumentos)
+
+    def _cleanup(self):
+        agora = time.time()
+        try:
+            nomes = os.listdir(JOBS_DIR)
+        except OSError:
+            return
+        for nome in nomes:
+            caminho = os.path.join(JOBS_DIR, nome)
+            try:
+                if agora - os.path.getmtime(caminho) > PDF_JOB_TTL:
+                    os.remove(caminho)
+            except OSError:
+                pass
+
+    def submit(self, chave, relatorio, questoes_manuais):
+        """
+        Enfileira a geração do PDF e retorna o id do job. Um pedido idêntico
+        (mesma chave) ainda pendente reaproveita o job existente.
+        Levanta QueueFullError se já houver max_pending jobs pendentes.
+        """
+        with self._lock:
+            for job_id, job in self._pending.items():
+                if job['chave'] == chave:
+                    return job_id
+            if len(self._pending) >= self.max_pending:
+                self.metrics['rejected'] += 1
+                raise QueueFullError(f"Fila de PDFs cheia ({self.max_pending} jobs pendentes).")
+            os.makedirs(JOBS_DIR, exist_ok=True)
+            self._cleanup()
+            job_id = uuid.uuid4().hex
+            _write_atomic(_job_path(job_id, 'job'), json.dumps({'submitted_at': time.time()}).encode('utf-8'))
+            future = self._submit_job(job_id, relatorio, questoes_manuais)
+            self._pending[job_id] = {'chave': chave, 'future': future}
+            self.metrics['submitted'] += 1
+        future.add_done_callback(lambda f, job_id=job_id: self._finished(job_id, f))
+        return job_id
+
+    def _finished(self, job_id, future):
+        with self._lock:
+            job = self._pending.pop(job_id, None)
+            if future.cancelled():
+                return
+            erro = future.exception()
+            if erro is not None:
+                # Erros de fora do render (ex.: BrokenProcessPool) também tornam o job final
+                _write_error(job_id, TIMEOUT_MESSAGE if isinstance(erro, JobTimeoutError) else str(erro) or type(erro).__name__)
+                self.metrics['timed_out' if isinstance(erro, JobTimeoutError) else 'failed'] += 1
+                return
+            duracao = future.result()
+            metrics.STAGE_DURATION.observe(duracao, stage='render_pdf', route='pdf_job')
+            self.metrics['completed'] += 1
+            self.metrics['duration_total'] += duracao
+            self.metrics['duration_max'] = max(self.metrics['duration_max'], duracao)
+        if self.cache is not None and job is not None:
+            try:
+                with open(_job_path(job_id, 'pdf'), 'rb') as f:
+                    self.cache.put(job['chave'], f.read())
+            except OSError:
+                pass
+
+    def status(self, job_id):
+        """
+        Retorna o estado do job: 'concluido', 'erro', 'expirado', 'pendente' ou
+        None se o job não existir. O .error tem precedência sobre o .pdf.
+        """
+        if not all(c in '0123456789abcdef' for c in job_id):
+            return None
+        try:
+            with open(_job_path(job_id, 'error'), 'r', encoding='utf-8') as f:
+                return 'expirado' if f.read() == TIMEOUT_MESSAGE else 'erro'
+        except OSError:
+            pass
+        if os.path.exists(_job_path(job_id, 'pdf')):
+            return 'concluido'
+        if not os.path.exists(_job_path(job_id, 'job')):
+            return None
+        return 'pendente'
+
+    def result_path(self, job_id):
+        """
+        Caminho do PDF pronto do job, ou None se ainda não estiver disponível.
+        """
+        if self.status(job_id) != 'concluido':
+            return None
+        return _job_path(job_id, 'pdf')
+
+    def stats(self):
+        with self._lock:
+            concluidos = self.metrics['completed']
+            return dict(self.metrics,
+                        pending=len(self._pending),
+                        max_pending=self.max_pending,
+                        duration_avg=round(self.metrics['duration_total'] / concluidos, 4) if concluidos else 0.0)
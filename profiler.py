@@ -0,0 +1,65 @@
+import os
+import sys
+import time
+import threading
+from collections import Counter
+
+# ---------------------------------------------------
+# Profiler por amostragem de requisições lentas (opcional)
+# ---------------------------------------------------
+# Uma thread lê a pilha da thread da requisição em intervalos fixos e conta as
+# pilhas vistas. O resultado é gravado no formato "folded" (uma pilha por
+# linha, quadros separados por ';' e a contagem no final), aceito por
+# flamegraph.pl e speedscope.
+
+PROFILE_INTERVAL = float(os.environ.get("PROFILE_INTERVAL", "0.005"))
+
+
+class StackSampler:
+    """
+    Amostra a pilha de uma thread a cada `interval` segundos entre start() e stop().
+    """
+
+    def __init__(self, thread_id=None, interval=PROFILE_INTERVAL):
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        frame = sys._current_frames().get(self.thread_id)
+        quadros = []
+        while frame is not None:
+            codigo = frame.f_code
+            quadros.append(f"{os.path.basename(codigo.co_filename)}:{codigo.co_name}:{frame.f_lineno}")
+            frame = frame.f_back
+        if quadros:
+            self.samples[';'.join(reversed(quadros))] += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.samples
+
+    def write_folded(self, caminho):
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        with open(caminho, 'w') as f:
+            for pilha, quantidade in self.samples.most_common():
+                f.write(f"{pilha} {quantidade}\n")
+        return caminho
+
+
+def profile_path(diretorio, rota, duracao):
+    nome = rota.strip('/').replace('/', '_').replace('<', '').replace('>', '') or 'raiz'
+    return os.path.join(diretorio, f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{nome}-{int(duracao * 1000)}ms.folded")
@@ -0,0 +1,159 @@
+import io
+from datetime import date, datetime
+import report_kernel
+
+# ---------------------------------------------------
+# Relatório REA: campos do feed, montagem dos contadores e PDF
+# ---------------------------------------------------
+# Sem Flask nem sessão: usado pelas rotas de app.py, pelo pool de PDFs
+# (pdf_jobs.py) e pela geração em lote (scripts/gerar_relatorios.py).
+
+COL_MAPPING = {
+    '*Tipo da Manifestação': 'tipo_manifestacao',
+    '*Tema da Manifestação': 'tema_manifestacao',
+    '*Forma de Entrada do Contato': 'forma_entrada_contato',
+    '*Data da manifestação': 'data_manifestacao',
+    '*Data da Resposta': 'data_resposta',
+    'Atendimento para:': 'atendimento_para',
+    '* Vínculo com o  beneficiário referenciado': 'vinculo_beneficiario',
+}
+
+
+def build_relatorio(tabela, tem_canal=True):
+    """
+    Monta o dicionário do relatório a partir dos contadores agregados
+    (report_kernel.AggregateTable ou rollups.RollupCounts) e das respostas fixas.
+    """
+    relatorio = {}
+    ano_atual = date.today().year
+    relatorio['ano_dados_informados'] = ano_atual
+    relatorio['email_responsavel'] = "cleide@elosaude.com.br"
+    relatorio['telefone_contato'] = "(48)3298-5555"
+    relatorio.update(report_kernel.compute_counters(tabela, tem_canal=tem_canal))
+    relatorio['conversao_reanalise'] = 2
+    relatorio['motivo_conversao'] = "Recebimento de documentação incompleta, necessitando documentação complementar para avaliação da auditoria médica."
+    relatorio['motivo_nao_cumprimento_prazo'] = "Afetado pela dependência de retorno da rede prestadora envolvida para conclusão final da manifestação."
+    relatorio['possui_avaliacao_atendimento'] = "NÃO"
+    relatorio['total_respondentes'] = "Verificar fonte"
+    relatorio['como_avaliacao'] = "Verificar fonte"
+    relatorio['fez_recomendacoes'] = "SIM"
+    relatorio['recomendacoes_propostas'] = "Recomendou-se conduzir através de linguajar mais acessível as negativas entregues aos beneficiários, proporcionando uma transmissão de maior clareza nas razões pelas quais foram negadas suas solicitações."
+    relatorio['estagio_implementacao'] = "Não houve recomendações propostas no período anterior"
+    relatorio['pessoas_unidade_ouvidoria'] = 1
+    relatorio['divulgacao_ouvidoria'] = "Site, Email"
+    relatorio['acompanha_nip'] = "SIM"
+    relatorio['acoes_para_reduzir_nips'] = "Sim, a condução de analise conjunta entre a ouvidoria e demais áreas envolvidas, a fim de proporcionar analise com maior minucia e realizar o atendimento de solicitações cabíveis previamente a notificação, adiantando o entendimento do processo e possíveis consequências da resposta da ouvidoria."
+    relatorio['conhece_idss_pesquisa_satisfacao'] = "SIM"
+    relatorio['sugestao_melhoria_documentos'] = "Não"
+    return relatorio
+
+
+# ---------------------------------------------------
+# Geração do PDF (ajustada para imprimir as questões com o número original)
+# ---------------------------------------------------
+
+def generate_pdf_report(relatorio, questoes_manuais=None, output=None):
+    """
+    Gera o PDF do relatório REA. Se houver questoes_manuais (lista de dicts
+    com 'questao' e 'resposta'), imprime cada 'questao' exatamente como veio
+    (ex.: '49) Texto...') para preservar o número original.
+
+    Sem output, o PDF é montado em memória e os bytes são retornados; com output
+    (caminho ou arquivo), é gravado lá e output é retornado.
+    """
+    # ReportLab só é carregado quando um PDF é gerado, não no boot do worker
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.units import inch
+    from reportlab.lib.enums import TA_CENTER
+    from reportlab.lib.styles import ParagraphStyle
+
+    destino = output if output is not None else io.BytesIO()
+    doc = SimpleDocTemplate(destino, pagesize=letter)
+    story = []
+    styles = getSampleStyleSheet()
+    styles['Normal'].leading = 14
+    header_style = ParagraphStyle('HeaderStyle', parent=styles['Normal'], alignment=TA_CENTER, fontSize=14)
+    story.append(Paragraph("<b>Operadora:</b> 417297 - ELOSAÚDE - ASSOCIAÇÃO DE ASSISTÊNCIA À SAÚDE", header_style))
+    story.append(Paragraph("<b>Processo Número nº:</b> 33910028928202421", header_style))
+    story.append(Paragraph("<b>Ouvidoria - REA-Ouvidorias</b>", header_style))
+    story.append(Spacer(1, 0.2*inch))
+    story.append(Paragraph("----------------------------------------------------------------------------------------------------------------------------------------", styles['Normal']))
+    story.append(Spacer(1, 0.2*inch))
+    story.append(Paragraph("Eu CLEIDE DE CALDAS NOGUEIRA, declaro que enviei as informações abaixo da operadora ELOSAÚDE - ASSOCIAÇÃO DE ASSISTÊNCIA À SAÚDE (417297) conforme solicitado.", styles['Normal']))
+    story.append(Spacer(1, 0.2*inch))
+    story.append(Paragraph(f"1) Ano dos dados informados: {date.today().year}", styles['Normal']))
+    story.append(Paragraph(f"2) E-mail do responsável pela Ouvidoria: {relatorio.get('email_responsavel', '')}", styles['Normal']))
+    story.append(Paragraph(f"3) Telefone de contato: {relatorio.get('telefone_contato', '')}", styles['Normal']))
+    story.append(Paragraph(f"4) [REANÁLISE] A Ouvidoria recebeu algum requerimento de reanálise assistencial em {date.today().year}?: {relatorio.get('recebeu_reanalise', '')}", styles['Normal']))
+    story.append(Paragraph(f"5) [REANÁLISE] Por que a Ouvidoria não recebeu requerimentos de reanálise assistencial?: {'Não houve requerimentos no período' if relatorio.get('recebeu_reanalise') == 'NÃO' else relatorio.get('motivo_conversao', '')}", styles['Normal']))
+    story.append(Paragraph(f"6) [REANÁLISE] Quantidade de requerimentos de reanálise convertidos em manifestação de ouvidoria: {relatorio.get('conversao_reanalise', 0)}", styles['Normal']))
+    story.append(Paragraph(f"11) [MANIFESTAÇÃO] A operadora recebeu manifestações próprias?: {relatorio.get('recebeu_manifestacao_propria', '')}", styles['Normal']))
+    story.append(Paragraph(f"12) [CANAL] Quantidade de manifestações recebidas pelo canal E-mail: {relatorio.get('quantitativo_canais', {}).get('E-mail', 0)}", styles['Normal']))
+    story.append(Paragraph(f"13) [CANAL] Quantidade de manifestações recebidas pelo canal Telefone: {relatorio.get('quantitativo_canais', {}).get('Telefone', 0)}", styles['Normal']))
+    story.append(Paragraph(f"14) [CANAL] Quantidade de manifestações recebidas pelo canal Site: {relatorio.get('quantitativo_canais', {}).get('Site', 0)}", styles['Normal']))
+    story.append(Paragraph(f"15) [CANAL] Quantidade de manifestações recebidas pelo canal Aplicativo ou Redes sociais da operadora: {relatorio.get('quantitativo_canais', {}).get('Aplicativo ou Redes sociais da operadora', 0)}", styles['Normal']))
+    story.append(Paragraph(f"16) [CANAL] Quantidade de manifestações recebidas pelo canal Presencialmente: {relatorio.get('quantitativo_canais', {}).get('Presencialmente', 0)}", styles['Normal']))
+    story.append(Paragraph(f"17) [CANAL] Quantidade de manifestações recebidas por outros canais: {relatorio.get('quantitativo_canais', {}).get('Outros', 0)}", styles['Normal']))
+    story.append(Paragraph(f"18) [TEMA] Quantidade de manifestações sobre o tema Administrativo: {relatorio.get('quantitativo_temas', {}).get('Administrativo', 0)}", styles['Normal']))
+    story.append(Paragraph(f"19) [TEMA] Quantidade de manifestações sobre o tema Cobertura assistencial: {relatorio.get('quantitativo_temas', {}).get('Cobertura assistencial', 0)}", styles['Normal']))
+    story.append(Paragraph(f"20) [TEMA] Quantidade de manifestações sobre o tema Financeiro: {relatorio.get('quantitativo_temas', {}).get('Financeiro', 0)}", styles['Normal']))
+    story.append(Paragraph(f"21) [TEMA] Quantidade de manifestações sobre o tema Rede credenciada/referenciada: {relatorio.get('quantitativo_temas', {}).get('Rede credenciada/referenciada', 0)}", styles['Normal']))
+    story.append(Paragraph(f"22) [TEMA] Quantidade de manifestações sobre o tema Serviço de Atendimento ao Cliente (SAC): {relatorio.get('quantitativo_temas', {}).get('Serviço de Atendimento ao Cliente (SAC)', 0)}", styles['Normal']))
+    story.append(Paragraph(f"23) [TIPO] Quantidade de manifestações do tipo Consulta: {relatorio.get('quantitativo_tipos', {}).get('Consulta', 0)}", styles['Normal']))
+    story.append(Paragraph(f"24) [TIPO] Quantidade de manifestações do tipo Denúncia: {relatorio.get('quantitativo_tipos', {}).get('Denúncia', 0)}", styles['Normal']))
+    story.append(Paragraph(f"25) [TIPO] Quantidade de manifestações do tipo Elogio: {relatorio.get('quantitativo_tipos', {}).get('Elogio', 0)}", styles['Normal']))
+    story.append(Paragraph(f"26) [TIPO] Quantidade de manifestações do tipo Reclamação: {relatorio.get('quantitativo_tipos', {}).get('Reclamação', 0)}", styles['Normal']))
+    story.append(Paragraph(f"27) [TIPO] Quantidade de manifestações do tipo Sugestão: {relatorio.get('quantitativo_tipos', {}).get('Sugestão', 0)}", styles['Normal']))
+    story.append(Paragraph(f"28) [RECLAMAÇÕES - TEMA] Quantidade de RECLAMAÇÕES sobre o tema Administrativo: {relatorio.get('reclamacoes_por_tema', {}).get('Administrativo', 0)}", styles['Normal']))
+    story.append(Paragraph(f"29) [RECLAMAÇÕES - TEMA] Quantidade de RECLAMAÇÕES sobre o tema Cobertura assistencial: {relatorio.get('reclamacoes_por_tema', {}).get('Cobertura assistencial', 0)}", styles['Normal']))
+    story.append(Paragraph(f"30) [RECLAMAÇÕES - TEMA] Quantidade de RECLAMAÇÕES sobre o tema Financeiro: {relatorio.get('reclamacoes_por_tema', {}).get('Financeiro', 0)}", styles['Normal']))
+    story.append(Paragraph(f"31) [RECLAMAÇÕES - TEMA] Quantidade de RECLAMAÇÕES sobre o tema Rede credenciada/referenciada: {relatorio.get('reclamacoes_por_tema', {}).get('Rede credenciada/referenciada', 0)}", styles['Normal']))
+    story.append(Paragraph(f"32) [RECLAMAÇÕES - TEMA] Quantidade de RECLAMAÇÕES sobre o tema SAC: {relatorio.get('reclamacoes_por_tema', {}).get('Serviço de Atendimento ao Cliente (SAC)', 0)}", styles['Normal']))
+    story.append(Paragraph(f"33) [RECLAMAÇÕES - TIPO] Quantidade de RECLAMAÇÕES vindas do tipo de contrato Coletivo adesão: {relatorio.get('reclamacoes_coletivo_adesao', 0)}", styles['Normal']))
+    story.append(Paragraph(f"34) [RECLAMAÇÕES - TIPO] Quantidade de RECLAMAÇÕES vindas do tipo de contrato Coletivo empresarial: {relatorio.get('reclamacoes_coletivo_empresarial', 0)}", styles['Normal']))
+    story.append(Paragraph(f"35) [RECLAMAÇÕES - TIPO] Quantidade de RECLAMAÇÕES vindas do tipo de contrato Individual/Familiar: {relatorio.get('reclamacoes_individual_familiar', 0)}", styles['Normal']))
+    story.append(Paragraph(f"36) [RECLAMAÇÕES - TIPO] Quantidade de RECLAMAÇÕES vindas de Outro tipo de contrato: {relatorio.get('reclamacoes_outros_contratos', 0)}", styles['Normal']))
+    story.append(Paragraph(f"37) [RECLAMAÇÕES - DEMANDANTE] Quantidade de RECLAMAÇÕES realizadas por Beneficiário ou interlocutor: {relatorio.get('reclamacoes_beneficiario', 0)}", styles['Normal']))
+    story.append(Paragraph(f"38) [RECLAMAÇÕES - DEMANDANTE] Quantidade de RECLAMAÇÕES realizadas por Corretor: {relatorio.get('reclamacoes_corretor', 0)}", styles['Normal']))
+    story.append(Paragraph(f"39) [RECLAMAÇÕES - DEMANDANTE] Quantidade de RECLAMAÇÕES realizadas por Gestor contrato coletivo: {relatorio.get('reclamacoes_gestor', 0)}", styles['Normal']))
+    story.append(Paragraph(f"40) [RECLAMAÇÕES - DEMANDANTE] Quantidade de RECLAMAÇÕES realizadas por Prestador de serviços: {relatorio.get('reclamacoes_prestador', 0)}", styles['Normal']))
+    story.append(Paragraph(f"41) [RECLAMAÇÕES - DEMANDANTE] Quantidade de RECLAMAÇÕES realizadas por Outros demandantes: {relatorio.get('reclamacoes_outros_demandantes', 0)}", styles['Normal']))
+    story.append(Paragraph(f"42) [INDICADORES] Tempo Médio de Resposta da Ouvidoria (TMRO): {relatorio.get('tmro', 0)}", styles['Normal']))
+    story.append(Paragraph(f"43) [INDICADORES] Percentual de Resposta Dentro do Prazo (PRDP): {relatorio.get('prdp', 0)}", styles['Normal']))
+    story.append(Paragraph(f"44) [INDICADORES] Percentual de Resposta Dentro de Prazo Pactuado (PRDPP): {relatorio.get('prdpp', 0)}", styles['Normal']))
+    story.append(Paragraph(f"45) [INDICADORES] Percentual de Resposta Fora do Prazo (PRFP): {relatorio.get('prfp', 0)}", styles['Normal']))
+    story.append(Paragraph(f"46) [INDICADORES] Motivo(s) para o não cumprimento do prazo: {relatorio.get('motivo_nao_cumprimento_prazo', '')}", styles['Normal']))
+    story.append(Paragraph(f"47) [AVALIAÇÃO-OUVIDORIA] A Ouvidoria possui avaliação de seu atendimento?: {relatorio.get('possui_avaliacao_atendimento', '')}", styles['Normal']))
+    story.append(Paragraph(f"48) [AVALIAÇÃO-OUVIDORIA] Informar o total de respondentes: {relatorio.get('total_respondentes', '')}", styles['Normal']))
+    
+    # Substitui as respostas automáticas pelas manuais, se existirem
+    resposta_q49 = next((qm['resposta'] for qm in (questoes_manuais or []) if qm['questao'].startswith("49)")), relatorio.get('como_avaliacao', ''))
+    story.append(Paragraph(f"49) [AVALIAÇÃO-OUVIDORIA] De uma forma geral, como o seu atendimento foi avaliado?: {resposta_q49}", styles['Normal']))
+
+    story.append(Paragraph(f"50) [RECOMENDAÇÕES] A Ouvidoria fez recomendações para melhoria do processo de trabalho da operadora?: {relatorio.get('fez_recomendacoes', '')}", styles['Normal']))
+    story.append(Paragraph(f"51) [RECOMENDAÇÕES] Informar, resumidamente, as recomendações propostas.: {relatorio.get('recomendacoes_propostas', '')}", styles['Normal']))
+
+    resposta_q52 = next((qm['resposta'] for qm in (questoes_manuais or []) if qm['questao'].startswith("52)")), 'Não aplicável' if relatorio.get('fez_recomendacoes') == 'SIM' else relatorio.get('motivo_nao_cumprimento_prazo', ''))
+    story.append(Paragraph(f"52) [RECOMENDAÇÕES] Por que a ouvidoria não fez recomendações de melhoria?: {resposta_q52}", styles['Normal']))
+
+    story.append(Paragraph(f"53) [RECOMENDAÇÕES] Como considera o estágio de implementação das recomendações feitas em 2023?: {relatorio.get('estagio_implementacao', '')}", styles['Normal']))
+    story.append(Paragraph(f"54) [ESTRUTURA] Quantas pessoas compõem exclusivamente a unidade de Ouvidoria?: {relatorio.get('pessoas_unidade_ouvidoria', 0)}", styles['Normal']))
+    story.append(Paragraph(f"55) [DIVULGAÇÃO] Como a operadora divulga a existência da Ouvidoria?: {relatorio.get('divulgacao_ouvidoria', '')}", styles['Normal']))
+    story.append(Paragraph(f"56) [ACOMPANHAMENTO] A Ouvidoria acompanha o desempenho da operadora na Notificação de Intermediação Preliminar (NIP)?: {relatorio.get('acompanha_nip', '')}", styles['Normal']))
+
+    resposta_q57 = next((qm['resposta'] for qm in (questoes_manuais or []) if qm['questao'].startswith("57)")), relatorio.get('acoes_para_reduzir_nips', ''))
+    story.append(Paragraph(f"57) [ACOMPANHAMENTO] A Ouvidoria tomou alguma ação para tentar reduzir a quantidade de NIPs? Se sim, descreva.: {resposta_q57}", styles['Normal']))
+
+    story.append(Paragraph(f"58) [ACOMPANHAMENTO] A Ouvidoria conhece o Índice de Desempenho da Saúde Suplementar (IDSS) da operadora e a pesquisa de satisfação junto ao consumidor que o integra?: {relatorio.get('conhece_idss_pesquisa_satisfacao', '')}", styles['Normal']))
+
+    resposta_q59 = next((qm['resposta'] for qm in (questoes_manuais or []) if qm['questao'].startswith("59)")), relatorio.get('sugestao_melhoria_documentos', ''))
+    story.append(Paragraph(f"59) [ACOMPANHAMENTO] A Ouvidoria fez alguma sugestão de melhoria com base nesses documentos? Se sim, descreva.: {resposta_q59}", styles['Normal']))
+
+    story.append(Spacer(1, 0.2*inch))
+    story.append(Paragraph(f"Este documento foi gerado automaticamente pelo sistema Protocolo Eletrônico em {datetime.now().strftime('%d/%m/%Y')}.", styles['Normal']))
+    doc.build(story)
+    if output is None:
+        return destino.getvalue()
+    return output
@@ -0,0 +1,250 @@
+import numpy as np
+import pandas as pd
+import business_days
+
+# ---------------------------------------------------
+# Kernel de agregação dos contadores do REA (questões 4 a 45)
+# ---------------------------------------------------
+# Cada dimensão é convertida em códigos inteiros (pd.factorize) e todas as
+# dimensões + a faixa de prazo são combinadas em uma única chave. Uma só
+# contagem sobre essa chave gera a tabela de combinações, da qual saem todos
+# os contadores e cruzamentos (tipo x tema, tipo x contrato, faixas de prazo)
+# sem varrer o DataFrame de novo para cada questão.
+
+DIMENSOES = [
+    'tipo_manifestacao',
+    'tema_manifestacao',
+    'forma_entrada_contato',
+    'atendimento_para',
+    'vinculo_beneficiario',
+]
+
+# Faixas de prazo de resposta (em dias úteis)
+FAIXA_SEM_RESPOSTA = 0
+FAIXA_PRAZO_INDEFINIDO = 1  # respondida, mas sem data de manifestação
+FAIXA_ATE_7 = 2
+FAIXA_ATE_30 = 3
+FAIXA_ACIMA_30 = 4
+FAIXAS_PRAZO = ['sem_resposta', 'prazo_indefinido', 'ate_7_dias', 'ate_30_dias', 'acima_30_dias']
+
+# Acima deste número de células a tabela é montada de forma esparsa (np.unique)
+MAX_DENSE_CELLS = 1_000_000
+
+# Posição de cada manifestação na ordem do feed. Nos contadores ranqueados, os
+# empates seguem a primeira ocorrência nessa ordem, como o value_counts sobre o
+# DataFrame original (antes da ordenação por data).
+COLUNA_POSICAO = 'posicao_feed'
+SEM_POSICAO = np.iinfo(np.int64).max
+
+
+def with_feed_position(df):
+    """
+    Acrescenta COLUNA_POSICAO com a ordem atual das linhas (a ordem do feed),
+    se ela ainda não existir. Deve ser chamada antes de ordenar por data.
+    """
+    if COLUNA_POSICAO in df.columns:
+        return df
+    return df.assign(**{COLUNA_POSICAO: np.arange(len(df), dtype=np.int64)})
+
+
+def feed_positions(df):
+    """
+    Posições das linhas na ordem do feed (a ordem das linhas, sem COLUNA_POSICAO).
+    """
+    if COLUNA_POSICAO in df.columns:
+        return df[COLUNA_POSICAO].to_numpy(dtype=np.int64)
+    return np.arange(len(df), dtype=np.int64)
+
+
+def rank_counts(valores, contagem, posicoes):
+    """
+    Converte contagens por código (posição 0 = ausente) no formato de
+    value_counts().to_dict(): ordem decrescente, empates pela menor posição no
+    feed (primeira ocorrência), sem ausentes e sem zeros.
+    """
+    contagem = np.asarray(contagem)[1:]
+    ordem = np.lexsort((np.asarray(posicoes)[1:], -contagem))
+    return {valores[i]: int(contagem[i]) for i in ordem if contagem[i] > 0}
+
+
+def classify_deadlines(dias_uteis, tem_resposta):
+    """
+    Classifica cada manifestação em uma faixa de prazo (FAIXA_*).
+    """
+    dias_uteis = np.asarray(dias_uteis, dtype=float)
+    tem_resposta = np.asarray(tem_resposta, dtype=bool)
+    faixas = np.full(len(dias_uteis), FAIXA_SEM_RESPOSTA, dtype=np.int64)
+    faixas[tem_resposta] = FAIXA_PRAZO_INDEFINIDO
+    calculavel = tem_resposta & ~np.isnan(dias_uteis)
+    faixas[calculavel & (dias_uteis <= 7)] = FAIXA_ATE_7
+    faixas[calculavel & (dias_uteis > 7) & (dias_uteis <= 30)] = FAIXA_ATE_30
+    faixas[calculavel & (dias_uteis > 30)] = FAIXA_ACIMA_30
+    return faixas
+
+
+def response_working_days(df):
+    """
+    Retorna (dias_uteis, tem_resposta) para cada linha do DataFrame já normalizado.
+    """
+    if 'data_resposta' not in df.columns:
+        return np.full(len(df), np.nan), np.zeros(len(df), dtype=bool)
+    tem_resposta = df['data_resposta'].notna().to_numpy()
+    if 'data_manifestacao' not in df.columns:
+        return np.full(len(df), np.nan), tem_resposta
+    return business_days.working_days_between(df['data_manifestacao'], df['data_resposta']), tem_resposta
+
+
+class AggregateTable:
+    """
+    Tabela de combinações (dimensões x faixa de prazo) com a quantidade de
+    manifestações, a soma de dias úteis de resposta e a menor posição no feed
+    em cada combinação.
+
+    O código 0 de cada dimensão representa valor ausente; o código k > 0
+    corresponde a uniques[dim][k - 1], na ordem da primeira ocorrência.
+    """
+
+    def __init__(self, uniques, coords, counts, dias_soma, posicoes=None):
+        self.uniques = uniques
+        self.coords = coords
+        self.counts = counts
+        self.dias_soma = dias_soma
+        self.posicoes = posicoes if posicoes is not None else np.arange(len(counts), dtype=np.int64)
+
+    @classmethod
+    def from_dataframe(cls, df, dias_uteis=None, tem_resposta=None):
+        if dias_uteis is None or tem_resposta is None:
+            dias_uteis, tem_resposta = response_working_days(df)
+        faixas = classify_deadlines(dias_uteis, tem_resposta)
+        uniques = {}
+        codigos = []
+        shape = []
+        for dim in DIMENSOES:
+            if dim in df.columns:
+                codes, valores = pd.factorize(df[dim])
+                uniques[dim] = list(valores)
+                codigos.append(codes.astype(np.int64) + 1)
+            else:
+                uniques[dim] = []
+                codigos.append(np.zeros(len(df), dtype=np.int64))
+            shape.append(len(uniques[dim]) + 1)
+        codigos.append(faixas)
+        shape.append(len(FAIXAS_PRAZO))
+        shape = tuple(shape)
+
+        chave = np.ravel_multi_index(codigos, shape) if len(df) else np.zeros(0, dtype=np.int64)
+        pesos = np.nan_to_num(np.asarray(dias_uteis, dtype=float))
+        posicoes_feed = feed_positions(df)
+        total_celulas = int(np.prod(shape))
+        if total_celulas <= MAX_DENSE_CELLS:
+            contagem = np.bincount(chave, minlength=total_celulas)
+            soma = np.bincount(chave, weights=pesos, minlength=total_celulas)
+            menor = np.full(total_celulas, SEM_POSICAO, dtype=np.int64)
+            np.minimum.at(menor, chave, posicoes_feed)
+            presentes = np.flatnonzero(contagem)
+            counts = contagem[presentes]
+            dias_soma = soma[presentes]
+            posicoes = menor[presentes]
+        else:
+            presentes, inverso, counts = np.unique(chave, return_inverse=True, return_counts=True)
+            dias_soma = np.bincount(inverso, weights=pesos, minlength=len(presentes))
+            posicoes = np.full(len(presentes), SEM_POSICAO, dtype=np.int64)
+            np.minimum.at(posicoes, inverso, posicoes_feed)
+        coords_lista = np.unravel_index(presentes, shape)
+        coords = dict(zip(DIMENSOES + ['faixa_prazo'], coords_lista))
+        return cls(uniques, coords, counts, dias_soma, posicoes)
+
+    def _mask(self, filtros):
+        mascara = np.ones(len(self.counts), dtype=bool)
+        for dim, valor in filtros.items():
+            if dim == 'faixa_prazo':
+                mascara &= np.isin(self.coords[dim], np.atleast_1d(valor))
+                continue
+            if valor not in self.uniques[dim]:
+                return np.zeros(len(self.counts), dtype=bool)
+            mascara &= self.coords[dim] == self.uniques[dim].index(valor) + 1
+        return mascara
+
+    def count(self, **filtros):
+        """
+        Quantidade de manifestações que satisfazem os filtros (dimensão=valor).
+        """
+        return int(self.counts[self._mask(filtros)].sum())
+
+    def sum_working_days(self, **filtros):
+        """
+        Soma dos dias úteis de resposta das manifestações que satisfazem os filtros.
+        """
+        return float(self.dias_soma[self._mask(filtros)].sum())
+
+    def value_counts(self, dim, **filtros):
+        """
+        Equivalente a df[filtro][dim].value_counts().to_dict() no DataFrame na
+        ordem do feed: contagem por valor, em ordem decrescente (empates na ordem
+        de primeira ocorrência no feed), sem ausentes.
+        """
+        if not self.uniques[dim]:
+            return {}
+        mascara = self._mask(filtros)
+        largura = len(self.uniques[dim]) + 1
+        contagem = np.bincount(self.coords[dim][mascara], weights=self.counts[mascara], minlength=largura)
+        posicoes = np.full(largura, SEM_POSICAO, dtype=np.int64)
+        np.minimum.at(posicoes, self.coords[dim][mascara], self.posicoes[mascara])
+        return rank_counts(self.uniques[dim], contagem, posicoes)
+
+    def crosstab(self, linhas, colunas):
+        """
+        Tabela cruzada entre duas dimensões (ex.: tipo x tema) como dict de dicts.
+        """
+        return {valor: self.value_counts(colunas, **{linhas: valor}) for valor in self.value_counts(linhas)}
+
+
+def deadline_indicators(tabela, **filtros):
+    """
+    Calcula TMRO, PRDP, PRDPP e PRFP a partir da tabela agregada.
+    """
+    total_com_resposta = tabela.count(faixa_prazo=[FAIXA_PRAZO_INDEFINIDO, FAIXA_ATE_7, FAIXA_ATE_30, FAIXA_ACIMA_30], **filtros)
+    if total_com_resposta == 0:
+        return {'tmro': 0, 'prdp': 0, 'prdpp': 0, 'prfp': 0}
+    calculaveis = tabela.count(faixa_prazo=[FAIXA_ATE_7, FAIXA_ATE_30, FAIXA_ACIMA_30], **filtros)
+    tmro = tabela.sum_working_days(**filtros) / calculaveis if calculaveis else 0
+    return {
+        'tmro': round(tmro, 2),
+        'prdp': round(tabela.count(faixa_prazo=FAIXA_ATE_7, **filtros) / total_com_resposta * 100, 2),
+        'prdpp': round(tabela.count(faixa_prazo=FAIXA_ATE_30, **filtros) / total_com_resposta * 100, 2),
+        'prfp': round(tabela.count(faixa_prazo=FAIXA_ACIMA_30, **filtros) / total_com_resposta * 100, 2),
+    }
+
+
+def compute_counters(tabela, tem_canal=True):
+    """
+    Monta os contadores do relatório (mesmas chaves usadas por process_data) a
+    partir da tabela agregada.
+    """
+    contadores = {}
+    quantitativo_reanalise = tabela.count(tipo_manifestacao='Reanálise')
+    contadores['quantitativo_reanalise'] = quantitativo_reanalise
+    contadores['recebeu_reanalise'] = "SIM" if quantitativo_reanalise > 0 else "NÃO"
+    quantitativo_proprias = tabela.count() if tem_canal else 0
+    contadores['quantitativo_manifestacoes_proprias'] = quantitativo_proprias
+    contadores['recebeu_manifestacao_propria'] = "SIM" if quantitativo_proprias > 0 else "NÃO"
+    contadores['quantitativo_canais'] = tabela.value_counts('forma_entrada_contato')
+    contadores['quantitativo_temas'] = tabela.value_counts('tema_manifestacao')
+    contadores['quantitativo_tipos'] = tabela.value_counts('tipo_manifestacao')
+    contadores['reclamacoes_por_tema'] = tabela.value_counts('tema_manifestacao', tipo_manifestacao='Reclamação')
+    reclamacoes_contrato = tabela.value_counts('atendimento_para', tipo_manifestacao='Reclamação')
+    contadores['reclamacoes_coletivo_adesao'] = reclamacoes_contrato.get('Coletivo adesão', 0)
+    contadores['reclamacoes_coletivo_empresarial'] = reclamacoes_contrato.get('Coletivo empresarial', 0)
+    contadores['reclamacoes_individual_familiar'] = reclamacoes_contrato.get('Individual/Familiar', 0)
+    contadores['reclamacoes_outros_contratos'] = 0
+    contadores['reclamacoes_beneficiario'] = reclamacoes_contrato.get('Beneficiário', 0)
+    contadores['reclamacoes_corretor'] = 0
+    contadores['reclamacoes_gestor'] = 0
+    contadores['reclamacoes_prestador'] = 0
+    contadores['reclamacoes_outros_demandantes'] = 0
+    contadores['quantitativo_vinculo_beneficiario'] = tabela.value_counts('vinculo_beneficiario')
+    contadores['tipo_por_tema'] = tabela.crosstab('tipo_manifestacao', 'tema_manifestacao')
+    contadores['tipo_por_contrato'] = tabela.crosstab('tipo_manifestacao', 'atendimento_para')
+    contadores['faixas_prazo'] = {FAIXAS_PRAZO[f]: tabela.count(faixa_prazo=f) for f in range(len(FAIXAS_PRAZO))}
+    contadores.update(deadline_indicators(tabela))
+    return contadores
@@ -0,0 +1,76 @@
+import threading
+from collections import OrderedDict
+
+# ---------------------------------------------------
+# Cache LRU em memória para resultados já calculados
+# ---------------------------------------------------
+
+
+class LRUCache:
+    """
+    Cache de tamanho limitado com descarte do item usado há mais tempo (LRU),
+    seguro para uso entre threads, com contadores de acertos e falhas.
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, chave, default=None):
+        with self._lock:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                self.hits += 1
+                return self._itens[chave]
+            self.misses += 1
+            return default
+
+    def put(self, chave, valor):
+        with self._lock:
+            self._itens[chave] = valor
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.maxsize:
+                self._itens.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, chave, calcular):
+        """
+        Retorna o valor em cache ou chama calcular() e guarda o resultado
+        (resultados None não são guardados).
+        """
+        sentinela = object()
+        valor = self.get(chave, sentinela)
+        if valor is not sentinela:
+            return valor
+        valor = calcular()
+        if valor is not None:
+            self.put(chave, valor)
+        return valor
+
+    def discard_if(self, condicao):
+        """
+        Remove as entradas cuja chave satisfaz condicao(chave).
+        """
+        with self._lock:
+            for chave in [c for c in self._itens if condicao(c)]:
+                del self._itens[chave]
+
+    def clear(self):
+        with self._lock:
+            self._itens.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._itens),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0,
+            }
@@ -0,0 +1,298 @@
+import threading
+import numpy as np
+import pandas as pd
+import business_days
+import report_kernel
+
+# ---------------------------------------------------
+# Rollups diários pré-agregados
+# ---------------------------------------------------
+# Para cada dia de manifestação guardamos as contagens por dimensão, os
+# cruzamentos usados no REA (tipo x tema, tipo x contrato), as faixas de prazo
+# e a soma dos dias úteis de resposta. Um intervalo de datas é respondido por
+# diferença de somas acumuladas, em O(dias), sem voltar às linhas brutas.
+# Para desempatar os contadores ranqueados como o value_counts original, cada
+# dia guarda também a menor posição no feed de cada valor (e de cada cruzamento).
+
+CRUZAMENTOS = [
+    ('tipo_manifestacao', 'tema_manifestacao'),
+    ('tipo_manifestacao', 'atendimento_para'),
+]
+
+
+def _menores(array, lo=None, hi=None):
+    """
+    Menor posição no feed de cada célula nos dias [lo, hi) (sem intervalo, em
+    todas as linhas, incluindo a de "sem data").
+    """
+    if lo is None:
+        return array.min(axis=0)
+    if hi <= lo:
+        return np.full(array.shape[1:], report_kernel.SEM_POSICAO, dtype=array.dtype)
+    return array[lo:hi].min(axis=0)
+
+
+def _grow(array, shape, offset=0, fill=0):
+    """
+    Retorna uma cópia de array ampliada para shape (novas células com fill),
+    deslocando o primeiro eixo em offset.
+    """
+    if array.shape == tuple(shape) and offset == 0:
+        return array
+    novo = np.full(shape, fill, dtype=array.dtype)
+    indices = (slice(offset, offset + array.shape[0]),) + tuple(slice(0, n) for n in array.shape[1:])
+    novo[indices] = array
+    return novo
+
+
+class DailyRollup:
+    """
+    Acumulador incremental de contagens por dia. add(df) soma as manifestações
+    de um DataFrame normalizado; add(df, weight=-1) as remove (útil para upsert).
+
+    Os arrays diários têm uma linha por dia a partir de first_day e uma linha
+    extra no final para manifestações sem data, que só entram em consultas
+    sem intervalo.
+
+    As menores posições no feed não são desfeitas por add(df, weight=-1): depois
+    de um delta elas são um limite inferior (exato enquanto o registro
+    substituído mantiver a posição, o dia e os valores, ver delta_sync.upsert).
+    """
+
+    def __init__(self):
+        self.uniques = {dim: [] for dim in report_kernel.DIMENSOES}
+        self.columns = set()
+        self.first_day = None
+        self.n_days = 0
+        self.dims = {dim: np.zeros((1, 1), dtype=np.int64) for dim in report_kernel.DIMENSOES}
+        self.cruzamentos = {par: np.zeros((1, 1, 1), dtype=np.int64) for par in CRUZAMENTOS}
+        self.faixas = np.zeros((1, len(report_kernel.FAIXAS_PRAZO)), dtype=np.int64)
+        self.dias_soma = np.zeros(1)
+        self.posicoes_dims = {dim: np.full((1, 1), report_kernel.SEM_POSICAO) for dim in report_kernel.DIMENSOES}
+        self.posicoes_cruzamentos = {par: np.full((1, 1, 1), report_kernel.SEM_POSICAO) for par in CRUZAMENTOS}
+        self._prefix = None
+        self._lock = threading.Lock()
+
+    def copy(self):
+        """
+        Cópia independente do rollup (os arrays diários são pequenos: dias x categorias).
+        """
+        with self._lock:
+            novo = DailyRollup()
+            novo.uniques = {dim: list(v) for dim, v in self.uniques.items()}
+            novo.columns = set(self.columns)
+            novo.first_day = self.first_day
+            novo.n_days = self.n_days
+            novo.dims = {dim: a.copy() for dim, a in self.dims.items()}
+            novo.cruzamentos = {par: a.copy() for par, a in self.cruzamentos.items()}
+            novo.faixas = self.faixas.copy()
+            novo.dias_soma = self.dias_soma.copy()
+            novo.posicoes_dims = {dim: a.copy() for dim, a in self.posicoes_dims.items()}
+            novo.posicoes_cruzamentos = {par: a.copy() for par, a in self.posicoes_cruzamentos.items()}
+            return novo
+
+    def has_column(self, coluna):
+        return coluna in self.columns
+
+    def _encode(self, df, dim):
+        if dim not in df.columns:
+            return np.zeros(len(df), dtype=np.int64)
+        coluna = df[dim]
+        conhecidos = set(self.uniques[dim])
+        self.uniques[dim].extend(v for v in pd.unique(coluna.dropna()) if v not in conhecidos)
+        return pd.Categorical(coluna, categories=self.uniques[dim]).codes.astype(np.int64) + 1
+
+    def _resize(self, first_day, n_days):
+        offset = int((self.first_day - first_day).astype(int)) if self.first_day is not None else 0
+        linhas = n_days + 1
+        # A linha de "sem data" fica sempre no final
+        def mover(array, fill=0):
+            sem_data = array[-1].copy()
+            datados = _grow(array[:-1], (linhas - 1,) + array.shape[1:], offset, fill)
+            return np.concatenate([datados, sem_data[np.newaxis]])
+        sem_posicao = report_kernel.SEM_POSICAO
+        for dim in report_kernel.DIMENSOES:
+            largura = len(self.uniques[dim]) + 1
+            self.dims[dim] = _grow(mover(self.dims[dim]), (linhas, largura))
+            self.posicoes_dims[dim] = _grow(mover(self.posicoes_dims[dim], sem_posicao), (linhas, largura), fill=sem_posicao)
+        for linha, coluna in CRUZAMENTOS:
+            forma = (linhas, len(self.uniques[linha]) + 1, len(self.uniques[coluna]) + 1)
+            self.cruzamentos[(linha, coluna)] = _grow(mover(self.cruzamentos[(linha, coluna)]), forma)
+            self.posicoes_cruzamentos[(linha, coluna)] = _grow(mover(self.posicoes_cruzamentos[(linha, coluna)], sem_posicao),
+                                                               forma, fill=sem_posicao)
+        self.faixas = mover(self.faixas)
+        self.dias_soma = mover(self.dias_soma)
+        self.first_day = first_day
+        self.n_days = n_days
+
+    def add(self, df, weight=1):
+        """
+        Acumula (weight=1) ou remove (weight=-1) as manifestações do DataFrame normalizado.
+        """
+        with self._lock:
+            self.columns.update(df.columns)
+            codigos = {dim: self._encode(df, dim) for dim in report_kernel.DIMENSOES}
+            dias_uteis, tem_resposta = report_kernel.response_working_days(df)
+            faixas = report_kernel.classify_deadlines(dias_uteis, tem_resposta)
+
+            if 'data_manifestacao' in df.columns:
+                dias = business_days.to_day_array(df['data_manifestacao'])
+            else:
+                dias = np.full(len(df), np.datetime64('NaT'), dtype='datetime64[D]')
+            datados = ~np.isnat(dias)
+            first_day, last_day = self.first_day, None
+            if self.first_day is not None:
+                last_day = self.first_day + np.timedelta64(self.n_days - 1, 'D')
+            if datados.any():
+                menor, maior = dias[datados].min(), dias[datados].max()
+                first_day = menor if first_day is None else min(first_day, menor)
+                last_day = maior if last_day is None else max(last_day, maior)
+            n_days = int((last_day - first_day).astype(int)) + 1 if first_day is not None else 0
+            self._resize(first_day, n_days)
+
+            linha = np.full(len(df), self.n_days, dtype=np.int64)
+            if datados.any():
+                linha[datados] = (dias[datados] - self.first_day).astype(np.int64)
+            linhas = self.n_days + 1
+
+            def acumular(indices, forma):
+                chave = np.ravel_multi_index(indices, forma)
+                return np.bincount(chave, minlength=int(np.prod(forma))).reshape(forma) * weight
+
+            for dim in report_kernel.DIMENSOES:
+                self.dims[dim] += acumular((linha, codigos[dim]), self.dims[dim].shape)
+            for par in CRUZAMENTOS:
+                self.cruzamentos[par] += acumular((linha, codigos[par[0]], codigos[par[1]]), self.cruzamentos[par].shape)
+            self.faixas += acumular((linha, faixas), self.faixas.shape)
+            self.dias_soma += np.bincount(linha, weights=np.nan_to_num(dias_uteis), minlength=linhas) * weight
+            if weight > 0:
+                posicoes = report_kernel.feed_positions(df)
+                for dim in report_kernel.DIMENSOES:
+                    np.minimum.at(self.posicoes_dims[dim], (linha, codigos[dim]), posicoes)
+                for par in CRUZAMENTOS:
+                    np.minimum.at(self.posicoes_cruzamentos[par], (linha, codigos[par[0]], codigos[par[1]]), posicoes)
+            self._prefix = None
+
+    def _prefix_sums(self):
+        """
+        Somas acumuladas (com uma linha de zeros no início) apenas dos dias datados.
+        """
+        if self._prefix is None:
+            def acumulada(array):
+                zeros = np.zeros((1,) + array.shape[1:], dtype=array.dtype)
+                return np.concatenate([zeros, np.cumsum(array[:-1], axis=0)])
+            self._prefix = {
+                'dims': {dim: acumulada(a) for dim, a in self.dims.items()},
+                'cruzamentos': {par: acumulada(a) for par, a in self.cruzamentos.items()},
+                'faixas': acumulada(self.faixas),
+                'dias_soma': acumulada(self.dias_soma),
+            }
+        return self._prefix
+
+    def query(self, start_date=None, end_date=None):
+        """
+        Retorna os contadores agregados das manifestações entre start_date e end_date
+        (dias inclusivos). Sem intervalo, inclui também as manifestações sem data.
+        """
+        with self._lock:
+            if not (start_date is not None and end_date is not None):
+                return RollupCounts(self.uniques,
+                                    {dim: a.sum(axis=0) for dim, a in self.dims.items()},
+                                    {par: a.sum(axis=0) for par, a in self.cruzamentos.items()},
+                                    self.faixas.sum(axis=0), float(self.dias_soma.sum()),
+                                    self._posicoes())
+            prefixo = self._prefix_sums()
+            if self.first_day is None:
+                lo = hi = 0
+            else:
+                inicio = np.datetime64(pd.Timestamp(start_date).date(), 'D')
+                fim = np.datetime64(pd.Timestamp(end_date).date(), 'D')
+                lo = int(np.clip((inicio - self.first_day).astype(int), 0, self.n_days))
+                hi = int(np.clip((fim - self.first_day).astype(int) + 1, lo, self.n_days))
+            return RollupCounts(self.uniques,
+                                {dim: p[hi] - p[lo] for dim, p in prefixo['dims'].items()},
+                                {par: p[hi] - p[lo] for par, p in prefixo['cruzamentos'].items()},
+                                prefixo['faixas'][hi] - prefixo['faixas'][lo],
+                                float(prefixo['dias_soma'][hi] - prefixo['dias_soma'][lo]),
+                                self._posicoes(lo, hi))
+
+    def _posicoes(self, lo=None, hi=None):
+        return ({dim: _menores(a, lo, hi) for dim, a in self.posicoes_dims.items()},
+                {par: _menores(a, lo, hi) for par, a in self.posicoes_cruzamentos.items()})
+
+    def query_periods(self, periodos):
+        """
+        Retorna uma lista de RollupCounts, um por (start_date, end_date) de
+        `periodos` (dias inclusivos). As somas acumuladas são lidas uma única vez
+        e todas as diferenças saem de uma só indexação por eixo de período.
+        """
+        with self._lock:
+            prefixo = self._prefix_sums()
+            if self.first_day is None or not periodos:
+                lo = hi = np.zeros(len(periodos), dtype=np.int64)
+            else:
+                inicios = np.array([np.datetime64(pd.Timestamp(s).date(), 'D') for s, _ in periodos])
+                fins = np.array([np.datetime64(pd.Timestamp(e).date(), 'D') for _, e in periodos])
+                lo = np.clip((inicios - self.first_day).astype(np.int64), 0, self.n_days)
+                hi = np.clip((fins - self.first_day).astype(np.int64) + 1, lo, self.n_days)
+            dims = {dim: p[hi] - p[lo] for dim, p in prefixo['dims'].items()}
+            cruzamentos = {par: p[hi] - p[lo] for par, p in prefixo['cruzamentos'].items()}
+            faixas = prefixo['faixas'][hi] - prefixo['faixas'][lo]
+            dias_soma = prefixo['dias_soma'][hi] - prefixo['dias_soma'][lo]
+            return [RollupCounts(self.uniques,
+                                 {dim: a[i] for dim, a in dims.items()},
+                                 {par: a[i] for par, a in cruzamentos.items()},
+                                 faixas[i], float(dias_soma[i]),
+                                 self._posicoes(int(lo[i]), int(hi[i])))
+                    for i in range(len(periodos))]
+
+
+class RollupCounts:
+    """
+    Contadores de um intervalo, com a mesma interface de consulta de
+    report_kernel.AggregateTable usada por compute_counters.
+    """
+
+    def __init__(self, uniques, dims, cruzamentos, faixas, dias_soma, posicoes):
+        self.uniques = {dim: list(v) for dim, v in uniques.items()}
+        self.dims = dims
+        self.cruzamentos = cruzamentos
+        self.faixas = faixas
+        self.dias_soma = dias_soma
+        # (menores posições no feed por dimensão, por cruzamento) no intervalo
+        self.posicoes_dims, self.posicoes_cruzamentos = posicoes
+
+    def _codigo(self, dim, valor):
+        return self.uniques[dim].index(valor) + 1 if valor in self.uniques[dim] else None
+
+    def count(self, **filtros):
+        if not filtros:
+            return int(self.faixas.sum())
+        if list(filtros) == ['faixa_prazo']:
+            return int(self.faixas[np.atleast_1d(filtros['faixa_prazo'])].sum())
+        if len(filtros) == 1:
+            dim, valor = next(iter(filtros.items()))
+            codigo = self._codigo(dim, valor)
+            return int(self.dims[dim][codigo]) if codigo else 0
+        raise ValueError(f"Combinação de filtros não suportada pelos rollups: {sorted(filtros)}")
+
+    def sum_working_days(self, **filtros):
+        if filtros:
+            raise ValueError("Os rollups guardam apenas a soma total de dias úteis por dia.")
+        return self.dias_soma
+
+    def value_counts(self, dim, **filtros):
+        if not filtros:
+            return report_kernel.rank_counts(self.uniques[dim], self.dims[dim], self.posicoes_dims[dim])
+        if len(filtros) == 1:
+            linha, valor = next(iter(filtros.items()))
+            if (linha, dim) in self.cruzamentos:
+                codigo = self._codigo(linha, valor)
+                if not codigo:
+                    return {}
+                return report_kernel.rank_counts(self.uniques[dim], self.cruzamentos[(linha, dim)][codigo],
+                                                 self.posicoes_cruzamentos[(linha, dim)][codigo])
+        raise ValueError(f"Combinação de filtros não suportada pelos rollups: {dim} por {sorted(filtros)}")
+
+    def crosstab(self, linhas, colunas):
+        return {valor: self.value_counts(colunas, **{linhas: valor}) for valor in self.value_counts(linhas)}
@@ -0,0 +1,187 @@
+"""
+Micro-benchmarks do pipeline do relatório sobre feeds sintéticos
+(ver gerar_dados_sinteticos.py). Mede tempo (perf_counter) e pico de memória
+alocada (tracemalloc) de cada etapa e grava os resultados em JSON, para
+comparar execuções.
+
+Importa app.py, que exige os assets já montados (python static_assets.py).
+
+Uso:
+    python scripts/benchmark.py --linhas 1000,100000 --repeticoes 3 --saida bench.json
+    python scripts/benchmark.py --linhas 100000 --comparar bench.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+import statistics
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+import gerar_dados_sinteticos
+import app
+import ingest
+import rollups
+import columnar_snapshot
+import time_index
+
+
+def medir(fn, repeticoes, memoria=True):
+    """
+    Executa fn() `repeticoes` vezes e retorna (tempos, pico_de_memória, último_resultado).
+    O pico de memória é medido em uma execução extra com tracemalloc, para não
+    distorcer os tempos.
+    """
+    tempos = []
+    resultado = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = fn()
+        tempos.append(time.perf_counter() - inicio)
+    pico = None
+    if memoria:
+        tracemalloc.start()
+        try:
+            fn()
+            pico = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return tempos, pico, resultado
+
+
+def casos(caminho, ano):
+    """
+    Lista (nome, função) das etapas medidas para o feed em `caminho`.
+    Os dados intermediários são preparados uma vez, fora das medições.
+    """
+    with open(caminho, 'rb') as f:
+        dados = json.loads(f.read())
+    df, _ = ingest.read_projected(caminho, app.COL_MAPPING,
+                                  categorical=columnar_snapshot.COLUNAS_CATEGORICAS,
+                                  dates=('data_manifestacao', 'data_resposta'))
+    # Mesmo formato do snapshot colunar usado pelo app: ordenado por data
+    df = time_index.sort_by_date(df)
+    inicio, fim = pd.Timestamp(f"{ano}-03-01"), pd.Timestamp(f"{ano}-05-31")
+    rollup = rollups.DailyRollup()
+    rollup.add(df)
+    relatorio = app.process_data(df)
+
+    def parse_json():
+        with open(caminho, 'rb') as f:
+            return json.loads(f.read())
+
+    return [
+        # Decodificação do corpo inteiro com json.loads, sem projeção de colunas
+        ('parse_json', parse_json),
+        ('ingest_read_projected', lambda: ingest.read_projected(
+            caminho, app.COL_MAPPING, categorical=columnar_snapshot.COLUNAS_CATEGORICAS,
+            dates=('data_manifestacao', 'data_resposta'))),
+        ('normalize_data', lambda: app.normalize_data(dados)),
+        ('process_data', lambda: app.process_data(df)),
+        ('process_data_periodo', lambda: app.process_data(df, inicio, fim)),
+        ('rollup_build', lambda: rollups.DailyRollup().add(df)),
+        ('rollup_query_periodo', lambda: app.build_relatorio(rollup.query(inicio, fim))),
+        ('build_chart_data', lambda: app.build_chart_data(relatorio)),
+        ('generate_pdf_report', lambda: app.generate_pdf_report(relatorio)),
+    ]
+
+
+def executar(linhas, repeticoes, ano, filtro=None, memoria=True):
+    resultados = []
+    with tempfile.TemporaryDirectory() as diretorio:
+        for n in linhas:
+            caminho = os.path.join(diretorio, f"feed-{n}.json")
+            tamanho = gerar_dados_sinteticos.escrever_feed(caminho, n, ano)
+            for nome, fn in casos(caminho, ano):
+                if filtro and filtro not in nome:
+                    continue
+                tempos, pico, _ = medir(fn, repeticoes, memoria)
+                resultado = {
+                    'caso': nome,
+                    'linhas': n,
+                    'bytes_feed': tamanho,
+                    'repeticoes': repeticoes,
+                    'tempos': [round(t, 6) for t in tempos],
+                    'min': round(min(tempos), 6),
+                    'mediana': round(statistics.median(tempos), 6),
+                    'pico_memoria_bytes': pico,
+                }
+                resultados.append(resultado)
+                memoria_txt = f"{pico / 1e6:9.1f} MB" if pico is not None else ""
+                print(f"{nome:24s} {n:>9d} linhas  mediana {resultado['mediana'] * 1000:10.2f} ms  {memoria_txt}")
+    return resultados
+
+
+def ambiente():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=RAIZ, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        'commit': commit or None,
+        'data': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+    }
+
+
+def comparar(atual, referencia, tolerancia):
+    """
+    Compara as medianas com as de um JSON anterior. Retorna a quantidade de
+    casos mais lentos que a tolerância (ex.: 0.2 = 20%).
+    """
+    anteriores = {(r['caso'], r['linhas']): r for r in referencia['resultados']}
+    regressoes = 0
+    for r in atual:
+        anterior = anteriores.get((r['caso'], r['linhas']))
+        if not anterior or not anterior['mediana']:
+            continue
+        razao = r['mediana'] / anterior['mediana']
+        marca = ''
+        if razao > 1 + tolerancia:
+            regressoes += 1
+            marca = '  << REGRESSÃO'
+        print(f"{r['caso']:24s} {r['linhas']:>9d} linhas  {anterior['mediana'] * 1000:10.2f} -> {r['mediana'] * 1000:10.2f} ms  ({razao:5.2f}x){marca}")
+    return regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks do pipeline do relatório REA.")
+    parser.add_argument('--linhas', default='1000,100000', help="tamanhos do feed separados por vírgula")
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--ano', type=int, default=2024)
+    parser.add_argument('--caso', help="executa apenas os casos cujo nome contém este texto")
+    parser.add_argument('--sem-memoria', action='store_true', help="não mede o pico de memória")
+    parser.add_argument('--saida', help="arquivo JSON com os resultados")
+    parser.add_argument('--comparar', help="JSON de uma execução anterior para comparação")
+    parser.add_argument('--tolerancia', type=float, default=0.2, help="aumento relativo aceito na comparação")
+    args = parser.parse_args(argv)
+
+    linhas = [int(n) for n in args.linhas.split(',') if n]
+    resultados = executar(linhas, args.repeticoes, args.ano, args.caso, memoria=not args.sem_memoria)
+    saida = {'ambiente': ambiente(), 'resultados': resultados}
+    if args.saida:
+        with open(args.saida, 'w') as f:
+            json.dump(saida, f, indent=2, ensure_ascii=False)
+    if args.comparar:
+        with open(args.comparar) as f:
+            referencia = json.load(f)
+        if comparar(resultados, referencia, args.tolerancia):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
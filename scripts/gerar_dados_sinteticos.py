@@ -0,0 +1,166 @@
+"""
+Gera um feed sintético de manifestações no mesmo formato do JSON do Ploomnes
+(mesmos nomes de campos de COL_MAPPING), para benchmarks e testes de carga.
+
+Uso:
+    python scripts/gerar_dados_sinteticos.py --linhas 100000 --ano 2024 --saida feed.json
+"""
+import os
+import sys
+import json
+import argparse
+import numpy as np
+import pandas as pd
+
+# Distribuições aproximadas das categorias observadas no feed real
+TIPOS = {
+    'Reclamação': 0.46,
+    'Consulta': 0.24,
+    'Elogio': 0.11,
+    'Sugestão': 0.08,
+    'Denúncia': 0.05,
+    'Reanálise': 0.06,
+}
+TEMAS = {
+    'Administrativo': 0.30,
+    'Cobertura assistencial': 0.28,
+    'Rede credenciada/referenciada': 0.18,
+    'Financeiro': 0.14,
+    'Serviço de Atendimento ao Cliente (SAC)': 0.10,
+}
+CANAIS = {
+    'E-mail': 0.38,
+    'Telefone': 0.30,
+    'Site': 0.17,
+    'Aplicativo ou Redes sociais da operadora': 0.08,
+    'Presencialmente': 0.05,
+    'Outros': 0.02,
+}
+ATENDIMENTO_PARA = {
+    'Coletivo empresarial': 0.52,
+    'Coletivo adesão': 0.23,
+    'Individual/Familiar': 0.15,
+    'Beneficiário': 0.10,
+}
+VINCULOS = {
+    'Titular': 0.58,
+    'Dependente': 0.34,
+    'Agregado': 0.05,
+    'Não se aplica': 0.03,
+}
+
+# Frações de registros sem resposta e sem data de manifestação
+FRACAO_SEM_RESPOSTA = 0.07
+FRACAO_SEM_DATA = 0.002
+BLOCO = 50_000
+
+CAMPO_TIPO = '*Tipo da Manifestação'
+CAMPO_TEMA = '*Tema da Manifestação'
+CAMPO_CANAL = '*Forma de Entrada do Contato'
+CAMPO_DATA = '*Data da manifestação'
+CAMPO_RESPOSTA = '*Data da Resposta'
+CAMPO_ATENDIMENTO = 'Atendimento para:'
+CAMPO_VINCULO = '* Vínculo com o  beneficiário referenciado'
+CAMPO_ID = 'Id'
+CAMPO_ATUALIZACAO = 'Data de atualização'
+
+
+def _escolher(rng, distribuicao, n):
+    valores = np.array(list(distribuicao), dtype=object)
+    pesos = np.array(list(distribuicao.values()), dtype=float)
+    return valores[rng.choice(len(valores), size=n, p=pesos / pesos.sum())]
+
+
+def _datas_manifestacao(rng, n, ano):
+    # Mais manifestações em dias úteis e no horário comercial
+    dias = pd.date_range(f"{ano}-01-01", f"{ano}-12-31", freq='D')
+    pesos = np.where(dias.dayofweek < 5, 1.0, 0.25)
+    dia = dias.values[rng.choice(len(dias), size=n, p=pesos / pesos.sum())]
+    segundos = rng.normal(13.5 * 3600, 2.5 * 3600, size=n).clip(7 * 3600, 20 * 3600).astype('int64')
+    return pd.DatetimeIndex(dia) + pd.to_timedelta(segundos, unit='s')
+
+
+def _datas_resposta(rng, manifestacao):
+    # Prazo em dias corridos com cauda longa: maioria em até uma semana
+    dias = np.round(rng.lognormal(mean=1.6, sigma=0.9, size=len(manifestacao))).astype('int64')
+    horas = rng.integers(1, 9, size=len(manifestacao))
+    return manifestacao + pd.to_timedelta(dias, unit='D') + pd.to_timedelta(horas, unit='h')
+
+
+def _formatar(datas, ausentes):
+    texto = np.asarray(datas.strftime('%Y-%m-%dT%H:%M:%S'), dtype=object)
+    texto[ausentes] = None
+    return texto
+
+
+def gerar_bloco(rng, n, ano, inicio_id=1):
+    """
+    Retorna uma lista de n registros (dicts) com os campos do feed do Ploomnes.
+    """
+    manifestacao = _datas_manifestacao(rng, n, ano)
+    resposta = _datas_resposta(rng, manifestacao)
+    sem_data = rng.random(n) < FRACAO_SEM_DATA
+    sem_resposta = rng.random(n) < FRACAO_SEM_RESPOSTA
+    # Última alteração do registro: a resposta, se houver, senão a abertura
+    atualizacao = resposta.where(~sem_resposta, manifestacao)
+    colunas = {
+        CAMPO_ID: np.arange(inicio_id, inicio_id + n),
+        'Protocolo': [f"{ano}{i:08d}" for i in range(inicio_id, inicio_id + n)],
+        CAMPO_TIPO: _escolher(rng, TIPOS, n),
+        CAMPO_TEMA: _escolher(rng, TEMAS, n),
+        CAMPO_CANAL: _escolher(rng, CANAIS, n),
+        CAMPO_DATA: _formatar(manifestacao, sem_data),
+        CAMPO_RESPOSTA: _formatar(resposta, sem_resposta | sem_data),
+        CAMPO_ATENDIMENTO: _escolher(rng, ATENDIMENTO_PARA, n),
+        CAMPO_VINCULO: _escolher(rng, VINCULOS, n),
+        CAMPO_ATUALIZACAO: _formatar(atualizacao, np.zeros(n, dtype=bool)),
+        # Campo de texto livre, descartado na normalização, mas presente no JSON
+        'Descrição': ['Manifestação registrada pelo beneficiário via canal de atendimento.'] * n,
+    }
+    nomes = list(colunas)
+    valores = [colunas[nome].tolist() if isinstance(colunas[nome], np.ndarray) else colunas[nome] for nome in nomes]
+    return [dict(zip(nomes, linha)) for linha in zip(*valores)]
+
+
+def gerar_registros(n, ano=2024, seed=0):
+    """
+    Retorna a lista completa de n registros (para volumes que cabem em memória).
+    """
+    rng = np.random.default_rng(seed)
+    registros = []
+    for inicio in range(0, n, BLOCO):
+        registros.extend(gerar_bloco(rng, min(BLOCO, n - inicio), ano, inicio_id=inicio + 1))
+    return registros
+
+
+def escrever_feed(caminho, n, ano=2024, seed=0):
+    """
+    Grava um feed JSON de n registros em blocos, sem montar a lista inteira em
+    memória (permite gerar milhões de linhas). Retorna o tamanho em bytes.
+    """
+    rng = np.random.default_rng(seed)
+    with open(caminho, 'w', encoding='utf-8') as f:
+        f.write('[')
+        for inicio in range(0, n, BLOCO):
+            bloco = gerar_bloco(rng, min(BLOCO, n - inicio), ano, inicio_id=inicio + 1)
+            texto = json.dumps(bloco, ensure_ascii=False)[1:-1]
+            if inicio and texto:
+                f.write(',')
+            f.write(texto)
+        f.write(']')
+    return os.path.getsize(caminho)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera um feed sintético de manifestações do Ploomnes.")
+    parser.add_argument('--linhas', type=int, default=100_000, help="quantidade de registros (1k a 5M)")
+    parser.add_argument('--ano', type=int, default=2024, help="ano das datas de manifestação")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--saida', default='feed_sintetico.json', help="arquivo JSON de saída")
+    args = parser.parse_args(argv)
+    tamanho = escrever_feed(args.saida, args.linhas, args.ano, args.seed)
+    print(f"{args.linhas} registros gravados em {args.saida} ({tamanho / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+"""
+Gera relatórios REA em PDF para vários períodos, pela linha de comando, sem
+passar pelas rotas do Flask nem pela sessão de login.
+
+O dataset (feed ao vivo ou arquivo local) é lido e agregado uma única vez: os
+contadores de todos os períodos saem do mesmo rollup diário (ver rollups.py),
+e os PDFs são montados em paralelo em um pool de processos, um arquivo por
+período. Ao final, mostra os tempos de cada relatório.
+
+Uso:
+    python scripts/gerar_relatorios.py --arquivo feed.json --ano 2024 --granularidade trimestre --saida relatorios/
+    python scripts/gerar_relatorios.py --url "$JSON_DATA_URL" --periodo 2024-01-01:2024-06-30 --periodo 2024-07-01:2024-12-31
+    python scripts/gerar_relatorios.py --arquivo manifestacoes.arrow --ano 2024 --questoes questoes.json --tempos tempos.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import pandas as pd
+import pyarrow.feather as feather
+import relatorio_rea
+import ingest
+import rollups
+import columnar_snapshot
+import http_client
+import report_kernel
+import time_index
+
+
+def baixar_feed(url, destino):
+    """
+    Baixa o feed JSON em streaming para `destino`, sem montá-lo em memória.
+    """
+    timeout = (http_client.HTTP_CONNECT_TIMEOUT, http_client.HTTP_READ_TIMEOUT)
+    with http_client.get(url, timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        with open(destino, 'wb') as f:
+            for bloco in response.iter_content(chunk_size=ingest.READ_SIZE):
+                f.write(bloco)
+
+
+def carregar_dataset(url=None, arquivo=None):
+    """
+    Retorna o DataFrame normalizado (mesmas colunas do app, ordenado por data) a
+    partir de um snapshot colunar (.arrow), de um feed JSON local ou da URL.
+    """
+    if arquivo and arquivo.endswith(columnar_snapshot.SNAPSHOT_SUFFIX):
+        df = feather.read_feather(arquivo, memory_map=True)
+        df.attrs = {}
+        return time_index.sort_by_date(df)
+    with tempfile.TemporaryDirectory() as diretorio:
+        if not arquivo:
+            arquivo = os.path.join(diretorio, "feed.json")
+            baixar_feed(url, arquivo)
+        df, faltando = ingest.read_projected(arquivo, relatorio_rea.COL_MAPPING,
+                                             categorical=columnar_snapshot.COLUNAS_CATEGORICAS,
+                                             dates=('data_manifestacao', 'data_resposta'))
+    if faltando:
+        print(f"Aviso: colunas ausentes no feed: {', '.join(faltando)}", file=sys.stderr)
+    return time_index.sort_by_date(report_kernel.with_feed_position(df))
+
+
+def ler_periodos(args):
+    """
+    Lista de (rótulo, início, fim) a partir de --periodo e/ou --ano/--granularidade.
+    """
+    periodos = []
+    for texto in args.periodo or []:
+        inicio, _, fim = texto.partition(':')
+        if not fim:
+            raise SystemExit(f"Período inválido: {texto!r} (use AAAA-MM-DD:AAAA-MM-DD).")
+        inicio, fim = pd.Timestamp(inicio), pd.Timestamp(fim)
+        periodos.append((f"{inicio.date()}_{fim.date()}", inicio, fim))
+    if args.ano:
+        if args.granularidade == 'ano':
+            inicio = pd.Timestamp(year=args.ano, month=1, day=1)
+            periodos.append((str(args.ano), inicio, pd.Timestamp(year=args.ano, month=12, day=31)))
+        else:
+            periodos.extend(time_index.period_bounds(args.ano, args.granularidade))
+    if not periodos:
+        raise SystemExit("Informe ao menos um --periodo ou --ano.")
+    return periodos
+
+
+def nome_arquivo(rotulo):
+    return f"relatorio_rea_{rotulo.replace('/', '-')}.pdf"
+
+
+def _iniciar_processo():
+    # O ReportLab é importado sob demanda por relatorio_rea; aqui cada processo
+    # do pool o carrega antes do primeiro PDF, para que o tempo medido seja só a montagem
+    import reportlab.platypus  # noqa: F401
+    import reportlab.lib.styles  # noqa: F401
+
+
+def renderizar(relatorio, questoes_manuais, caminho):
+    """
+    Executado no processo do pool: grava o PDF em `caminho` e retorna
+    (duração em segundos, tamanho em bytes).
+    """
+    inicio = time.perf_counter()
+    relatorio_rea.generate_pdf_report(relatorio, questoes_manuais, output=caminho)
+    return time.perf_counter() - inicio, os.path.getsize(caminho)
+
+
+def gerar(df, periodos, saida, questoes_manuais=None, processos=None):
+    """
+    Calcula os relatórios de todos os períodos em uma passada sobre o dataset e
+    monta os PDFs em paralelo. Retorna uma lista de dicts com os tempos.
+    """
+    os.makedirs(saida, exist_ok=True)
+    inicio = time.perf_counter()
+    rollup = rollups.DailyRollup()
+    rollup.add(df)
+    tempo_rollup = time.perf_counter() - inicio
+    tem_canal = rollup.has_column('forma_entrada_contato')
+
+    resultados = []
+    relatorios = []
+    for (rotulo, inicio_periodo, fim), contagens in zip(periodos, rollup.query_periods([(i, f) for _, i, f in periodos])):
+        inicio = time.perf_counter()
+        relatorio = relatorio_rea.build_relatorio(contagens, tem_canal=tem_canal)
+        relatorios.append(relatorio)
+        resultados.append({
+            'periodo': rotulo,
+            'inicio': inicio_periodo.date().isoformat(),
+            'fim': fim.date().isoformat(),
+            'manifestacoes': contagens.count(),
+            'arquivo': os.path.join(saida, nome_arquivo(rotulo)),
+            'calculo_s': time.perf_counter() - inicio,
+        })
+
+    processos = max(1, min(processos or os.cpu_count(), len(relatorios)))
+    with ProcessPoolExecutor(max_workers=processos, initializer=_iniciar_processo) as pool:
+        futuros = {pool.submit(renderizar, relatorio, questoes_manuais, r['arquivo']): r
+                   for relatorio, r in zip(relatorios, resultados)}
+        for futuro in as_completed(futuros):
+            resultado = futuros[futuro]
+            try:
+                resultado['pdf_s'], resultado['bytes'] = futuro.result()
+            except Exception as e:
+                resultado['erro'] = str(e)
+    return tempo_rollup, resultados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera relatórios REA em PDF para vários períodos.")
+    fonte = parser.add_mutually_exclusive_group()
+    fonte.add_argument('--url', default=os.environ.get("JSON_DATA_URL"), help="URL do feed JSON (padrão: JSON_DATA_URL)")
+    fonte.add_argument('--arquivo', help="feed JSON local ou snapshot colunar (.arrow)")
+    parser.add_argument('--periodo', action='append', help="AAAA-MM-DD:AAAA-MM-DD (pode repetir)")
+    parser.add_argument('--ano', type=int, help="gera os períodos do ano (ver --granularidade)")
+    parser.add_argument('--granularidade', choices=['ano', *time_index.GRANULARIDADES], default='ano')
+    parser.add_argument('--questoes', help="JSON com a lista de questões manuais ({'questao', 'resposta'})")
+    parser.add_argument('--saida', default='relatorios', help="diretório dos PDFs")
+    parser.add_argument('--processos', type=int, default=os.cpu_count(), help="processos do pool de PDFs")
+    parser.add_argument('--tempos', help="grava os tempos de cada relatório neste JSON")
+    args = parser.parse_args(argv)
+    if not (args.url or args.arquivo):
+        parser.error("informe --url (ou JSON_DATA_URL) ou --arquivo")
+
+    periodos = ler_periodos(args)
+    questoes_manuais = None
+    if args.questoes:
+        with open(args.questoes, encoding='utf-8') as f:
+            questoes_manuais = json.load(f)
+
+    inicio = time.perf_counter()
+    df = carregar_dataset(args.url, args.arquivo)
+    tempo_dataset = time.perf_counter() - inicio
+    print(f"Dataset: {len(df)} manifestações em {tempo_dataset:.2f} s")
+
+    inicio = time.perf_counter()
+    tempo_rollup, resultados = gerar(df, periodos, args.saida, questoes_manuais, args.processos)
+    tempo_total = time.perf_counter() - inicio
+    print(f"Agregação: {tempo_rollup * 1000:.1f} ms para {len(periodos)} períodos")
+    print(f"{'período':24s} {'manifestações':>13s} {'cálculo':>10s} {'PDF':>10s} {'tamanho':>10s}")
+    falhas = 0
+    for r in resultados:
+        if 'erro' in r:
+            falhas += 1
+            print(f"{r['periodo']:24s} {r['manifestacoes']:>13d}  ERRO: {r['erro']}")
+            continue
+        print(f"{r['periodo']:24s} {r['manifestacoes']:>13d} {r['calculo_s'] * 1000:8.1f}ms "
+              f"{r['pdf_s'] * 1000:8.1f}ms {r['bytes'] / 1e3:8.1f}kB")
+    print(f"{len(resultados) - falhas} PDFs em {args.saida} ({tempo_total:.2f} s de agregação e montagem)")
+
+    if args.tempos:
+        with open(args.tempos, 'w') as f:
+            json.dump({'dataset_s': tempo_dataset, 'rollup_s': tempo_rollup, 'total_s': tempo_total,
+                       'relatorios': resultados}, f, indent=2, ensure_ascii=False)
+    return 1 if falhas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
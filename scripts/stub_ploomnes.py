@@ -0,0 +1,238 @@
+"""
+Servidor HTTP local que substitui o feed do Ploomnes (JSON_DATA_URL) e o
+webhook do Google Chat (GOOGLE_CHAT_WEBHOOK_URL) em testes de carga.
+
+    GET  /feed       feed sintético (gerar_dados_sinteticos.py), com ETag/304
+    GET  /registros  o mesmo feed paginado (pagina, tamanho_pagina), com filtros
+                     atualizado_desde / id_maior_que e o total em X-Total-Count,
+                     para a sincronização incremental (delta_sync.py)
+    POST /alterar    altera registros existentes e cria novos (novos, alterados)
+    POST /webhook    aceita alertas e apenas os conta
+    GET  /stats      contadores de requisições do stub
+
+Latência e taxa de falhas (respostas 503, ou outro status com --status-falha)
+são configuráveis para cada rota.
+
+Uso:
+    python scripts/stub_ploomnes.py --linhas 200000 --porta 8089 --latencia-feed 0.5 --falhas-feed 0.1
+"""
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+from datetime import datetime, timedelta
+import tempfile
+import threading
+from urllib.parse import urlsplit, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+import gerar_dados_sinteticos
+
+
+class StubConfig:
+    def __init__(self, caminho_feed, latencia_feed=0.0, falhas_feed=0.0, latencia_webhook=0.0, falhas_webhook=0.0,
+                 informar_total=True, status_falha=503):
+        self.caminho_feed = caminho_feed
+        self.latencia_feed = latencia_feed
+        self.falhas_feed = falhas_feed
+        self.latencia_webhook = latencia_webhook
+        self.falhas_webhook = falhas_webhook
+        self.informar_total = informar_total
+        self.status_falha = status_falha
+        self.etag = None
+        self._registros = None
+        self.contadores = {'feed': 0, 'feed_304': 0, 'feed_falhas': 0, 'webhook': 0, 'webhook_falhas': 0,
+                           'paginas': 0, 'alteracoes': 0}
+        self.lock = threading.Lock()
+        self.atualizar_etag()
+
+    def atualizar_etag(self):
+        digest = hashlib.sha256()
+        with open(self.caminho_feed, 'rb') as f:
+            for bloco in iter(lambda: f.read(1 << 20), b''):
+                digest.update(bloco)
+        self.etag = f'"{digest.hexdigest()[:32]}"'
+
+    def contar(self, chave):
+        with self.lock:
+            self.contadores[chave] += 1
+
+    def registros(self):
+        # O feed só é decodificado em memória se a rota paginada for usada
+        with self.lock:
+            if self._registros is None:
+                with open(self.caminho_feed, 'rb') as f:
+                    self._registros = json.load(f)
+            return self._registros
+
+    def paginar(self, consulta):
+        """
+        Retorna (registros da página, total de registros após os filtros).
+        """
+        registros = self.registros()
+        desde = consulta.get('atualizado_desde')
+        id_minimo = consulta.get('id_maior_que')
+        with self.lock:
+            if desde:
+                registros = [r for r in registros if (r.get(gerar_dados_sinteticos.CAMPO_ATUALIZACAO) or '') >= desde]
+            elif id_minimo:
+                registros = [r for r in registros if r[gerar_dados_sinteticos.CAMPO_ID] > int(id_minimo)]
+            tamanho = int(consulta.get('tamanho_pagina') or 1000)
+            inicio = (int(consulta.get('pagina') or 1) - 1) * tamanho
+            return registros[inicio:inicio + tamanho], len(registros)
+
+    def alterar(self, novos=0, alterados=0, ano=2024, seed=None):
+        """
+        Simula atividade no Ploomnes: `alterados` registros existentes recebem
+        nova resposta e `novos` registros são criados, todos com data de
+        atualização posterior a qualquer uma já existente.
+        """
+        registros = self.registros()
+        rng = np.random.default_rng(seed)
+        campo = gerar_dados_sinteticos.CAMPO_ATUALIZACAO
+        with self.lock:
+            ultima = max(r[campo] for r in registros)
+            agora = (datetime.fromisoformat(ultima) + timedelta(minutes=1)).strftime('%Y-%m-%dT%H:%M:%S')
+            for i in rng.choice(len(registros), size=min(alterados, len(registros)), replace=False):
+                registros[i] = dict(registros[i], **{gerar_dados_sinteticos.CAMPO_RESPOSTA: agora, campo: agora})
+            proximo_id = max(r[gerar_dados_sinteticos.CAMPO_ID] for r in registros) + 1
+            for registro in gerar_dados_sinteticos.gerar_bloco(rng, novos, ano, inicio_id=proximo_id) if novos else []:
+                registro[campo] = agora
+                registros.append(registro)
+            self.contadores['alteracoes'] += 1
+
+
+def criar_handler(config):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def _responder(self, status, corpo=b'', tipo='application/json', cabecalhos=None):
+            self.send_response(status)
+            self.send_header('Content-Type', tipo)
+            self.send_header('Content-Length', str(len(corpo)))
+            for nome, valor in (cabecalhos or {}).items():
+                self.send_header(nome, valor)
+            self.end_headers()
+            if corpo:
+                self.wfile.write(corpo)
+
+        def _falhar(self, latencia, taxa, chave):
+            if latencia:
+                time.sleep(latencia)
+            if random.random() < taxa:
+                config.contar(chave)
+                self._responder(config.status_falha, b'{"erro": "falha simulada"}')
+                return True
+            return False
+
+        def do_GET(self):
+            if self.path.startswith('/stats'):
+                with config.lock:
+                    corpo = json.dumps(config.contadores).encode('utf-8')
+                return self._responder(200, corpo)
+            if self.path.startswith('/registros'):
+                return self._responder_pagina()
+            if not self.path.startswith('/feed'):
+                return self._responder(404)
+            config.contar('feed')
+            if self._falhar(config.latencia_feed, config.falhas_feed, 'feed_falhas'):
+                return
+            if self.headers.get('If-None-Match') == config.etag:
+                config.contar('feed_304')
+                return self._responder(304, cabecalhos={'ETag': config.etag})
+            tamanho = os.path.getsize(config.caminho_feed)
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(tamanho))
+            self.send_header('ETag', config.etag)
+            self.end_headers()
+            with open(config.caminho_feed, 'rb') as f:
+                for bloco in iter(lambda: f.read(1 << 20), b''):
+                    self.wfile.write(bloco)
+
+        def _responder_pagina(self):
+            config.contar('paginas')
+            if self._falhar(config.latencia_feed, config.falhas_feed, 'feed_falhas'):
+                return
+            consulta = {k: v[-1] for k, v in parse_qs(urlsplit(self.path).query).items()}
+            pagina, total = config.paginar(consulta)
+            cabecalhos = {'X-Total-Count': str(total)} if config.informar_total else {}
+            self._responder(200, json.dumps(pagina, ensure_ascii=False).encode('utf-8'), cabecalhos=cabecalhos)
+
+        def do_POST(self):
+            tamanho = int(self.headers.get('Content-Length') or 0)
+            self.rfile.read(tamanho)
+            if self.path.startswith('/alterar'):
+                consulta = {k: int(v[-1]) for k, v in parse_qs(urlsplit(self.path).query).items()}
+                config.alterar(consulta.get('novos', 0), consulta.get('alterados', 0))
+                return self._responder(200, b'{}')
+            if not self.path.startswith('/webhook'):
+                return self._responder(404)
+            config.contar('webhook')
+            if self._falhar(config.latencia_webhook, config.falhas_webhook, 'webhook_falhas'):
+                return
+            self._responder(200, b'{}')
+
+    return StubHandler
+
+
+def iniciar(linhas=10_000, porta=0, ano=2024, latencia_feed=0.0, falhas_feed=0.0,
+            latencia_webhook=0.0, falhas_webhook=0.0, caminho_feed=None, informar_total=True, status_falha=503):
+    """
+    Gera o feed (se caminho_feed não for informado) e inicia o stub em uma thread.
+    Retorna (servidor, url_base); encerre com servidor.shutdown().
+    """
+    if caminho_feed is None:
+        fd, caminho_feed = tempfile.mkstemp(prefix="stub-feed-", suffix=".json")
+        os.close(fd)
+        gerar_dados_sinteticos.escrever_feed(caminho_feed, linhas, ano)
+    config = StubConfig(caminho_feed, latencia_feed, falhas_feed, latencia_webhook, falhas_webhook, informar_total,
+                        status_falha)
+    servidor = ThreadingHTTPServer(('127.0.0.1', porta), criar_handler(config))
+    servidor.daemon_threads = True
+    servidor.config = config
+    threading.Thread(target=servidor.serve_forever, name="stub-ploomnes", daemon=True).start()
+    return servidor, f"http://127.0.0.1:{servidor.server_port}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stub local do feed do Ploomnes e do webhook do Google Chat.")
+    parser.add_argument('--linhas', type=int, default=10_000)
+    parser.add_argument('--ano', type=int, default=2024)
+    parser.add_argument('--feed', help="serve este arquivo JSON em vez de gerar um feed sintético")
+    parser.add_argument('--porta', type=int, default=8089)
+    parser.add_argument('--latencia-feed', type=float, default=0.0, help="segundos antes de responder o feed")
+    parser.add_argument('--falhas-feed', type=float, default=0.0, help="fração de respostas com falha no feed")
+    parser.add_argument('--latencia-webhook', type=float, default=0.0)
+    parser.add_argument('--falhas-webhook', type=float, default=0.0)
+    parser.add_argument('--status-falha', type=int, default=503, help="status das falhas simuladas (ex.: 429)")
+    parser.add_argument('--sem-total', action='store_true', help="não informa X-Total-Count na rota paginada")
+    args = parser.parse_args(argv)
+    servidor, url = iniciar(args.linhas, args.porta, args.ano, args.latencia_feed, args.falhas_feed,
+                            args.latencia_webhook, args.falhas_webhook, caminho_feed=args.feed,
+                            informar_total=not args.sem_total, status_falha=args.status_falha)
+    print(f"JSON_DATA_URL={url}/feed")
+    print(f"JSON_DATA_URL={url}/registros  (com DATA_SYNC_MODE=incremental)")
+    print(f"GOOGLE_CHAT_WEBHOOK_URL={url}/webhook")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        servidor.shutdown()
+        if not args.feed:
+            os.remove(servidor.config.caminho_feed)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
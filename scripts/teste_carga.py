@@ -0,0 +1,237 @@
+"""
+Teste de carga ponta a ponta do app Flask.
+
+Usuários virtuais fazem login, abrem o /dashboard com períodos variados (e a
+chamada a /api/relatorio que a página dispara) e baixam o PDF por
+/download-pdf. Ao final, mostra vazão e latências p50/p95/p99 por rota.
+
+Contra um servidor já em execução:
+    python scripts/teste_carga.py --url http://127.0.0.1:5000 --usuarios 20 --duracao 60
+
+Subindo o gunicorn para cada configuração de workers, com o stub do Ploomnes
+(stub_ploomnes.py) no lugar do feed e do webhook:
+    python scripts/teste_carga.py --gunicorn "-w 1" --gunicorn "-w 4" --gunicorn "-w 2 --threads 4" \\
+        --linhas 100000 --usuarios 20 --duracao 60 --saida carga.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import shlex
+import socket
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+from datetime import date, timedelta
+import numpy as np
+import requests
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import stub_ploomnes
+
+# Peso de cada ação de um usuário virtual
+ACOES = {'dashboard': 0.8, 'pdf': 0.2}
+
+
+def periodo_aleatorio(rng, ano):
+    """
+    Sorteia um período: ano inteiro, trimestre, mês ou intervalo qualquer.
+    """
+    tipo = rng.choice(['ano', 'trimestre', 'mes', 'livre'])
+    if tipo == 'ano':
+        return date(ano, 1, 1), date(ano, 12, 31)
+    if tipo == 'trimestre':
+        inicio = date(ano, 3 * rng.randrange(4) + 1, 1)
+    elif tipo == 'mes':
+        inicio = date(ano, rng.randrange(1, 13), 1)
+    else:
+        inicio = date(ano, 1, 1) + timedelta(days=rng.randrange(300))
+        return inicio, inicio + timedelta(days=rng.randrange(7, 60))
+    meses = 3 if tipo == 'trimestre' else 1
+    proximo = date(inicio.year + (inicio.month + meses - 1) // 12, (inicio.month + meses - 1) % 12 + 1, 1)
+    return inicio, proximo - timedelta(days=1)
+
+
+class Coletor:
+    def __init__(self):
+        self.amostras = []
+        self.lock = threading.Lock()
+
+    def registrar(self, rota, inicio, status):
+        duracao = time.perf_counter() - inicio
+        with self.lock:
+            self.amostras.append((rota, duracao, status))
+
+    def resumo(self, duracao_total):
+        rotas = {}
+        for rota in sorted({a[0] for a in self.amostras}):
+            latencias = np.array([a[1] for a in self.amostras if a[0] == rota])
+            erros = sum(1 for a in self.amostras if a[0] == rota and (a[2] is None or a[2] >= 400))
+            p50, p95, p99 = np.percentile(latencias, [50, 95, 99])
+            rotas[rota] = {
+                'requisicoes': int(len(latencias)),
+                'erros': erros,
+                'vazao_rps': round(len(latencias) / duracao_total, 2),
+                'p50_ms': round(p50 * 1000, 1),
+                'p95_ms': round(p95 * 1000, 1),
+                'p99_ms': round(p99 * 1000, 1),
+                'max_ms': round(latencias.max() * 1000, 1),
+            }
+        return rotas
+
+
+def _requisitar(coletor, rota, fn):
+    inicio = time.perf_counter()
+    try:
+        response = fn()
+        # Consome o corpo inteiro para medir a resposta completa
+        response.content
+        coletor.registrar(rota, inicio, response.status_code)
+        return response
+    except requests.exceptions.RequestException:
+        coletor.registrar(rota, inicio, None)
+        return None
+
+
+def usuario_virtual(url, usuario, senha, ano, fim, coletor, seed):
+    rng = random.Random(seed)
+    sessao = requests.Session()
+    _requisitar(coletor, '/login', lambda: sessao.post(f"{url}/login", data={'username': usuario, 'password': senha},
+                                                         allow_redirects=False, timeout=60))
+    acoes, pesos = list(ACOES), list(ACOES.values())
+    while time.monotonic() < fim:
+        inicio, termino = periodo_aleatorio(rng, ano)
+        params = {'start_date': inicio.isoformat(), 'end_date': termino.isoformat()}
+        if rng.choices(acoes, pesos)[0] == 'dashboard':
+            _requisitar(coletor, '/dashboard', lambda: sessao.get(f"{url}/dashboard", params=params, timeout=60))
+            _requisitar(coletor, '/api/relatorio', lambda: sessao.get(f"{url}/api/relatorio", params=params, timeout=60))
+        else:
+            dados = dict(params, modo='sincrono', questoes_manuais='[]')
+            _requisitar(coletor, '/download-pdf', lambda: sessao.post(f"{url}/download-pdf", data=dados, timeout=120))
+
+
+def executar_carga(url, usuarios, duracao, usuario, senha, ano, seed=0):
+    coletor = Coletor()
+    fim = time.monotonic() + duracao
+    inicio = time.monotonic()
+    threads = [threading.Thread(target=usuario_virtual, args=(url, usuario, senha, ano, fim, coletor, seed + i))
+               for i in range(usuarios)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return coletor.resumo(time.monotonic() - inicio)
+
+
+def _porta_livre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _aguardar(url, processo, timeout=120):
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        if processo.poll() is not None:
+            raise RuntimeError(f"gunicorn encerrou com código {processo.returncode}")
+        try:
+            requests.get(f"{url}/login", timeout=2)
+            return
+        except requests.exceptions.RequestException:
+            time.sleep(0.2)
+    raise RuntimeError("gunicorn não respondeu a tempo")
+
+
+def com_gunicorn(config, url_stub, args):
+    """
+    Sobe o gunicorn com a configuração informada (cache e métricas em diretórios
+    novos), roda a carga e encerra o servidor.
+    """
+    porta = _porta_livre()
+    with tempfile.TemporaryDirectory() as diretorio:
+        env = dict(os.environ,
+                   JSON_DATA_URL=f"{url_stub}/feed",
+                   GOOGLE_CHAT_WEBHOOK_URL=f"{url_stub}/webhook",
+                   APP_USERNAME=args.usuario,
+                   APP_PASSWORD=args.senha,
+                   DATA_CACHE_DIR=os.path.join(diretorio, 'cache'),
+                   METRICS_DIR=os.path.join(diretorio, 'metrics'))
+        comando = ['gunicorn', *shlex.split(config), '--bind', f"127.0.0.1:{porta}", 'app:app']
+        processo = subprocess.Popen(comando, cwd=RAIZ, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            url = f"http://127.0.0.1:{porta}"
+            _aguardar(url, processo)
+            return executar_carga(url, args.usuarios, args.duracao, args.usuario, args.senha, args.ano)
+        finally:
+            processo.terminate()
+            processo.wait(timeout=30)
+
+
+def imprimir(config, rotas):
+    print(f"\n== {config}")
+    print(f"{'rota':16s} {'req':>6s} {'erros':>6s} {'req/s':>8s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s}")
+    for rota, r in rotas.items():
+        print(f"{rota:16s} {r['requisicoes']:6d} {r['erros']:6d} {r['vazao_rps']:8.2f} "
+              f"{r['p50_ms']:9.1f} {r['p95_ms']:9.1f} {r['p99_ms']:9.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Teste de carga do app REA.")
+    parser.add_argument('--url', help="servidor já em execução (em vez de --gunicorn)")
+    parser.add_argument('--gunicorn', action='append', default=[],
+                        help="opções do gunicorn de uma configuração (pode repetir)")
+    parser.add_argument('--usuarios', type=int, default=10, help="usuários virtuais simultâneos")
+    parser.add_argument('--duracao', type=float, default=30, help="segundos de carga por configuração")
+    parser.add_argument('--ano', type=int, default=2024)
+    parser.add_argument('--usuario', default=os.environ.get('APP_USERNAME', 'carga'))
+    parser.add_argument('--senha', default=os.environ.get('APP_PASSWORD', 'carga'))
+    parser.add_argument('--linhas', type=int, default=50_000, help="tamanho do feed do stub")
+    parser.add_argument('--latencia-feed', type=float, default=0.0)
+    parser.add_argument('--falhas-feed', type=float, default=0.0)
+    parser.add_argument('--latencia-webhook', type=float, default=0.0)
+    parser.add_argument('--falhas-webhook', type=float, default=0.0)
+    parser.add_argument('--saida', help="arquivo JSON com os resultados")
+    args = parser.parse_args(argv)
+
+    if not args.url and not args.gunicorn:
+        parser.error("informe --url ou ao menos um --gunicorn")
+
+    resultados = []
+    if args.url:
+        rotas = executar_carga(args.url.rstrip('/'), args.usuarios, args.duracao, args.usuario, args.senha, args.ano)
+        imprimir(args.url, rotas)
+        resultados.append({'configuracao': args.url, 'rotas': rotas})
+    if args.gunicorn:
+        servidor, url_stub = stub_ploomnes.iniciar(args.linhas, ano=args.ano,
+                                                   latencia_feed=args.latencia_feed, falhas_feed=args.falhas_feed,
+                                                   latencia_webhook=args.latencia_webhook,
+                                                   falhas_webhook=args.falhas_webhook)
+        try:
+            for config in args.gunicorn:
+                rotas = com_gunicorn(config, url_stub, args)
+                imprimir(config, rotas)
+                resultados.append({'configuracao': config, 'rotas': rotas})
+            with servidor.config.lock:
+                stub = dict(servidor.config.contadores)
+        finally:
+            servidor.shutdown()
+            os.remove(servidor.config.caminho_feed)
+        print(f"\nstub: {stub}")
+
+    if args.saida:
+        with open(args.saida, 'w') as f:
+            json.dump({
+                'parametros': {'usuarios': args.usuarios, 'duracao': args.duracao, 'linhas': args.linhas,
+                               'cpus': os.cpu_count(), 'python': platform.python_version()},
+                'resultados': resultados,
+            }, f, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
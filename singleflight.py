@@ -0,0 +1,88 @@
+import os
+import fcntl
+import threading
+from contextlib import contextmanager
+
+# ---------------------------------------------------
+# Coalescência de requisições concorrentes (single-flight)
+# ---------------------------------------------------
+# Chamadas concorrentes com a mesma chave esperam por uma única execução em
+# andamento e compartilham o resultado (ou a exceção) dela.
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Garante que, dentro do processo, apenas uma thread execute fn() por chave
+    de cada vez; as demais aguardam e recebem o mesmo resultado.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.deduplicated = 0
+        self.deduplicated_cross_worker = 0
+
+    def do(self, chave, fn):
+        with self._lock:
+            call = self._calls.get(chave)
+            if call is not None:
+                self.deduplicated += 1
+                lider = False
+            else:
+                call = _Call()
+                self._calls[chave] = call
+                self.executions += 1
+                lider = True
+        if not lider:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[chave]
+            call.done.set()
+
+    def record_cross_worker(self):
+        """
+        Registra uma execução evitada porque outro worker já havia feito o trabalho.
+        """
+        with self._lock:
+            self.deduplicated_cross_worker += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'executions': self.executions,
+                'deduplicated': self.deduplicated,
+                'deduplicated_cross_worker': self.deduplicated_cross_worker,
+                'in_flight': len(self._calls),
+            }
+
+
+@contextmanager
+def file_lock(caminho):
+    """
+    Lock exclusivo entre processos (workers do gunicorn) baseado em arquivo local.
+    """
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    with open(caminho, 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
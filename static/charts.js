@@ -0,0 +1,180 @@
+// Modelos estáticos dos gráficos do dashboard.
+// O servidor envia apenas rótulos e quantidades; o layout de cada gráfico fica
+// aqui (arquivo estático, cacheável) e é combinado com os dados no navegador.
+(function () {
+    const paletaCores = ["#59BEAF", "#467090", "#96E5E5", "#167F7F", '#931C76', '#9B182C'];
+
+    // Partes do template padrão "plotly" do plotly.py usadas pelos gráficos
+    const layoutBase = {
+        autosize: true,
+        margin: { l: 40, r: 40, t: 40, b: 40 },
+        paper_bgcolor: '#e0e5ec',
+        plot_bgcolor: '#e0e5ec',
+        font: { color: '#2a3f5f' },
+        hovermode: 'closest',
+        hoverlabel: { align: 'left' },
+        title: { x: 0.05 }
+    };
+
+    const eixoBase = {
+        gridcolor: 'white',
+        linecolor: 'white',
+        zerolinecolor: 'white',
+        zerolinewidth: 2,
+        ticks: '',
+        automargin: true,
+        tickfont: { size: 17 },
+        title: { text: '', font: { size: 17 } }
+    };
+
+    function modeloPizza(titulo) {
+        return {
+            trace: {
+                type: 'pie',
+                textinfo: 'percent',
+                textposition: 'inside',
+                marker: { line: { width: 1, color: 'black' } },
+                textfont: { size: 17 },
+                hovertemplate: "<b>%{label}</b><br>Quantidade: %{value}<br>Percentual: %{percent}<extra></extra>",
+                showlegend: true
+            },
+            layout: Object.assign({}, layoutBase, {
+                title: { text: titulo, x: 0.05 },
+                piecolorway: paletaCores,
+                legend: {
+                    orientation: 'v',
+                    yanchor: 'middle',
+                    y: 0.5,
+                    xanchor: 'left',
+                    x: -0.2,
+                    title: { text: '' },
+                    font: { size: 17 },
+                    tracegroupgap: 0
+                }
+            })
+        };
+    }
+
+    function modeloBarras(titulo, eixoX) {
+        return {
+            trace: {
+                type: 'bar',
+                orientation: 'v',
+                textposition: 'outside',
+                textfont: { size: 17 },
+                marker: { color: '#467090' },
+                hovertemplate: eixoX + "=%{x}<br>Quantidade=%{y}<br>text=%{text}<extra></extra>",
+                showlegend: false
+            },
+            layout: Object.assign({}, layoutBase, {
+                title: { text: titulo, x: 0.05 },
+                barmode: 'relative',
+                legend: { tracegroupgap: 0 },
+                xaxis: Object.assign({}, eixoBase),
+                yaxis: Object.assign({}, eixoBase, { showticklabels: false })
+            })
+        };
+    }
+
+    const modelos = {
+        tipos: modeloPizza('Distribuição por Tipo de Manifestação'),
+        canais: modeloPizza('Distribuição por Canal de Entrada'),
+        temas: modeloBarras('Quantidade por Tema de Manifestação', 'Tema'),
+        vinculo: modeloBarras('Quantidade por Vínculo do Beneficiário', 'Vínculo')
+    };
+
+    function montarTrace(modelo, dados) {
+        const trace = Object.assign({}, modelo.trace);
+        if (trace.type === 'pie') {
+            trace.labels = dados.labels;
+            trace.values = dados.values;
+        } else {
+            trace.x = dados.labels;
+            trace.y = dados.values;
+            trace.text = dados.values;
+        }
+        return trace;
+    }
+
+    // Desenha cada gráfico no elemento com id "grafico-<nome>"
+    window.renderizarGraficos = function (graficos) {
+        Object.keys(modelos).forEach(function (nome) {
+            const elemento = document.getElementById('grafico-' + nome);
+            if (!elemento || !graficos[nome]) {
+                return;
+            }
+            const modelo = modelos[nome];
+            Plotly.react(elemento, [montarTrace(modelo, graficos[nome])], modelo.layout, { responsive: true });
+        });
+    };
+
+    // Modo de tendência: uma série por indicador ao longo dos períodos do ano (mês, trimestre, semana ou dia)
+    function layoutTendencia(titulo, sufixo) {
+        return Object.assign({}, layoutBase, {
+            title: { text: titulo, x: 0.05 },
+            hovermode: 'x unified',
+            barmode: 'stack',
+            colorway: paletaCores,
+            legend: { orientation: 'h', y: -0.2, font: { size: 14 } },
+            xaxis: Object.assign({}, eixoBase, { type: 'category', tickfont: { size: 14 } }),
+            yaxis: Object.assign({}, eixoBase, { ticksuffix: sufixo || '', rangemode: 'tozero', tickfont: { size: 14 } })
+        });
+    }
+
+    function serieLinha(nome, x, y, sufixo) {
+        return {
+            type: 'scatter',
+            mode: 'lines+markers',
+            name: nome,
+            x: x,
+            y: y,
+            hovertemplate: nome + ": %{y}" + (sufixo || '') + "<extra></extra>"
+        };
+    }
+
+    // Desenha os gráficos "grafico-tendencia-*" a partir da resposta de /api/tendencia
+    window.renderizarTendencia = function (tendencia) {
+        const periodos = tendencia.periodos;
+        const x = periodos.map(function (p) { return p.periodo; });
+        const valores = function (chave) { return periodos.map(function (p) { return p[chave]; }); };
+
+        // Quantidades por tipo de manifestação, empilhadas, com o total por período
+        const tipos = [];
+        periodos.forEach(function (p) {
+            Object.keys(p.quantitativo_tipos).forEach(function (tipo) {
+                if (tipos.indexOf(tipo) === -1) {
+                    tipos.push(tipo);
+                }
+            });
+        });
+        const barras = tipos.map(function (tipo) {
+            return {
+                type: 'bar',
+                name: tipo,
+                x: x,
+                y: periodos.map(function (p) { return p.quantitativo_tipos[tipo] || 0; }),
+                hovertemplate: tipo + ": %{y}<extra></extra>"
+            };
+        });
+        barras.push(Object.assign(serieLinha('Total', x, valores('total')), { line: { color: 'black' } }));
+
+        const graficos = {
+            quantidades: { dados: barras, layout: layoutTendencia('Manifestações por Período') },
+            tmro: { dados: [serieLinha('TMRO', x, valores('tmro'), ' dias')], layout: layoutTendencia('Tempo Médio de Resposta (dias úteis)') },
+            prazos: {
+                dados: [
+                    serieLinha('PRDP', x, valores('prdp'), '%'),
+                    serieLinha('PRDPP', x, valores('prdpp'), '%'),
+                    serieLinha('PRFP', x, valores('prfp'), '%')
+                ],
+                layout: layoutTendencia('Respostas por Faixa de Prazo', '%')
+            }
+        };
+        Object.keys(graficos).forEach(function (nome) {
+            const elemento = document.getElementById('grafico-tendencia-' + nome);
+            if (elemento) {
+                Plotly.react(elemento, graficos[nome].dados, graficos[nome].layout, { responsive: true });
+            }
+        });
+    };
+})();
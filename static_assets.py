@@ -0,0 +1,187 @@
+import os
+import sys
+import gzip
+import re
+import json
+import hashlib
+import tempfile
+
+# brotli é opcional: sem ele só as variantes .gz são geradas
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# ---------------------------------------------------
+# Arquivos estáticos com nome por conteúdo e pré-comprimidos
+# ---------------------------------------------------
+# Cada arquivo de static/ (e o plotly.js distribuído com o pacote plotly, sem
+# depender do CDN) é copiado para ASSETS_DIR com o hash do conteúdo no nome
+# (style.3f2a9c1b7d4e.css), junto com as variantes .gz e .br dos formatos de
+# texto. Como o nome muda sempre que o conteúdo muda, os arquivos podem ser
+# servidos com cache "para sempre" (immutable): visitas seguintes ao dashboard
+# só trafegam o HTML e os dados. O manifesto mapeia o nome lógico para o nome
+# com hash.
+#
+# A montagem roda só no build da imagem (python static_assets.py, ver
+# Dockerfile); em execução o app apenas lê o manifesto e não grava nada em
+# ASSETS_DIR.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(BASE_DIR, "static")
+ASSETS_DIR = os.environ.get("STATIC_ASSETS_DIR", os.path.join(STATIC_DIR, "dist"))
+MANIFEST_FILE = os.path.join(ASSETS_DIR, "manifest.json")
+
+# Um ano: o nome do arquivo muda a cada alteração de conteúdo
+MAX_AGE = int(os.environ.get("STATIC_ASSETS_MAX_AGE", "31536000"))
+BROTLI_QUALITY = int(os.environ.get("STATIC_ASSETS_BROTLI_QUALITY", "11"))
+COMPRESSIBLE = ('.js', '.css', '.svg', '.json', '.txt', '.html')
+
+PLOTLY_JS = 'plotly.min.js'
+# nome.<12 hex>.ext, com ou sem .gz/.br: o formato gerado por hashed_name
+HASHED_RE = re.compile(r'^.+\.[0-9a-f]{12}(\.[^.]+)?(\.gz|\.br)?$')
+
+_manifest = {'assets': {}}
+
+
+class ManifestNotFoundError(RuntimeError):
+    pass
+
+
+def plotly_js_path():
+    """
+    Caminho do plotly.min.js: PLOTLY_JS_PATH ou a cópia que acompanha o pacote
+    plotly (a mesma versão que o plotly.py usaria via CDN).
+    """
+    if os.environ.get("PLOTLY_JS_PATH"):
+        return os.environ["PLOTLY_JS_PATH"]
+    import plotly
+    return os.path.join(os.path.dirname(plotly.__file__), "package_data", PLOTLY_JS)
+
+
+def sources():
+    """
+    {nome lógico: caminho} dos arquivos servidos como assets.
+    """
+    arquivos = {}
+    for nome in sorted(os.listdir(STATIC_DIR)):
+        caminho = os.path.join(STATIC_DIR, nome)
+        if os.path.isfile(caminho) and not nome.startswith('.'):
+            arquivos[nome] = caminho
+    arquivos[PLOTLY_JS] = plotly_js_path()
+    return arquivos
+
+
+def hashed_name(nome, conteudo):
+    base, extensao = os.path.splitext(nome)
+    return f"{base}.{hashlib.sha256(conteudo).hexdigest()[:12]}{extensao}"
+
+
+def _write_atomic(caminho, conteudo):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(caminho), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(conteudo)
+        os.replace(tmp_path, caminho)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _prune(destino, assets):
+    """
+    Remove de `destino` as cópias com hash (e variantes .gz/.br) que o
+    manifesto não referencia mais.
+    """
+    atuais = set(assets.values())
+    for nome in os.listdir(destino):
+        if not HASHED_RE.match(nome):
+            continue
+        base = nome[:-3] if nome.endswith(('.gz', '.br')) else nome
+        if base in atuais:
+            continue
+        try:
+            os.remove(os.path.join(destino, nome))
+        except OSError:
+            pass
+
+
+def build(destino=ASSETS_DIR):
+    """
+    Copia os assets para `destino` com o hash no nome, gera as variantes
+    comprimidas e grava o manifesto. Arquivos já existentes (mesmo hash) não
+    são refeitos; cópias de versões anteriores são removidas depois do
+    manifesto gravado. Retorna o manifesto.
+    """
+    os.makedirs(destino, exist_ok=True)
+    arquivos = sources()
+    assets = {}
+    for nome, caminho in arquivos.items():
+        with open(caminho, 'rb') as f:
+            conteudo = f.read()
+        hashed = hashed_name(nome, conteudo)
+        alvo = os.path.join(destino, hashed)
+        if not os.path.exists(alvo):
+            _write_atomic(alvo, conteudo)
+        if nome.endswith(COMPRESSIBLE):
+            if not os.path.exists(alvo + '.gz'):
+                # mtime=0: o mesmo conteúdo gera sempre o mesmo .gz
+                _write_atomic(alvo + '.gz', gzip.compress(conteudo, compresslevel=9, mtime=0))
+            if brotli is not None and not os.path.exists(alvo + '.br'):
+                _write_atomic(alvo + '.br', brotli.compress(conteudo, quality=BROTLI_QUALITY))
+        assets[nome] = hashed
+    manifest = {'assets': assets}
+    _write_atomic(os.path.join(destino, "manifest.json"), json.dumps(manifest, indent=2).encode('utf-8'))
+    _prune(destino, assets)
+    return manifest
+
+
+def load_manifest(caminho=None):
+    """
+    Carrega no processo o manifesto gerado por build(). Levanta
+    ManifestNotFoundError se ele não existir ou estiver ilegível: os assets
+    precisam ser montados antes (python static_assets.py).
+    """
+    caminho = caminho or MANIFEST_FILE
+    try:
+        with open(caminho, 'r') as f:
+            manifest = json.load(f)
+        assets = manifest['assets']
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        raise ManifestNotFoundError(
+            f"Manifesto dos assets não encontrado em {caminho} ({e}). Rode 'python static_assets.py' "
+            f"(ou defina STATIC_ASSETS_DIR) antes de iniciar o app.") from e
+    _manifest['assets'] = assets
+    return manifest
+
+
+def asset_name(nome):
+    """
+    Nome com hash do asset lógico `nome` (ex.: 'style.css').
+    """
+    if not _manifest['assets']:
+        load_manifest()
+    return _manifest['assets'][nome]
+
+
+def resolve(hashed):
+    """
+    Caminho do asset com hash e as codificações pré-comprimidas disponíveis,
+    ou None se o nome não for de um asset do manifesto.
+    """
+    if not _manifest['assets']:
+        load_manifest()
+    if hashed not in _manifest['assets'].values():
+        return None
+    caminho = os.path.join(ASSETS_DIR, hashed)
+    codificacoes = [c for c, ext in (('br', '.br'), ('gzip', '.gz')) if os.path.exists(caminho + ext)]
+    return caminho, codificacoes
+
+
+if __name__ == "__main__":
+    # Usado no build da imagem (e em desenvolvimento): python static_assets.py
+    manifest = build()
+    for nome, hashed in manifest['assets'].items():
+        print(f"{nome} -> {hashed}")
+    sys.exit(0)
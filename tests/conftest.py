@@ -0,0 +1,81 @@
+import os
+import sys
+import tempfile
+
+# ---------------------------------------------------
+# Configuração comum dos testes
+# ---------------------------------------------------
+# Os módulos leem a configuração do ambiente na importação: o cache em disco
+# precisa apontar para um diretório temporário antes de qualquer import.
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, "scripts"))
+
+os.environ["DATA_CACHE_DIR"] = tempfile.mkdtemp(prefix="rea_testes_")
+os.environ["METRICS_DIR"] = tempfile.mkdtemp(prefix="rea_metricas_")
+# Os assets são montados uma vez, fora de static/dist, como no build da imagem
+os.environ["STATIC_ASSETS_DIR"] = tempfile.mkdtemp(prefix="rea_assets_")
+
+import pytest  # noqa: E402
+import stub_ploomnes  # noqa: E402
+import data_cache  # noqa: E402
+import columnar_snapshot  # noqa: E402
+import static_assets  # noqa: E402
+
+static_assets.build()
+
+
+@pytest.fixture
+def stub():
+    """
+    Stub do Ploomnes (scripts/stub_ploomnes.py) com um feed sintético pequeno.
+    Retorna (servidor, url_base); servidor.config controla falhas e dados.
+    """
+    servidor, url = stub_ploomnes.iniciar(linhas=500)
+    yield servidor, url
+    servidor.shutdown()
+    servidor.server_close()
+    os.remove(servidor.config.caminho_feed)
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    """
+    Cache em disco (data_cache e columnar_snapshot) isolado em tmp_path, sem
+    TTL: cada ensure_snapshot/refresh busca o feed de novo.
+    """
+    monkeypatch.setattr(data_cache, 'CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(data_cache, 'META_FILE', str(tmp_path / "feed.meta.json"))
+    monkeypatch.setattr(data_cache, 'LOCK_FILE', str(tmp_path / "feed.lock"))
+    monkeypatch.setattr(data_cache, 'CACHE_TTL', 0)
+    monkeypatch.setattr(data_cache, 'CACHE_STALE_TTL', 0)
+    monkeypatch.setattr(columnar_snapshot, 'LOCK_FILE', str(tmp_path / "manifestacoes.lock"))
+    monkeypatch.setattr(columnar_snapshot, '_memo', {'version': None, 'df': None})
+    return tmp_path
+
+
+@pytest.fixture
+def app_feed(stub, cache_dir, monkeypatch):
+    """
+    app.py lendo o feed completo do stub (/feed), com os caches de rollup e de
+    relatórios vazios. Retorna o servidor do stub.
+    """
+    import app
+    servidor, url = stub
+    monkeypatch.setattr(app, 'JSON_DATA_URL', f"{url}/feed")
+    monkeypatch.setattr(app, '_rollup_cache', {'version': None, 'rollup': None})
+    app.report_cache.clear()
+    return servidor
+
+
+@pytest.fixture
+def cliente(app_feed):
+    """
+    Cliente de teste do Flask com a sessão já autenticada.
+    """
+    import app
+    cliente = app.app.test_client()
+    with cliente.session_transaction() as sessao:
+        sessao['logged_in'] = True
+    return cliente
@@ -0,0 +1,58 @@
+import gzip
+import json
+import brotli
+import app
+
+
+def test_etag_e_revalidacao_304(cliente, monkeypatch):
+    primeira = cliente.get('/api/relatorio?start_date=2024-03-01&end_date=2024-05-31')
+    assert primeira.status_code == 200
+    etag = primeira.headers['ETag']
+    assert primeira.headers['Cache-Control'] == 'private, no-cache'
+
+    # Com a ETag atual o relatório não é recalculado nem serializado
+    chamadas = []
+    get_report = app.get_report
+    monkeypatch.setattr(app, 'get_report', lambda *a: chamadas.append(a) or get_report(*a))
+    revalidada = cliente.get('/api/relatorio?start_date=2024-03-01&end_date=2024-05-31',
+                             headers={'If-None-Match': etag})
+    assert revalidada.status_code == 304
+    assert revalidada.headers['ETag'] == etag
+    assert revalidada.get_data() == b''
+    assert chamadas == []
+
+    # Outro período tem outra ETag
+    outro = cliente.get('/api/relatorio?start_date=2024-06-01&end_date=2024-06-30', headers={'If-None-Match': etag})
+    assert outro.status_code == 200 and outro.headers['ETag'] != etag
+
+
+def test_negociacao_de_compressao(cliente):
+    identidade = cliente.get('/api/relatorio', headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in identidade.headers
+    esperado = identidade.get_json()
+    assert set(esperado) == {'relatorio', 'graficos'}
+
+    comprimido_gzip = cliente.get('/api/relatorio', headers={'Accept-Encoding': 'gzip'})
+    assert comprimido_gzip.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(comprimido_gzip.get_data())) == esperado
+
+    comprimido_br = cliente.get('/api/relatorio', headers={'Accept-Encoding': 'gzip, br'})
+    assert comprimido_br.headers['Content-Encoding'] == 'br'
+    assert json.loads(brotli.decompress(comprimido_br.get_data())) == esperado
+
+    # A ETag muda com a codificação e a resposta varia por Accept-Encoding
+    etags = {r.headers['ETag'] for r in (identidade, comprimido_gzip, comprimido_br)}
+    assert len(etags) == 3
+    assert 'Accept-Encoding' in comprimido_br.headers['Vary']
+
+
+def test_periodo_invalido(cliente):
+    for consulta in ('start_date=foo&end_date=2024-01-31', 'start_date=2024-01-01&end_date=2024-13-45'):
+        resposta = cliente.get(f'/api/relatorio?{consulta}')
+        assert resposta.status_code == 400
+        assert 'erro' in resposta.get_json()
+    assert cliente.post('/download-pdf', data={'start_date': 'foo', 'end_date': '2024-01-31'}).status_code == 400
+
+
+def test_sem_sessao(app_feed):
+    assert app.app.test_client().get('/api/relatorio').status_code == 401
@@ -0,0 +1,83 @@
+from datetime import date
+import numpy as np
+import pandas as pd
+import pytest
+import business_days
+
+
+def _baseline(start_date, end_date):
+    # calculate_working_days original (linha a linha, só fins de semana)
+    if pd.isna(start_date) or pd.isna(end_date):
+        return None
+    return np.busday_count(start_date.date(), end_date.date())
+
+
+def _baseline_coluna(inicio, fim):
+    df = pd.DataFrame({'inicio': inicio, 'fim': fim})
+    return df.apply(lambda row: _baseline(row['inicio'], row['fim']), axis=1).astype(float).to_numpy()
+
+
+def _datas_aleatorias(rng, n, tz=None):
+    segundos = rng.integers(pd.Timestamp('2019-01-01').value // 10**9, pd.Timestamp('2026-12-31').value // 10**9, n)
+    datas = pd.Series(pd.to_datetime(segundos, unit='s'))
+    if tz:
+        datas = datas.dt.tz_localize('UTC').dt.tz_convert(tz)
+    return datas
+
+
+@pytest.mark.parametrize('tz', [None, 'America/Sao_Paulo'])
+def test_equivale_ao_calculo_linha_a_linha(tz):
+    rng = np.random.default_rng(7)
+    n = 5000
+    inicio = _datas_aleatorias(rng, n, tz)
+    # Metade dos fins próximos do início (prazos reais), metade aleatórios (inclui fim < início)
+    fim = inicio + pd.to_timedelta(rng.integers(0, 40 * 86400, n), unit='s')
+    fim[n // 2:] = _datas_aleatorias(rng, n - n // 2, tz).to_numpy()
+    inicio[rng.choice(n, 200, replace=False)] = pd.NaT
+    fim[rng.choice(n, 200, replace=False)] = pd.NaT
+
+    esperado = _baseline_coluna(inicio, fim)
+    obtido = business_days.working_days_between(inicio, fim, holidays=False)
+    np.testing.assert_array_equal(obtido, esperado)
+    assert np.isnan(obtido).sum() == np.isnan(esperado).sum() > 0
+    assert (obtido[~np.isnan(obtido)] < 0).any()
+
+
+def test_data_local_de_valores_com_fuso():
+    # 23h em São Paulo já é o dia seguinte em UTC: vale a data local
+    inicio = pd.Series([pd.Timestamp('2024-03-08 23:30', tz='America/Sao_Paulo')])
+    fim = pd.Series([pd.Timestamp('2024-03-11 09:00', tz='America/Sao_Paulo')])
+    assert business_days.working_days_between(inicio, fim, holidays=False)[0] == 1
+
+
+def test_somente_datas_ausentes():
+    inicio = pd.Series([pd.NaT, pd.NaT])
+    fim = pd.Series([pd.Timestamp('2024-01-02'), pd.NaT])
+    assert np.isnan(business_days.working_days_between(inicio, fim)).all()
+
+
+def test_sexta_feira_santa_e_feriados_do_arquivo():
+    inicio = pd.Series(pd.to_datetime(['2024-03-28', '2025-08-08', '2024-11-22', '2024-03-28']))
+    fim = pd.Series(pd.to_datetime(['2024-04-01', '2025-08-12', '2024-11-26', '2024-04-01']))
+    # Sexta-feira Santa 2024-03-29; 2025-08-11 (Data Magna de SC); 2024-11-25 (Santa Catarina)
+    com_feriados = business_days.working_days_between(inicio, fim)
+    sem_feriados = business_days.working_days_between(inicio, fim, holidays=False)
+    np.testing.assert_array_equal(sem_feriados, [2, 2, 2, 2])
+    np.testing.assert_array_equal(com_feriados, [1, 1, 1, 1])
+
+
+def test_arquivo_de_feriados_alternativo(tmp_path):
+    arquivo = tmp_path / "feriados.txt"
+    arquivo.write_text("# comentário\n2024-01-03; ponto facultativo\n07-01\n", encoding='utf-8')
+    unicas, anuais = business_days.load_holidays_file(str(arquivo))
+    assert unicas == [date(2024, 1, 3)] and anuais == [(7, 1)]
+    inicio = pd.Series(pd.to_datetime(['2024-01-02', '2024-07-01']))
+    fim = pd.Series(pd.to_datetime(['2024-01-05', '2024-07-03']))
+    resultado = business_days.working_days_between(inicio, fim, holidays_file=str(arquivo))
+    np.testing.assert_array_equal(resultado, [2, 1])
+
+
+def test_pascoa():
+    assert business_days.easter_sunday(2024) == date(2024, 3, 31)
+    assert business_days.easter_sunday(2025) == date(2025, 4, 20)
+    assert date(2019, 4, 19) in business_days.national_holidays(2019)
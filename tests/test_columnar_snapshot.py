@@ -0,0 +1,90 @@
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+import columnar_snapshot
+
+V1, V2 = '1' * 64, '2' * 64
+
+
+def _frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    datas = pd.Series(pd.to_datetime('2024-01-01') + pd.to_timedelta(rng.integers(0, 365 * 24, n), unit='h'))
+    resposta = (datas + pd.to_timedelta(rng.integers(1, 30, n), unit='D')).astype('datetime64[us]')
+    resposta[rng.random(n) < 0.2] = pd.NaT
+    return pd.DataFrame({
+        'tipo_manifestacao': rng.choice(['Consulta', 'Reclamação', 'Elogio'], n),
+        'tema_manifestacao': rng.choice(['Financeiro', 'Administrativo'], n),
+        'data_manifestacao': datas.astype('datetime64[us]'),
+        'data_resposta': resposta,
+        'posicao_feed': np.arange(n, dtype=np.int64),
+    })
+
+
+def _sem_categorias(df):
+    return df.astype({c: object for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)})
+
+
+def test_grava_e_le_com_datas_vazias(cache_dir):
+    df = _frame(1000)
+    caminho = columnar_snapshot.write_snapshot(df, V1)
+    assert caminho == columnar_snapshot.snapshot_path(V1)
+    lido = columnar_snapshot.read_snapshot(V1)
+    assert isinstance(lido['tipo_manifestacao'].dtype, pd.CategoricalDtype)
+    assert lido['data_resposta'].isna().sum() == df['data_resposta'].isna().sum() > 0
+    pd.testing.assert_frame_equal(_sem_categorias(lido), df, check_dtype=False)
+    assert columnar_snapshot.read_snapshot(V2) is None
+
+
+def test_leitura_nao_copia_as_colunas(cache_dir):
+    columnar_snapshot.write_snapshot(_frame(50_000), V1)
+    tamanho = os.path.getsize(columnar_snapshot.snapshot_path(V1))
+    antes = pa.total_allocated_bytes()
+    lido = columnar_snapshot.read_snapshot(V1)
+    alocado = pa.total_allocated_bytes() - antes
+    # Só os dicionários das categorias saem do memory-map; datas (com NaT) e números não
+    assert len(lido) == 50_000
+    assert alocado < 0.01 * tamanho, (alocado, tamanho)
+
+
+def test_falha_na_gravacao_preserva_o_snapshot(cache_dir, monkeypatch):
+    columnar_snapshot.write_snapshot(_frame(100), V1)
+
+    def gravar_pela_metade(tabela, caminho, **kwargs):
+        with open(caminho, 'wb') as f:
+            f.write(b'ARROW1 incompleto')
+        raise OSError("disco cheio")
+
+    monkeypatch.setattr(columnar_snapshot.feather, 'write_feather', gravar_pela_metade)
+    with pytest.raises(OSError):
+        columnar_snapshot.write_snapshot(_frame(200, seed=1), V1)
+    assert len(columnar_snapshot.read_snapshot(V1)) == 100
+    assert not [n for n in os.listdir(cache_dir) if n.startswith('.tmp-')]
+
+
+def test_troca_de_versao(cache_dir):
+    montagens = []
+
+    def montar(df):
+        return lambda: montagens.append(len(df)) or df
+
+    primeiro = columnar_snapshot.load_dataframe(V1, montar(_frame(100)))
+    assert columnar_snapshot.load_dataframe(V1, montar(_frame(1))) is primeiro
+    assert montagens == [100]
+
+    segundo = columnar_snapshot.load_dataframe(V2, montar(_frame(300, seed=2)))
+    assert len(segundo) == 300 and montagens == [100, 300]
+    # Só o snapshot da versão atual fica em disco
+    assert sorted(n for n in os.listdir(cache_dir) if n.endswith(columnar_snapshot.SNAPSHOT_SUFFIX)) == \
+        [os.path.basename(columnar_snapshot.snapshot_path(V2))]
+
+    # Outro processo (memória vazia) lê a versão atual do disco, sem montar
+    columnar_snapshot._memo.update(version=None, df=None)
+    relido = columnar_snapshot.load_dataframe(V2, montar(_frame(1)))
+    assert montagens == [100, 300]
+    pd.testing.assert_frame_equal(relido, segundo)
+
+    # Sem versão (ex.: dados sem hash) monta sempre e não grava
+    assert len(columnar_snapshot.load_dataframe(None, montar(_frame(5)))) == 5
+    assert columnar_snapshot.load_dataframe(None, lambda: None) is None
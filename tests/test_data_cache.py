@@ -0,0 +1,69 @@
+import os
+import json
+import hashlib
+import data_cache
+import gerar_dados_sinteticos
+
+
+def _trocar_feed(servidor, linhas, seed):
+    gerar_dados_sinteticos.escrever_feed(servidor.config.caminho_feed, linhas, seed=seed)
+    servidor.config.atualizar_etag()
+
+
+def _linhas(meta):
+    caminho = data_cache.body_path(meta)
+    with open(caminho, 'rb') as f:
+        return len(json.loads(f.read()))
+
+
+def _sha(caminho):
+    with open(caminho, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def test_corpo_tem_o_hash_da_versao(stub, cache_dir):
+    servidor, url = stub
+    assert data_cache.refresh(f"{url}/feed")
+    meta = data_cache.read_meta()
+    caminho = data_cache.body_path(meta)
+    assert os.path.basename(caminho) == f"feed-{meta['version']}.json"
+    assert _sha(caminho) == meta['version']
+    assert _linhas(meta) == 500
+
+
+def test_metadados_antigos_continuam_lendo_o_corpo_antigo(stub, cache_dir):
+    servidor, url = stub
+    data_cache.refresh(f"{url}/feed")
+    antigo = data_cache.read_meta()
+
+    _trocar_feed(servidor, 300, seed=1)
+    data_cache.refresh(f"{url}/feed")
+    novo = data_cache.read_meta()
+    assert novo['version'] != antigo['version']
+    # Quem leu os metadados antes da troca não vê o corpo novo com a versão antiga
+    assert _sha(data_cache.body_path(antigo)) == antigo['version']
+    assert _linhas(antigo) == 500
+    assert _linhas(novo) == 300
+
+    # Só o corpo atual e o anterior ficam em disco
+    _trocar_feed(servidor, 200, seed=2)
+    data_cache.refresh(f"{url}/feed")
+    atual = data_cache.read_meta()
+    corpos = sorted(n for n in os.listdir(cache_dir) if n.startswith(data_cache.BODY_PREFIX))
+    assert corpos == sorted([os.path.basename(data_cache.body_path(novo)), atual['body']])
+
+
+def test_revalidacao_304_mantem_o_corpo(stub, cache_dir):
+    servidor, url = stub
+    data_cache.refresh(f"{url}/feed")
+    meta = data_cache.read_meta()
+    data_cache.refresh(f"{url}/feed")
+    assert servidor.config.contadores['feed_304'] == 1
+    revalidado = data_cache.read_meta()
+    assert revalidado['body'] == meta['body'] and revalidado['version'] == meta['version']
+
+
+def test_metadados_sem_corpo_nao_contam_como_snapshot(cache_dir):
+    data_cache.write_meta({'fetched_at': 0, 'version': 'x'})
+    assert data_cache.body_path(data_cache.read_meta()) is None
+    assert not data_cache._has_snapshot(json.loads((cache_dir / "feed.meta.json").read_text()))
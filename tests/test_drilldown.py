@@ -0,0 +1,127 @@
+import csv
+import io
+import numpy as np
+import pandas as pd
+import pytest
+import app
+import drilldown
+import report_kernel
+import gerar_dados_sinteticos
+
+
+@pytest.fixture(scope='module')
+def indice():
+    registros = gerar_dados_sinteticos.gerar_registros(4000, seed=5)
+    df = app.normalize_data(registros)
+    df = df.rename(columns={gerar_dados_sinteticos.CAMPO_ID: 'id_manifestacao'})
+    return drilldown.DrilldownIndex(df, version='v1')
+
+
+def _esperado(indice, filtros, inicio=None, fim=None):
+    # Máscara linha a linha, sem os índices
+    df = indice.df
+    mascara = np.ones(len(df), dtype=bool)
+    for coluna, valor in filtros.items():
+        if coluna == drilldown.FILTRO_FAIXA:
+            mascara &= np.asarray(report_kernel.FAIXAS_PRAZO, dtype=object)[indice.faixas] == valor
+        else:
+            mascara &= (df[coluna] == valor).fillna(False).to_numpy(dtype=bool)
+    if inicio is not None:
+        dias = df['data_manifestacao'].dt.normalize()
+        mascara &= ((dias >= pd.Timestamp(inicio)) & (dias <= pd.Timestamp(fim))).to_numpy()
+    return np.flatnonzero(mascara)
+
+
+@pytest.mark.parametrize('a,b', [([], [1, 2]), ([1, 3, 5, 9], [2, 3, 4, 9, 10]), ([0, 1, 2], [0, 1, 2]),
+                                 ([7], [1, 2, 3]), ([1, 2, 3, 100], [100])])
+def test_intersect(a, b):
+    a, b = np.array(a, dtype=np.int32), np.array(b, dtype=np.int32)
+    np.testing.assert_array_equal(drilldown._intersect(a, b), np.intersect1d(a, b))
+    np.testing.assert_array_equal(drilldown._intersect(b, a), np.intersect1d(a, b))
+
+
+@pytest.mark.parametrize('filtros,periodo', [
+    ({'tipo_manifestacao': 'Reclamação'}, None),
+    ({'tipo_manifestacao': 'Reclamação', 'tema_manifestacao': 'Financeiro'}, None),
+    ({'tipo_manifestacao': 'Reclamação', 'forma_entrada_contato': 'Telefone', 'atendimento_para': 'Beneficiário'},
+     ('2024-03-01', '2024-08-31')),
+    ({'faixa_prazo': 'acima_30_dias', 'vinculo_beneficiario': 'Titular'}, None),
+    ({'faixa_prazo': 'sem_resposta'}, ('2024-12-01', '2024-12-31')),
+    ({}, ('2024-02-10', '2024-02-10')),
+    ({}, ('2030-01-01', '2030-12-31')),
+    ({'tipo_manifestacao': 'Inexistente'}, None),
+])
+def test_filtros_e_periodo(indice, filtros, periodo):
+    inicio, fim = periodo or (None, None)
+    obtido = indice.positions(filtros, inicio and pd.Timestamp(inicio), fim and pd.Timestamp(fim))
+    np.testing.assert_array_equal(obtido, _esperado(indice, filtros, inicio, fim))
+
+
+def test_contagem_igual_ao_relatorio(indice):
+    tabela = report_kernel.AggregateTable.from_dataframe(indice.df)
+    for tipo, quantidade in tabela.value_counts('tipo_manifestacao').items():
+        assert len(indice.positions({'tipo_manifestacao': tipo})) == quantidade
+
+
+def test_paginas_percorrem_todas_as_linhas(indice):
+    posicoes = indice.positions({'tipo_manifestacao': 'Reclamação'})
+    ids, cursor, paginas = [], None, 0
+    while True:
+        linhas, cursor = indice.page(posicoes, cursor, limite=97)
+        ids.extend(linhas['id_manifestacao'])
+        paginas += 1
+        if cursor is None:
+            break
+        assert indice.decode_cursor(cursor) == posicoes[len(ids) - 1]
+    assert paginas == -(-len(posicoes) // 97)
+    assert ids == indice.df['id_manifestacao'].to_numpy()[posicoes].tolist()
+
+
+def test_cursor_invalido_ou_de_outra_versao(indice):
+    cursor = indice.encode_cursor(10)
+    outra = drilldown.DrilldownIndex(indice.df, version='v2')
+    with pytest.raises(drilldown.InvalidCursorError):
+        outra.decode_cursor(cursor)
+    for invalido in ('###', 'dGV4dG8', drilldown.base64.urlsafe_b64encode(b'v1:abc').decode()):
+        with pytest.raises(drilldown.InvalidCursorError):
+            indice.decode_cursor(invalido)
+
+
+def test_csv_em_blocos(indice):
+    posicoes = indice.positions({'faixa_prazo': 'ate_7_dias'})
+    texto = ''.join(indice.iter_csv(posicoes, chunk_rows=250))
+    linhas = list(csv.reader(io.StringIO(texto)))
+    assert linhas[0] == drilldown.COLUNAS_SAIDA
+    assert len(linhas) - 1 == len(posicoes)
+
+
+@pytest.fixture
+def cliente(indice, monkeypatch):
+    monkeypatch.setattr(app, 'get_drilldown_index', lambda: indice)
+    cliente = app.app.test_client()
+    with cliente.session_transaction() as sessao:
+        sessao['logged_in'] = True
+    return cliente
+
+
+def test_api_paginada_e_csv_a_partir_do_cursor(cliente, indice):
+    consulta = '/api/manifestacoes?tipo=Reclamação&limite=50'
+    primeira = cliente.get(consulta).get_json()
+    total = primeira['total']
+    assert len(primeira['itens']) == 50 and primeira['proximo']
+
+    resposta = cliente.get(f"{consulta}&formato=csv&apos={primeira['proximo']}")
+    linhas = list(csv.reader(io.StringIO(resposta.get_data(as_text=True))))[1:]
+    # O cabeçalho conta as linhas enviadas (depois do cursor), não o total da consulta
+    assert int(resposta.headers['X-Total-Count']) == len(linhas) == total - 50
+
+    segunda = cliente.get(f"{consulta}&apos={primeira['proximo']}").get_json()
+    assert segunda['total'] == total
+    assert [item['id_manifestacao'] for item in segunda['itens']] == [int(linha[0]) for linha in linhas[:50]]
+
+
+def test_api_erros(cliente):
+    assert cliente.get('/api/manifestacoes?faixa_prazo=qualquer').status_code == 400
+    assert cliente.get('/api/manifestacoes?limite=0').status_code == 400
+    assert cliente.get('/api/manifestacoes?apos=%23%23%23').status_code == 409
+    assert app.app.test_client().get('/api/manifestacoes').status_code == 401
@@ -0,0 +1,41 @@
+import os
+import sys
+import json
+import subprocess
+import gerar_dados_sinteticos
+import gerar_relatorios
+import rollups
+
+SCRIPTS = os.path.dirname(os.path.abspath(gerar_relatorios.__file__))
+
+
+def test_main_gera_um_pdf_por_periodo(tmp_path):
+    feed = tmp_path / "feed.json"
+    gerar_dados_sinteticos.escrever_feed(str(feed), 300, ano=2024, seed=3)
+    saida = tmp_path / "pdfs"
+    tempos = tmp_path / "tempos.json"
+    codigo = gerar_relatorios.main(['--arquivo', str(feed), '--ano', '2024', '--granularidade', 'trimestre',
+                                    '--periodo', '2024-02-01:2024-02-29', '--saida', str(saida),
+                                    '--processos', '2', '--tempos', str(tempos)])
+    assert codigo == 0
+
+    esperados = ['relatorio_rea_2024-02-01_2024-02-29.pdf'] + [f'relatorio_rea_T{n}-2024.pdf' for n in range(1, 5)]
+    assert sorted(os.listdir(saida)) == sorted(esperados)
+    for nome in esperados:
+        with open(saida / nome, 'rb') as f:
+            assert f.read(5) == b'%PDF-'
+
+    # Os contadores de cada período batem com o rollup do mesmo feed
+    relatorios = json.loads(tempos.read_text())['relatorios']
+    rollup = rollups.DailyRollup()
+    rollup.add(gerar_relatorios.carregar_dataset(arquivo=str(feed)))
+    for r in relatorios:
+        assert 'erro' not in r and r['bytes'] > 0
+        assert r['manifestacoes'] == rollup.query(r['inicio'], r['fim']).count()
+    assert sum(r['manifestacoes'] for r in relatorios if r['periodo'].startswith('T')) == rollup.query('2024-01-01', '2024-12-31').count()
+
+
+def test_importar_o_script_nao_carrega_o_flask():
+    codigo = "import sys, gerar_relatorios; print(sorted(m for m in ('app', 'flask') if m in sys.modules))"
+    saida = subprocess.run([sys.executable, '-c', codigo], cwd=SCRIPTS, capture_output=True, text=True, check=True)
+    assert saida.stdout.strip() == '[]'
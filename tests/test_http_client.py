@@ -0,0 +1,114 @@
+import time
+import pytest
+import requests
+import http_client
+
+
+@pytest.fixture(autouse=True)
+def sem_espera(monkeypatch):
+    # Sem backoff real nem breakers de outros testes
+    monkeypatch.setattr(http_client, 'backoff_delay', lambda tentativa: 0)
+    monkeypatch.setattr(http_client, '_breakers', {})
+
+
+def _breaker(url, **kwargs):
+    breaker = http_client.CircuitBreaker(**kwargs)
+    http_client._breakers[http_client.urlsplit(url).netloc] = breaker
+    return breaker
+
+
+@pytest.mark.parametrize('status', [503, 429])
+def test_get_repete_em_status_transitorio(stub, status):
+    servidor, url = stub
+    servidor.config.status_falha = status
+    servidor.config.falhas_feed = 1.0
+    response = http_client.get(f"{url}/feed", retries=2)
+    assert response.status_code == status
+    assert servidor.config.contadores['feed'] == 3
+
+
+def test_get_recupera_depois_de_falha(stub, monkeypatch):
+    servidor, url = stub
+    servidor.config.falhas_feed = 1.0
+
+    def recuperar(tentativa):
+        servidor.config.falhas_feed = 0.0
+        return 0
+    monkeypatch.setattr(http_client, 'backoff_delay', recuperar)
+    response = http_client.get(f"{url}/feed", retries=3)
+    assert response.status_code == 200
+    assert servidor.config.contadores['feed'] == 2
+    assert http_client.get_breaker(url).state == 'closed'
+
+
+def test_post_nao_repete(stub):
+    servidor, url = stub
+    servidor.config.falhas_webhook = 1.0
+    response = http_client.post(f"{url}/webhook", json={'text': 'alerta'})
+    assert response.status_code == 503
+    assert servidor.config.contadores['webhook'] == 1
+
+
+def test_circuito_aberto_meio_aberto_fechado(stub):
+    servidor, url = stub
+    breaker = _breaker(url, failure_threshold=2, reset_timeout=0.2)
+    servidor.config.falhas_feed = 1.0
+    for _ in range(2):
+        assert http_client.get(f"{url}/feed", retries=0).status_code == 503
+    assert breaker.state == 'open'
+    with pytest.raises(http_client.CircuitOpenError):
+        http_client.get(f"{url}/feed", retries=0)
+    assert servidor.config.contadores['feed'] == 2
+
+    # Chamada de teste com falha reabre o circuito
+    time.sleep(0.25)
+    assert breaker.state == 'half-open'
+    assert http_client.get(f"{url}/feed", retries=0).status_code == 503
+    assert breaker.state == 'open'
+
+    # Chamada de teste com sucesso fecha o circuito
+    servidor.config.falhas_feed = 0.0
+    time.sleep(0.25)
+    assert http_client.get(f"{url}/feed", retries=0).status_code == 200
+    assert breaker.state == 'closed'
+    assert breaker.failures == 0
+
+
+@pytest.mark.parametrize('erro', [requests.exceptions.ChunkedEncodingError, requests.exceptions.TooManyRedirects,
+                                  requests.exceptions.InvalidURL])
+def test_outros_erros_liberam_a_chamada_de_teste(stub, monkeypatch, erro):
+    servidor, url = stub
+    breaker = _breaker(url, failure_threshold=1, reset_timeout=0.1)
+    breaker.record_failure()
+    time.sleep(0.15)
+    assert breaker.state == 'half-open'
+
+    sessao = http_client.get_session()
+    original = sessao.request
+
+    def falhar(*args, **kwargs):
+        monkeypatch.setattr(sessao, 'request', original)
+        raise erro("erro simulado")
+    monkeypatch.setattr(sessao, 'request', falhar)
+    with pytest.raises(erro):
+        http_client.get(f"{url}/feed", retries=2)
+    assert breaker.state == 'open'
+
+    # O circuito volta a deixar passar a chamada de teste após o reset_timeout
+    time.sleep(0.15)
+    assert http_client.get(f"{url}/feed", retries=0).status_code == 200
+    assert breaker.state == 'closed'
+
+
+def test_interrupcao_libera_a_chamada_de_teste(stub, monkeypatch):
+    servidor, url = stub
+    breaker = _breaker(url, failure_threshold=1, reset_timeout=0.1)
+    breaker.record_failure()
+    time.sleep(0.15)
+
+    def interromper(*args, **kwargs):
+        raise KeyboardInterrupt
+    monkeypatch.setattr(http_client.get_session(), 'request', interromper)
+    with pytest.raises(KeyboardInterrupt):
+        http_client.get(f"{url}/feed", retries=0)
+    assert breaker.allow()
@@ -0,0 +1,70 @@
+import io
+import os
+import json
+import tracemalloc
+import pytest
+import ingest
+import gerar_dados_sinteticos
+
+COL_MAPPING = {
+    gerar_dados_sinteticos.CAMPO_TIPO: 'tipo_manifestacao',
+    gerar_dados_sinteticos.CAMPO_DATA: 'data_manifestacao',
+    gerar_dados_sinteticos.CAMPO_RESPOSTA: 'data_resposta',
+    gerar_dados_sinteticos.CAMPO_CANAL: 'forma_entrada_contato',
+}
+
+
+def _itens(texto, read_size=ingest.READ_SIZE):
+    return list(ingest.iter_json_array(io.BytesIO(texto.encode('utf-8')), read_size=read_size))
+
+
+@pytest.mark.parametrize('read_size', [1, 3, 7, 64, 1 << 20])
+def test_registro_cortado_entre_leituras(read_size):
+    registros = [{'a': 'x' * 50, 'b': [1, 2, {'c': 'ção'}]}, {'d': None}, 3, "fim"]
+    texto = json.dumps(registros, ensure_ascii=False)
+    assert _itens(texto, read_size) == registros
+
+
+def test_registro_maior_que_o_buffer():
+    registros = [{'grande': 'y' * 5000}, {'pequeno': 1}]
+    assert _itens(json.dumps(registros), read_size=100) == registros
+
+
+@pytest.mark.parametrize('texto', ['[', '[{"a": 1}', '[{"a": 1},', '[{"a": 1}, {"b"', '[{"a": "sem fim'])
+def test_array_truncado(texto):
+    with pytest.raises(ValueError):
+        _itens(texto, read_size=4)
+
+
+def test_documento_que_nao_e_array():
+    assert _itens('  {"registros": [1, 2]}  ') == [{'registros': [1, 2]}]
+
+
+@pytest.mark.parametrize('texto', ['[]', '  [ \n ]  '])
+def test_array_vazio(texto):
+    assert _itens(texto, read_size=2) == []
+
+
+def test_array_vazio_em_read_projected(tmp_path):
+    caminho = tmp_path / "vazio.json"
+    caminho.write_text('[]')
+    df, faltando = ingest.read_projected(str(caminho), COL_MAPPING)
+    assert df.empty and faltando == list(COL_MAPPING)
+
+
+def test_pico_de_memoria_na_leitura_projetada(tmp_path):
+    caminho = str(tmp_path / "feed.json")
+    gerar_dados_sinteticos.escrever_feed(caminho, 40_000)
+    tamanho = os.path.getsize(caminho)
+
+    tracemalloc.start()
+    try:
+        df, faltando = ingest.read_projected(caminho, COL_MAPPING, categorical=('tipo_manifestacao', 'forma_entrada_contato'),
+                                             dates=('data_manifestacao', 'data_resposta'), chunk_rows=5000)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert len(df) == 40_000 and not faltando
+    # json.load do mesmo arquivo passa de 4x o tamanho; a leitura projetada
+    # fica abaixo do próprio arquivo (buffer de leitura + um bloco de linhas)
+    assert pico < 0.75 * tamanho, f"pico {pico / 1e6:.1f} MB para um feed de {tamanho / 1e6:.1f} MB"
@@ -0,0 +1,94 @@
+import os
+import json
+import pytest
+import app
+import metrics
+
+
+@pytest.fixture
+def metricas(tmp_path, monkeypatch):
+    """
+    Registro de métricas vazio, gravando em tmp_path.
+    """
+    monkeypatch.setattr(metrics, 'METRICS_DIR', str(tmp_path))
+    monkeypatch.setattr(metrics, '_sources', [])
+    for metrica in metrics._registry.values():
+        monkeypatch.setattr(metrica, '_values', {})
+    return tmp_path
+
+
+def _gravar(diretorio, nome, dados):
+    with open(os.path.join(diretorio, nome), 'w') as f:
+        json.dump(dados, f)
+
+
+def _linhas(texto, prefixo):
+    return [linha for linha in texto.splitlines() if linha.startswith(prefixo)]
+
+
+def test_soma_os_arquivos_de_cada_processo(metricas):
+    metrics.FEED_FETCHES.inc(result='updated')
+    _gravar(metricas, "111.json", {'rea_feed_fetches_total': [[['updated'], 2], [['error'], 1]]})
+    _gravar(metricas, "222.json", {'rea_feed_fetches_total': [[['updated'], 3]], 'metrica_removida': [[[], 9]]})
+    _gravar(metricas, "333.json", {})
+    (metricas / "444.json").write_text("{arquivo pela metade")
+    texto = metrics.render()
+    assert _linhas(texto, 'rea_feed_fetches_total') == [
+        'rea_feed_fetches_total{result="error"} 1',
+        'rea_feed_fetches_total{result="updated"} 6',
+    ]
+    # O próprio processo grava o seu arquivo antes de somar
+    assert (metricas / f"{os.getpid()}.json").exists()
+    assert 'metrica_removida' not in texto
+
+
+def test_worker_encerrado_vai_para_mortos(metricas):
+    _gravar(metricas, "111.json", {'rea_feed_bytes_fetched_total': [[[], 100]]})
+    _gravar(metricas, "222.json", {'rea_feed_bytes_fetched_total': [[[], 50]]})
+    antes = _linhas(metrics.render(), 'rea_feed_bytes_fetched_total')
+
+    metrics.mark_process_dead(111)
+    metrics.mark_process_dead(222)
+    metrics.mark_process_dead(999)
+    assert not (metricas / "111.json").exists() and not (metricas / "222.json").exists()
+    assert json.loads((metricas / "mortos.json").read_text()) == {'rea_feed_bytes_fetched_total': [[[], 150]]}
+    # A reciclagem não faz o contador voltar
+    assert _linhas(metrics.render(), 'rea_feed_bytes_fetched_total') == antes == ['rea_feed_bytes_fetched_total 150']
+
+
+def test_histograma_acumula_buckets(metricas):
+    for valor in (0.003, 0.004, 0.2, 120):
+        metrics.REQUEST_DURATION.observe(valor, route='/api/relatorio', method='GET', status=200)
+    _gravar(metricas, "111.json", {'rea_http_request_duration_seconds': [[['/api/relatorio', 'GET', '200'],
+                                                                           [[1] + [0] * 13, 0.0005, 1]]]})
+    linhas = _linhas(metrics.render(), 'rea_http_request_duration_seconds')
+    rotulos = 'route="/api/relatorio",method="GET",status="200"'
+    buckets = {linha.split('le="')[1].split('"')[0]: int(linha.rsplit(' ', 1)[1]) for linha in linhas if '_bucket' in linha}
+    assert buckets['0.001'] == 1
+    assert buckets['0.005'] == 3
+    assert buckets['0.1'] == 3
+    assert buckets['0.25'] == buckets['60'] == 4
+    assert buckets['+Inf'] == 5
+    assert list(buckets) == [metrics._number(float(b)) for b in metrics.DURATION_BUCKETS] + ['+Inf']
+    assert f'rea_http_request_duration_seconds_count{{{rotulos}}} 5' in linhas
+    soma = float(next(linha for linha in linhas if '_sum' in linha).rsplit(' ', 1)[1])
+    assert soma == pytest.approx(120.2075)
+
+
+def test_rotulos_escapados():
+    assert metrics._labels(('a', 'b'), ('x"y', 'linha\nnova')) == '{a="x\\"y",b="linha\\nnova"}'
+    assert metrics._number(2.0) == '2' and metrics._number(float('inf')) == '+Inf' and metrics._number(0.25) == '0.25'
+
+
+def test_endpoint_negado_sem_token(metricas, monkeypatch):
+    cliente = app.app.test_client()
+    monkeypatch.setattr(app, 'METRICS_TOKEN', None)
+    assert cliente.get('/metrics').status_code == 404
+
+    monkeypatch.setattr(app, 'METRICS_TOKEN', 'segredo')
+    assert cliente.get('/metrics').status_code == 401
+    assert cliente.get('/metrics', headers={'Authorization': 'Bearer outro'}).status_code == 401
+    resposta = cliente.get('/metrics', headers={'Authorization': 'Bearer segredo'})
+    assert resposta.status_code == 200
+    assert resposta.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+    assert '# TYPE rea_http_request_duration_seconds histogram' in resposta.get_data(as_text=True)
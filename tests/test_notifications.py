@@ -0,0 +1,31 @@
+import notifications
+import app
+
+
+def _dispatcher():
+    return notifications.AlertDispatcher(app._post_to_chat, batch_wait=0, min_interval=0)
+
+
+def test_falha_do_webhook_conta_como_falha(stub, monkeypatch):
+    servidor, url = stub
+    servidor.config.falhas_webhook = 1.0
+    monkeypatch.setattr(app, 'GOOGLE_CHAT_WEBHOOK_URL', f"{url}/webhook")
+    dispatcher = _dispatcher()
+    dispatcher._queue.put_nowait("alerta")
+    dispatcher.flush()
+    stats = dispatcher.stats()
+    assert stats['failed'] == 1
+    assert stats['sent_messages'] == 0
+    assert servidor.config.contadores['webhook_falhas'] >= 1
+
+
+def test_envio_bem_sucedido(stub, monkeypatch):
+    servidor, url = stub
+    monkeypatch.setattr(app, 'GOOGLE_CHAT_WEBHOOK_URL', f"{url}/webhook")
+    dispatcher = _dispatcher()
+    dispatcher._queue.put_nowait("a")
+    dispatcher._queue.put_nowait("b")
+    dispatcher.flush()
+    stats = dispatcher.stats()
+    assert (stats['sent_messages'], stats['sent_alerts'], stats['failed']) == (1, 2, 0)
+    assert servidor.config.contadores['webhook'] == 1
@@ -0,0 +1,81 @@
+import time
+import pytest
+import pdf_jobs
+import result_cache
+
+
+def _render_rapido(relatorio, questoes_manuais):
+    return b"%PDF-" + relatorio['id'].encode('ascii')
+
+
+def _render_lento(relatorio, questoes_manuais):
+    # Python puro: o SIGALRM interrompe o laço
+    fim = time.monotonic() + relatorio['segundos']
+    while time.monotonic() < fim:
+        pass
+    return b"%PDF-lento"
+
+
+def _render_com_erro(relatorio, questoes_manuais):
+    raise RuntimeError("falha na montagem")
+
+
+def _aguardar(fila, job_id, limite=20):
+    fim = time.monotonic() + limite
+    while time.monotonic() < fim:
+        status = fila.status(job_id)
+        if status != 'pendente' and job_id not in fila._pending:
+            return status
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} não terminou")
+
+
+def test_job_concluido_vai_para_o_cache():
+    cache = result_cache.LRUCache()
+    fila = pdf_jobs.PDFJobQueue(_render_rapido, max_workers=1, cache=cache)
+    job_id = fila.submit('chave-a', {'id': 'a'}, None)
+    assert _aguardar(fila, job_id) == 'concluido'
+    with open(fila.result_path(job_id), 'rb') as f:
+        assert f.read() == b"%PDF-a"
+    assert cache.get('chave-a') == b"%PDF-a"
+    assert fila.stats()['completed'] == 1
+
+
+def test_timeout_interrompe_o_processo_e_e_final():
+    fila = pdf_jobs.PDFJobQueue(_render_lento, max_workers=1, timeout=0.3)
+    inicio = time.monotonic()
+    job_id = fila.submit('chave-lenta', {'segundos': 5}, None)
+    assert _aguardar(fila, job_id) == 'expirado'
+    assert time.monotonic() - inicio < 4
+    assert fila.stats()['timed_out'] == 1
+    # Um .pdf que apareça depois (ex.: gravação atrasada) não muda o estado
+    pdf_jobs._write_atomic(pdf_jobs._job_path(job_id, 'pdf'), b"%PDF-tarde")
+    assert fila.status(job_id) == 'expirado'
+    assert fila.result_path(job_id) is None
+
+
+def test_espera_na_fila_nao_conta_no_timeout():
+    fila = pdf_jobs.PDFJobQueue(_render_lento, max_workers=1, timeout=1.5)
+    primeiro = fila.submit('chave-1', {'segundos': 0.8}, None)
+    segundo = fila.submit('chave-2', {'segundos': 0.8}, None)
+    assert _aguardar(fila, primeiro) == 'concluido'
+    assert _aguardar(fila, segundo) == 'concluido'
+
+
+def test_fila_conta_jobs_ate_terminarem_de_fato():
+    fila = pdf_jobs.PDFJobQueue(_render_lento, max_workers=1, max_pending=2, timeout=5)
+    primeiro = fila.submit('chave-1', {'segundos': 0.5}, None)
+    fila.submit('chave-2', {'segundos': 0.5}, None)
+    # Consultar o status não libera vaga enquanto os processos não terminarem
+    fila.status(primeiro)
+    with pytest.raises(pdf_jobs.QueueFullError):
+        fila.submit('chave-3', {'segundos': 0.5}, None)
+    assert fila.stats()['rejected'] == 1
+    assert _aguardar(fila, primeiro) == 'concluido'
+
+
+def test_erro_de_render():
+    fila = pdf_jobs.PDFJobQueue(_render_com_erro, max_workers=1)
+    job_id = fila.submit('chave-erro', {}, None)
+    assert _aguardar(fila, job_id) == 'erro'
+    assert fila.stats()['failed'] == 1
@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+import pytest
+import app
+import report_kernel
+import rollups
+import gerar_dados_sinteticos
+
+# Chaves de process_data original comparadas com o kernel; os dicts ranqueados
+# são comparados também na ordem (a ordem alimenta os gráficos)
+CHAVES_RANQUEADAS = ['quantitativo_canais', 'quantitativo_temas', 'quantitativo_tipos', 'reclamacoes_por_tema',
+                     'quantitativo_vinculo_beneficiario']
+CHAVES_ESCALARES = ['quantitativo_reanalise', 'recebeu_reanalise', 'quantitativo_manifestacoes_proprias',
+                    'recebeu_manifestacao_propria', 'reclamacoes_coletivo_adesao', 'reclamacoes_coletivo_empresarial',
+                    'reclamacoes_individual_familiar', 'reclamacoes_beneficiario', 'tmro', 'prdp', 'prdpp', 'prfp']
+
+
+def _process_data_original(data, start_date=None, end_date=None):
+    # Contadores de process_data antes do kernel agregado (um filtro por questão)
+    df = pd.DataFrame(data)
+    df.rename(columns={k: v for k, v in app.COL_MAPPING.items() if k in df.columns}, inplace=True)
+    if 'data_manifestacao' in df.columns:
+        df['data_manifestacao'] = pd.to_datetime(df['data_manifestacao'])
+    if 'data_resposta' in df.columns:
+        df['data_resposta'] = pd.to_datetime(df['data_resposta'])
+    if start_date and end_date:
+        df = df[(df['data_manifestacao'] >= start_date) & (df['data_manifestacao'] <= end_date)]
+    r = {}
+    df_reanalise = df[df['tipo_manifestacao'] == 'Reanálise']
+    r['quantitativo_reanalise'] = len(df_reanalise)
+    r['recebeu_reanalise'] = "SIM" if len(df_reanalise) > 0 else "NÃO"
+    r['quantitativo_manifestacoes_proprias'] = len(df)
+    r['recebeu_manifestacao_propria'] = "SIM" if len(df) > 0 else "NÃO"
+    r['quantitativo_canais'] = df['forma_entrada_contato'].value_counts().to_dict()
+    r['quantitativo_temas'] = df['tema_manifestacao'].value_counts().to_dict()
+    r['quantitativo_tipos'] = df['tipo_manifestacao'].value_counts().to_dict()
+    df_reclamacoes = df[df['tipo_manifestacao'] == 'Reclamação']
+    r['reclamacoes_por_tema'] = df_reclamacoes['tema_manifestacao'].value_counts().to_dict()
+    for chave, contrato in (('reclamacoes_coletivo_adesao', 'Coletivo adesão'),
+                            ('reclamacoes_coletivo_empresarial', 'Coletivo empresarial'),
+                            ('reclamacoes_individual_familiar', 'Individual/Familiar'),
+                            ('reclamacoes_beneficiario', 'Beneficiário')):
+        r[chave] = len(df_reclamacoes[df_reclamacoes['atendimento_para'] == contrato])
+    r['quantitativo_vinculo_beneficiario'] = df['vinculo_beneficiario'].value_counts().to_dict()
+    df_com_resposta = df[df['data_resposta'].notna()].copy()
+    total = len(df_com_resposta)
+    if total > 0:
+        dias = df_com_resposta.apply(
+            lambda row: None if pd.isna(row['data_manifestacao']) or pd.isna(row['data_resposta'])
+            else np.busday_count(row['data_manifestacao'].date(), row['data_resposta'].date()), axis=1)
+        dias = dias.astype(float)
+        tmro = dias.mean()
+        r['tmro'] = round(tmro, 2) if not pd.isna(tmro) else 0
+        r['prdp'] = round((dias <= 7).sum() / total * 100, 2)
+        r['prdpp'] = round(((dias > 7) & (dias <= 30)).sum() / total * 100, 2)
+        r['prfp'] = round((dias > 30).sum() / total * 100, 2)
+    else:
+        r['tmro'] = r['prdp'] = r['prdpp'] = r['prfp'] = 0
+    return r
+
+
+@pytest.fixture(scope='module')
+def registros():
+    rng = np.random.default_rng(11)
+    registros = gerar_dados_sinteticos.gerar_registros(3000, seed=3)
+    # Dimensões ausentes (None) em parte dos registros
+    for campo in (gerar_dados_sinteticos.CAMPO_TIPO, gerar_dados_sinteticos.CAMPO_TEMA,
+                  gerar_dados_sinteticos.CAMPO_CANAL, gerar_dados_sinteticos.CAMPO_ATENDIMENTO):
+        for i in rng.choice(len(registros), 60, replace=False):
+            registros[i][campo] = None
+    return registros
+
+
+@pytest.fixture(autouse=True)
+def sem_feriados(monkeypatch):
+    # O cálculo original considerava só os fins de semana
+    working_days_between = report_kernel.business_days.working_days_between
+    monkeypatch.setattr(report_kernel.business_days, 'working_days_between',
+                        lambda inicio, fim, **kw: working_days_between(inicio, fim, holidays=False))
+
+
+PERIODOS = [
+    (None, None),
+    ('2024-01-01', '2024-12-31'),
+    ('2024-02-01', '2024-02-29'),
+    ('2024-06-10', '2024-06-14'),
+    ('2024-03-05', '2024-03-05'),
+    ('2025-01-01', '2025-01-31'),  # período sem manifestações
+]
+
+
+def _comparar(obtido, esperado, contexto):
+    for chave in CHAVES_ESCALARES:
+        assert obtido[chave] == esperado[chave], (contexto, chave)
+    for chave in CHAVES_RANQUEADAS:
+        assert list(obtido[chave].items()) == list(esperado[chave].items()), (contexto, chave)
+
+
+def _limites(inicio, fim):
+    if inicio is None:
+        return None, None
+    # O filtro original comparava com a meia-noite de end_date; aqui o dia é inclusivo
+    return pd.Timestamp(inicio), pd.Timestamp(fim) + pd.Timedelta(days=1) - pd.Timedelta(1, 'ns')
+
+
+@pytest.mark.parametrize('inicio,fim', PERIODOS)
+def test_kernel_igual_ao_process_data_original(registros, inicio, fim):
+    esperado = _process_data_original(registros, *_limites(inicio, fim))
+    obtido = app.process_data(registros, inicio and pd.Timestamp(inicio), fim and pd.Timestamp(fim))
+    _comparar(obtido, esperado, (inicio, fim))
+
+
+def test_rollup_igual_ao_process_data_original(registros):
+    df = app.normalize_data(registros)
+    rollup = rollups.DailyRollup()
+    rollup.add(df)
+    contagens = rollup.query_periods([(i, f) for i, f in PERIODOS[1:]])
+    for (inicio, fim), tabela in zip(PERIODOS[1:], contagens):
+        esperado = _process_data_original(registros, *_limites(inicio, fim))
+        _comparar(report_kernel.compute_counters(tabela), esperado, (inicio, fim))
+        _comparar(report_kernel.compute_counters(rollup.query(inicio, fim)), esperado, (inicio, fim))
+    _comparar(report_kernel.compute_counters(rollup.query()), _process_data_original(registros), 'total')
+
+
+def test_empates_na_ordem_do_feed():
+    registros = [
+        {'*Tipo da Manifestação': 'Elogio', '*Tema da Manifestação': 'Financeiro', '*Data da manifestação': '2024-05-03'},
+        {'*Tipo da Manifestação': 'Consulta', '*Tema da Manifestação': 'Administrativo', '*Data da manifestação': '2024-05-01'},
+        {'*Tipo da Manifestação': 'Reclamação', '*Tema da Manifestação': None, '*Data da manifestação': '2024-05-02'},
+    ]
+    relatorio = app.process_data(registros)
+    # Ordem do feed, não da data nem alfabética
+    assert list(relatorio['quantitativo_tipos']) == ['Elogio', 'Consulta', 'Reclamação']
+    assert list(relatorio['quantitativo_temas']) == ['Financeiro', 'Administrativo']
+
+
+def test_tabela_vazia():
+    tabela = report_kernel.AggregateTable.from_dataframe(pd.DataFrame({'tipo_manifestacao': pd.Series([], dtype=object)}))
+    contadores = report_kernel.compute_counters(tabela)
+    assert contadores['quantitativo_tipos'] == {} and contadores['tmro'] == 0
+    assert contadores['recebeu_manifestacao_propria'] == "NÃO"
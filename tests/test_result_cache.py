@@ -0,0 +1,58 @@
+import app
+import gerar_dados_sinteticos
+import result_cache
+
+
+def test_descarta_o_usado_ha_mais_tempo():
+    cache = result_cache.LRUCache(maxsize=3)
+    for chave in 'abc':
+        cache.put(chave, chave.upper())
+    assert cache.get('a') == 'A'
+    cache.put('d', 'D')
+    # 'a' foi usado depois de 'b', então 'b' sai primeiro
+    assert cache.get('b') is None
+    cache.put('c', 'C2')
+    cache.put('e', 'E')
+    assert [c for c in 'abcde' if cache.get(c) is not None] == ['c', 'd', 'e']
+    assert cache.stats() == {'size': 3, 'maxsize': 3, 'hits': 4, 'misses': 3, 'evictions': 2, 'hit_rate': 0.5714}
+
+
+def test_get_or_compute_e_discard_if():
+    cache = result_cache.LRUCache(maxsize=8)
+    chamadas = []
+
+    def calcular(valor):
+        return lambda: chamadas.append(valor) or valor
+
+    assert cache.get_or_compute(('v1', 'a'), calcular(1)) == 1
+    assert cache.get_or_compute(('v1', 'a'), calcular(2)) == 1
+    # None não é guardado: a próxima chamada calcula de novo
+    assert cache.get_or_compute(('v1', 'b'), calcular(None)) is None
+    assert cache.get_or_compute(('v1', 'b'), calcular(3)) == 3
+    cache.put(('v2', 'a'), 4)
+    assert chamadas == [1, None, 3]
+
+    cache.discard_if(lambda chave: chave[0] != 'v2')
+    assert cache.stats()['size'] == 1
+    assert cache.get(('v1', 'a')) is None and cache.get(('v2', 'a')) == 4
+
+
+def test_nova_versao_dos_dados_invalida_os_relatorios(app_feed):
+    servidor = app_feed
+    periodo = ('2024-01-01', '2024-06-30')
+    antigo = app.get_relatorio(*periodo)
+    versao_antiga, _ = app.get_daily_rollup()
+    assert app.get_relatorio(*periodo) is antigo
+    assert all(chave[0] == versao_antiga for chave in app.report_cache._itens)
+
+    gerar_dados_sinteticos.escrever_feed(servidor.config.caminho_feed, 200, seed=9)
+    servidor.config.atualizar_etag()
+    versao, rollup = app.get_daily_rollup()
+    assert versao != versao_antiga
+    # Nenhum resultado da versão anterior sobra no cache
+    assert all(chave[0] == versao for chave in app.report_cache._itens)
+
+    novo = app.get_relatorio(*periodo)
+    assert novo is not antigo
+    assert novo == app.build_relatorio(rollup.query(*periodo), tem_canal=True)
+    assert sum(novo['quantitativo_tipos'].values()) == rollup.query(*periodo).count() < 200
@@ -0,0 +1,142 @@
+import time
+import threading
+import multiprocessing
+import pandas as pd
+import pytest
+import columnar_snapshot
+import singleflight
+
+N = 8
+
+
+def _esperar(condicao, timeout=5):
+    limite = time.monotonic() + timeout
+    while not condicao():
+        assert time.monotonic() < limite, "tempo esgotado"
+        time.sleep(0.005)
+
+
+def _concorrentes(flight, fn):
+    resultados = [None] * N
+
+    def chamar(i):
+        try:
+            resultados[i] = ('ok', flight.do('chave', fn))
+        except Exception as e:
+            resultados[i] = ('erro', e)
+
+    threads = [threading.Thread(target=chamar, args=(i,)) for i in range(N)]
+    for t in threads:
+        t.start()
+    return threads, resultados
+
+
+def test_chamadas_concorrentes_executam_uma_vez():
+    flight = singleflight.SingleFlight()
+    liberar = threading.Event()
+    execucoes = []
+
+    def fn():
+        execucoes.append(1)
+        liberar.wait(5)
+        return object()
+
+    threads, resultados = _concorrentes(flight, fn)
+    # Só libera quando todas as outras já estão esperando a execução em andamento
+    _esperar(lambda: flight.stats()['deduplicated'] == N - 1)
+    assert flight.stats()['in_flight'] == 1
+    liberar.set()
+    for t in threads:
+        t.join()
+
+    assert len(execucoes) == 1
+    assert {id(valor) for status, valor in resultados} == {id(resultados[0][1])}
+    assert flight.stats() == {'executions': 1, 'deduplicated': N - 1, 'deduplicated_cross_worker': 0, 'in_flight': 0}
+
+
+def test_excecao_chega_a_todos_e_libera_a_chave():
+    flight = singleflight.SingleFlight()
+    liberar = threading.Event()
+    erro = ValueError("feed indisponível")
+
+    def fn():
+        liberar.wait(5)
+        raise erro
+
+    threads, resultados = _concorrentes(flight, fn)
+    _esperar(lambda: flight.stats()['deduplicated'] == N - 1)
+    liberar.set()
+    for t in threads:
+        t.join()
+    assert resultados == [('erro', erro)] * N
+
+    # A chave não fica presa: a próxima chamada executa de novo
+    assert flight.stats()['in_flight'] == 0
+    assert flight.do('chave', lambda: 42) == 42
+    assert flight.stats()['executions'] == 2
+
+
+def test_chaves_diferentes_nao_se_bloqueiam():
+    flight = singleflight.SingleFlight()
+    assert [flight.do(i, lambda i=i: i * 2) for i in range(3)] == [0, 2, 4]
+    assert flight.stats()['executions'] == 3 and flight.stats()['deduplicated'] == 0
+
+
+def _segurar_lock(caminho, pronto, liberar, acao=None):
+    with singleflight.file_lock(caminho):
+        pronto.set()
+        liberar.wait(5)
+        if acao:
+            acao()
+
+
+@pytest.fixture
+def fork():
+    return multiprocessing.get_context('fork')
+
+
+def test_file_lock_exclui_outro_processo(tmp_path, fork):
+    caminho = str(tmp_path / "sub" / "teste.lock")
+    pronto, liberar = fork.Event(), fork.Event()
+    processo = fork.Process(target=_segurar_lock, args=(caminho, pronto, liberar))
+    processo.start()
+    try:
+        assert pronto.wait(5)
+        adquirido = threading.Event()
+        sem_espera = threading.Event()
+        sem_espera.set()
+        threading.Thread(target=_segurar_lock, args=(caminho, adquirido, sem_espera), daemon=True).start()
+        # Enquanto o outro processo segura o lock, este espera
+        assert not adquirido.wait(0.3)
+        liberar.set()
+        assert adquirido.wait(5)
+    finally:
+        liberar.set()
+        processo.join(5)
+
+
+def test_snapshot_montado_por_outro_worker_conta_como_coalescido(cache_dir, fork, monkeypatch):
+    version = 'a' * 64
+    df = pd.DataFrame({'tipo_manifestacao': ['Consulta', 'Elogio'],
+                       'data_manifestacao': pd.to_datetime(['2024-01-01', '2024-01-02'])})
+    pronto, liberar = fork.Event(), fork.Event()
+    # Outro "worker" segura o lock enquanto grava o snapshot
+    outro = fork.Process(target=_segurar_lock, args=(columnar_snapshot.LOCK_FILE, pronto, liberar,
+                                                     lambda: columnar_snapshot.write_snapshot(df, version)))
+    outro.start()
+    flight = singleflight.SingleFlight()
+    # Só libera o outro worker quando este já viu o snapshot ausente e pediu o lock
+    file_lock = singleflight.file_lock
+    monkeypatch.setattr(singleflight, 'file_lock', lambda caminho: liberar.set() or file_lock(caminho))
+
+    def montar():
+        raise AssertionError("o snapshot já foi montado pelo outro worker")
+
+    try:
+        assert pronto.wait(5)
+        obtido = columnar_snapshot.load_dataframe(version, montar, on_coalesced=flight.record_cross_worker)
+    finally:
+        liberar.set()
+        outro.join(5)
+    assert obtido['tipo_manifestacao'].tolist() == ['Consulta', 'Elogio']
+    assert flight.stats()['deduplicated_cross_worker'] == 1
@@ -0,0 +1,46 @@
+import os
+import pytest
+import static_assets
+
+
+def test_build_remove_copias_antigas(tmp_path, monkeypatch):
+    fontes = tmp_path / "static"
+    fontes.mkdir()
+    destino = tmp_path / "dist"
+    plotly_js = tmp_path / "plotly.min.js"
+    plotly_js.write_text("var plotly = 1;")
+    monkeypatch.setattr(static_assets, 'STATIC_DIR', str(fontes))
+    monkeypatch.setenv("PLOTLY_JS_PATH", str(plotly_js))
+
+    (fontes / "style.css").write_text("body { color: red; }")
+    antigo = static_assets.build(str(destino))['assets']['style.css']
+    (destino / "outro.txt").write_text("não gerado pelo build")
+    assert (destino / (antigo + '.gz')).exists()
+
+    (fontes / "style.css").write_text("body { color: blue; }")
+    manifest = static_assets.build(str(destino))
+    novo = manifest['assets']['style.css']
+    assert novo != antigo
+
+    restantes = set(os.listdir(destino))
+    assert not any(nome.startswith(antigo) for nome in restantes)
+    assert {novo, novo + '.gz', manifest['assets']['plotly.min.js'], "manifest.json", "outro.txt"} <= restantes
+
+
+def test_manifesto_ausente_falha_na_leitura(tmp_path):
+    with pytest.raises(static_assets.ManifestNotFoundError, match="python static_assets.py"):
+        static_assets.load_manifest(str(tmp_path / "manifest.json"))
+    (tmp_path / "manifest.json").write_text("{")
+    with pytest.raises(static_assets.ManifestNotFoundError):
+        static_assets.load_manifest(str(tmp_path / "manifest.json"))
+
+
+def test_app_so_le_o_manifesto_montado_no_build():
+    import app
+    # conftest monta os assets uma vez em STATIC_ASSETS_DIR, como o Dockerfile
+    manifest = static_assets.load_manifest()
+    assert static_assets.asset_name('style.css') == manifest['assets']['style.css']
+    nomes = set(os.listdir(static_assets.ASSETS_DIR))
+    resposta = app.app.test_client().get(f"/assets/{manifest['assets']['style.css']}", headers={'Accept-Encoding': 'gzip'})
+    assert resposta.status_code == 200 and resposta.headers['Content-Encoding'] == 'gzip'
+    assert set(os.listdir(static_assets.ASSETS_DIR)) == nomes
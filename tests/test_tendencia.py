@@ -0,0 +1,71 @@
+import json
+import pandas as pd
+import pytest
+import app
+import report_kernel
+import time_index
+
+
+def test_parametros_invalidos(cliente):
+    assert cliente.get('/api/tendencia?granularidade=decada').status_code == 400
+    assert 'mes' in cliente.get('/api/tendencia?granularidade=decada').get_json()['erro']
+    assert cliente.get('/api/tendencia?ano=dois-mil').status_code == 400
+    assert app.app.test_client().get('/api/tendencia').status_code == 401
+
+
+def test_period_bounds_cobrem_o_ano_sem_sobreposicao():
+    for ano in (2024, 2025):
+        for granularidade, quantidade in (('mes', 12), ('trimestre', 4), ('dia', 366 if ano == 2024 else 365)):
+            assert len(time_index.period_bounds(ano, granularidade)) == quantidade
+        for granularidade in time_index.GRANULARIDADES:
+            periodos = time_index.period_bounds(ano, granularidade)
+            assert periodos[0][1] == pd.Timestamp(ano, 1, 1) and periodos[-1][2] == pd.Timestamp(ano, 12, 31)
+            for (_, _, fim), (_, inicio, _) in zip(periodos, periodos[1:]):
+                assert inicio == fim + pd.Timedelta(days=1)
+    # 2025 começa numa quarta: a primeira semana vai até o domingo
+    semanas = time_index.period_bounds(2025, 'semana')
+    assert semanas[0][1:] == (pd.Timestamp('2025-01-01'), pd.Timestamp('2025-01-05'))
+    assert all(inicio.dayofweek == 0 for _, inicio, _ in semanas[1:])
+    assert [r for r, _, _ in time_index.period_bounds(2024, 'trimestre')] == ['T1/2024', 'T2/2024', 'T3/2024', 'T4/2024']
+    with pytest.raises(ValueError):
+        time_index.period_bounds(2024, 'decada')
+
+
+@pytest.mark.parametrize('granularidade', list(time_index.GRANULARIDADES))
+def test_periodos_iguais_ao_rollup_e_as_linhas(cliente, granularidade):
+    resposta = cliente.get(f'/api/tendencia?ano=2024&granularidade={granularidade}')
+    assert resposta.status_code == 200
+    tendencia = resposta.get_json()['tendencia']
+    _, rollup = app.get_daily_rollup()
+    _, df = app.get_dataset()
+    datas = df['data_manifestacao']
+
+    periodos = tendencia['periodos']
+    assert [p['periodo'] for p in periodos] == [r for r, _, _ in time_index.period_bounds(2024, granularidade)]
+    for p in periodos:
+        contagens = rollup.query(p['inicio'], p['fim'])
+        esperado = json.loads(json.dumps(report_kernel.compute_counters(contagens, tem_canal=True)))
+        assert {chave: p[chave] for chave in esperado} == esperado
+        # Linhas do último dia entram no período, as do dia seguinte não
+        inicio, fim = pd.Timestamp(p['inicio']), pd.Timestamp(p['fim']) + pd.Timedelta(days=1)
+        assert p['total'] == int(((datas >= inicio) & (datas < fim)).sum())
+    assert sum(p['total'] for p in periodos) == rollup.query('2024-01-01', '2024-12-31').count()
+
+
+def test_ano_sem_dados(cliente):
+    tendencia = cliente.get('/api/tendencia?ano=2031&granularidade=trimestre').get_json()['tendencia']
+    assert len(tendencia['periodos']) == 4
+    for p in tendencia['periodos']:
+        assert p['total'] == 0
+        assert sum(p['quantitativo_tipos'].values()) == 0
+        assert p['tmro'] == 0
+
+
+def test_feed_vazio(cliente, app_feed):
+    # Como no relatório, um feed sem registros não gera tendência: erro em JSON, sem exceção
+    with open(app_feed.config.caminho_feed, 'w') as f:
+        f.write('[]')
+    app_feed.config.atualizar_etag()
+    resposta = cliente.get('/api/tendencia?ano=2024&granularidade=mes')
+    assert resposta.status_code == 500
+    assert 'erro' in resposta.get_json()
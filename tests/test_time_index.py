@@ -0,0 +1,122 @@
+import pandas as pd
+import pytest
+import app
+import time_index
+
+
+@pytest.mark.parametrize('formato,valores,esperado', [
+    ('ISO8601', ['2024-03-05T10:20:00', '2024-12-31'], ['2024-03-05 10:20:00', '2024-12-31']),
+    ('%d/%m/%Y %H:%M:%S', ['05/03/2024 10:20:30', '31/12/2024 23:59:59'], ['2024-03-05 10:20:30', '2024-12-31 23:59:59']),
+    ('%d/%m/%Y %H:%M', ['05/03/2024 10:20', '31/12/2024 23:59'], ['2024-03-05 10:20', '2024-12-31 23:59']),
+    ('%d/%m/%Y', ['05/03/2024', '31/12/2024'], ['2024-03-05', '2024-12-31']),
+])
+def test_formatos_explicitos(formato, valores, esperado):
+    assert time_index.detect_format([None, ''] + valores) == formato
+    parser = time_index.DateParser()
+    datas = parser.parse([None, ''] + valores, 'data')
+    assert parser._detectados == {'data': formato}
+    assert datas.isna().tolist() == [True, True, False, False]
+    assert datas.iloc[2:].tolist() == [pd.Timestamp(v) for v in esperado]
+    assert parser.invalidos == {}
+
+
+def test_formato_detectado_e_reaproveitado_com_fallback():
+    parser = time_index.DateParser()
+    parser.parse(['01/02/2024'], 'data')
+    # O segundo bloco usa o formato do primeiro; o valor fora dele é convertido individualmente
+    datas = parser.parse(['03/04/2024', '2024-05-06T07:08:09'], 'data')
+    assert datas.tolist() == [pd.Timestamp('2024-04-03'), pd.Timestamp('2024-05-06 07:08:09')]
+    assert parser.invalidos == {}
+
+
+def test_sem_formato_conhecido_usa_conversao_mista():
+    assert time_index.detect_format(['March 5, 2024']) is None
+    datas = time_index.DateParser().parse(['March 5, 2024', '2024-03-06'], 'data')
+    assert datas.tolist() == [pd.Timestamp('2024-03-05'), pd.Timestamp('2024-03-06')]
+
+
+def test_valores_invalidos_viram_nat_e_sao_contados():
+    parser = time_index.DateParser()
+    datas = parser.parse(['05/03/2024', 'sem data', None, ''], 'data_manifestacao')
+    assert datas.isna().tolist() == [False, True, True, True]
+    parser.parse(['31/02/2024'], 'data_manifestacao')
+    parser.parse(['xx'], 'data_resposta')
+    assert parser.invalidos == {'data_manifestacao': 2, 'data_resposta': 1}
+
+
+def test_normalize_data_alerta_datas_invalidas(monkeypatch):
+    alertas = []
+    monkeypatch.setattr(app, 'send_to_chat', alertas.append)
+    registros = [{campo: 'x' for campo in app.COL_MAPPING} for _ in range(3)]
+    for registro, data in zip(registros, ['05/03/2024', 'ontem', '07/03/2024']):
+        registro['*Data da manifestação'] = data
+        registro['*Data da Resposta'] = data
+    df = app.normalize_data(registros)
+    assert df['data_manifestacao'].isna().sum() == 1
+    assert alertas == ["Alerta: Datas não reconhecidas no JSON do Ploomnes (viraram vazias): "
+                       "data_manifestacao (1), data_resposta (1)."]
+
+
+def _ordenado(datas):
+    df = pd.DataFrame({'data_manifestacao': pd.to_datetime(datas, format='ISO8601'), 'linha': range(len(datas))})
+    return time_index.sort_by_date(df)
+
+
+def test_sort_by_date_estavel_com_nat_no_final():
+    df = _ordenado(['2024-03-02', None, '2024-03-01', '2024-03-02', None, '2024-01-15'])
+    assert df['linha'].tolist() == [5, 2, 0, 3, 1, 4]
+    assert df.attrs['ordenado_por'] == 'data_manifestacao'
+    assert time_index.sort_by_date(df) is df
+    sem_coluna = pd.DataFrame({'x': [2, 1]})
+    assert time_index.sort_by_date(sem_coluna) is sem_coluna
+
+
+@pytest.fixture
+def ordenado():
+    return _ordenado(['2024-03-01 00:00', '2024-03-01 23:59:59', '2024-03-02 08:00', '2024-03-05 12:00',
+                      '2024-03-31 23:59:59.999', None, '2024-04-01 00:00', None])
+
+
+@pytest.mark.parametrize('inicio,fim,esperado', [
+    # O dia final é inclusivo até 23:59:59.999
+    ('2024-03-01', '2024-03-01', [0, 1]),
+    ('2024-03-01', '2024-03-31', [0, 1, 2, 3, 4]),
+    ('2024-03-02 15:00', '2024-03-05 00:00', [2, 3]),
+    ('2024-04-01', '2024-04-01', [6]),
+    # Períodos vazios: entre duas datas, antes e depois de todas, e invertido
+    ('2024-03-03', '2024-03-04', []),
+    ('2023-01-01', '2023-12-31', []),
+    ('2025-01-01', '2025-12-31', []),
+    ('2024-03-31', '2024-03-01', []),
+])
+def test_period_positions(ordenado, inicio, fim, esperado):
+    i, j = time_index.period_positions(ordenado, inicio, fim)
+    obtido = ordenado.iloc[i:j]
+    # As linhas sem data (no final) nunca entram no recorte
+    assert obtido['data_manifestacao'].notna().all()
+    assert sorted(obtido['linha'].tolist()) == esperado
+    # Mesmo resultado da comparação linha a linha (DataFrame não ordenado)
+    desordenado = ordenado.sample(frac=1, random_state=1)
+    desordenado.attrs = {}
+    esperado_linhas = time_index.slice_period(desordenado, inicio, fim)['linha']
+    assert sorted(obtido['linha'].tolist()) == sorted(esperado_linhas.tolist())
+
+
+def test_period_positions_tz_e_so_nat():
+    df = _ordenado(['2024-03-01 02:00', '2024-03-02 02:00'])
+    df['data_manifestacao'] = df['data_manifestacao'].dt.tz_localize('America/Sao_Paulo')
+    assert time_index.period_positions(df, '2024-03-02', '2024-03-02') == (1, 2)
+    vazio = _ordenado([None, None])
+    assert time_index.period_positions(vazio, '2024-01-01', '2024-12-31') == (0, 0)
+
+
+def test_normalize_data_alerta_colunas_ausentes(monkeypatch):
+    alertas = []
+    monkeypatch.setattr(app, 'send_to_chat', alertas.append)
+    registros = [{'*Tipo da Manifestação': 'Consulta', '*Data da manifestação': '05/03/2024'}]
+    app.normalize_data(registros)
+    ausentes = [campo for campo in app.COL_MAPPING if campo not in registros[0]]
+    app._alert_missing_columns(ausentes)
+    # normalize_data e o snapshot usam a mesma mensagem
+    assert len(alertas) == 2 and alertas[0] == alertas[1]
+    assert alertas[0].startswith("Alerta: As seguintes colunas não foram encontradas")
@@ -0,0 +1,179 @@
+import pandas as pd
+
+# ---------------------------------------------------
+# Datas das manifestações: conversão, ordenação e recorte por período
+# ---------------------------------------------------
+# As datas do feed são convertidas com formatos conhecidos (sem inferência
+# valor a valor) e o dataset fica ordenado por data_manifestacao, com as
+# linhas sem data no final. Assim um período vira um recorte contíguo,
+# localizado por busca binária, e as datas só são formatadas para exibição
+# quando alguém pede.
+
+# Formatos aceitos, na ordem em que são testados na primeira data de cada coluna
+DATE_FORMATS = ('ISO8601', '%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M', '%d/%m/%Y')
+DISPLAY_FORMAT = '%d/%m/%Y'
+COLUNA_ORDEM = 'data_manifestacao'
+
+# Granularidades do modo de tendência: frequência (pandas) do início de cada período
+GRANULARIDADES = {'mes': 'MS', 'trimestre': 'QS', 'semana': 'W-MON', 'dia': 'D'}
+
+
+def detect_format(valores, formatos=DATE_FORMATS):
+    """
+    Retorna o primeiro formato de `formatos` que converte a primeira data
+    não vazia de `valores`, ou None se nenhum servir.
+    """
+    amostra = next((v for v in valores if v is not None and v == v and v != ''), None)
+    if amostra is None:
+        return None
+    for formato in formatos:
+        try:
+            pd.to_datetime([amostra], format=formato)
+            return formato
+        except (ValueError, TypeError):
+            continue
+    return None
+
+
+class DateParser:
+    """
+    Converte colunas de datas com um formato explícito, detectado na primeira
+    amostra de cada coluna e reaproveitado nos blocos seguintes. Valores fora
+    do formato detectado são convertidos individualmente; os inválidos viram NaT
+    e são contados em `invalidos` ({coluna: quantidade}), para o alerta.
+    """
+
+    def __init__(self, formatos=DATE_FORMATS):
+        self.formatos = formatos
+        self._detectados = {}
+        self.invalidos = {}
+
+    def parse(self, valores, coluna=None):
+        serie = valores if isinstance(valores, pd.Series) else pd.Series(valores, dtype=object)
+        formato = self._detectados.get(coluna)
+        if formato is None:
+            formato = detect_format(serie, self.formatos)
+            if formato is not None:
+                self._detectados[coluna] = formato
+        if formato is None:
+            datas = pd.to_datetime(serie, format='mixed', errors='coerce')
+        else:
+            datas = pd.to_datetime(serie, format=formato, errors='coerce', cache=True)
+            falhas = _nao_convertidas(serie, datas)
+            if falhas.any():
+                datas[falhas] = pd.to_datetime(serie[falhas], format='mixed', errors='coerce')
+        invalidas = int(_nao_convertidas(serie, datas).sum())
+        if invalidas:
+            self.invalidos[coluna] = self.invalidos.get(coluna, 0) + invalidas
+        return datas
+
+
+def _nao_convertidas(serie, datas):
+    # Valores preenchidos que não viraram data
+    return datas.isna() & serie.notna() & (serie != '')
+
+
+def sort_by_date(df, coluna=COLUNA_ORDEM):
+    """
+    Ordena (de forma estável) o DataFrame pela coluna de data, com as linhas sem
+    data no final, e marca a ordenação em df.attrs para slice_period.
+    """
+    if coluna not in df.columns:
+        return df
+    if df.attrs.get('ordenado_por') == coluna:
+        return df
+    df = df.sort_values(coluna, kind='stable', na_position='last').reset_index(drop=True)
+    df.attrs['ordenado_por'] = coluna
+    return df
+
+
+def _linhas_com_data(serie):
+    # As datas ausentes ficam no final: busca binária pela primeira delas
+    inicio, fim = 0, len(serie)
+    while inicio < fim:
+        meio = (inicio + fim) // 2
+        if pd.isna(serie.iat[meio]):
+            fim = meio
+        else:
+            inicio = meio + 1
+    return inicio
+
+
+def _limite(valor, tz):
+    ts = pd.Timestamp(valor)
+    if tz is not None and ts.tzinfo is None:
+        return ts.tz_localize(tz)
+    if tz is None and ts.tzinfo is not None:
+        return ts.tz_localize(None)
+    return ts
+
+
+def period_positions(df, start_date, end_date, coluna=COLUNA_ORDEM):
+    """
+    Retorna (i, j) tais que df.iloc[i:j] são as linhas com `coluna` entre
+    start_date e end_date (dias inclusivos), localizadas com searchsorted.
+    Requer um DataFrame ordenado por sort_by_date.
+    """
+    serie = df[coluna]
+    tz = serie.dt.tz
+    inicio = _limite(pd.Timestamp(start_date).normalize(), tz)
+    fim = _limite(pd.Timestamp(end_date).normalize() + pd.Timedelta(days=1), tz)
+    validas = serie.iloc[:_linhas_com_data(serie)]
+    return int(validas.searchsorted(inicio, side='left')), int(validas.searchsorted(fim, side='left'))
+
+
+def slice_period(df, start_date, end_date, coluna=COLUNA_ORDEM):
+    """
+    Retorna as linhas com `coluna` entre start_date e end_date (dias inclusivos).
+    Em um DataFrame ordenado por sort_by_date, o período é um recorte contíguo
+    localizado com searchsorted; nos demais, cai para a comparação linha a linha
+    (ordenar só para um recorte custaria mais que a própria comparação).
+    """
+    if df.attrs.get('ordenado_por') != coluna:
+        serie = df[coluna]
+        tz = serie.dt.tz
+        inicio = _limite(pd.Timestamp(start_date).normalize(), tz)
+        fim = _limite(pd.Timestamp(end_date).normalize() + pd.Timedelta(days=1), tz)
+        return df[(serie >= inicio) & (serie < fim)]
+    i, j = period_positions(df, start_date, end_date, coluna)
+    return df.iloc[i:j]
+
+
+def period_bounds(ano, granularidade='mes'):
+    """
+    Divide o ano em períodos consecutivos da granularidade ('mes', 'trimestre',
+    'semana' ou 'dia'). Retorna uma lista de (rótulo, início, fim), com início e
+    fim inclusivos e rótulos no formato '01/2024' (mês), 'T1/2024' (trimestre),
+    'S01/2024' (semana) ou '05/03/2024' (dia). As semanas vão de segunda a
+    domingo, cortadas no primeiro e no último dia do ano.
+    """
+    if granularidade not in GRANULARIDADES:
+        raise ValueError(f"Granularidade inválida: {granularidade!r} (use {', '.join(GRANULARIDADES)}).")
+    primeiro = pd.Timestamp(year=ano, month=1, day=1)
+    ultimo = pd.Timestamp(year=ano, month=12, day=31)
+    inicios = pd.date_range(primeiro, ultimo, freq=GRANULARIDADES[granularidade])
+    if len(inicios) == 0 or inicios[0] != primeiro:
+        inicios = inicios.insert(0, primeiro)
+    fins = list(inicios[1:] - pd.Timedelta(days=1)) + [ultimo]
+    periodos = []
+    for n, (inicio, fim) in enumerate(zip(inicios, fins), start=1):
+        if granularidade == 'mes':
+            rotulo = f"{inicio.month:02d}/{ano}"
+        elif granularidade == 'trimestre':
+            rotulo = f"T{n}/{ano}"
+        elif granularidade == 'semana':
+            rotulo = f"S{n:02d}/{ano}"
+        else:
+            rotulo = inicio.strftime(DISPLAY_FORMAT)
+        periodos.append((rotulo, inicio, fim))
+    return periodos
+
+
+def format_dates(valores, formato=DISPLAY_FORMAT):
+    """
+    Formata datas para exibição (padrão dd/mm/aaaa) sob demanda; datas
+    ausentes viram string vazia.
+    """
+    if isinstance(valores, pd.Series):
+        return valores.dt.strftime(formato).fillna('')
+    return '' if pd.isna(valores) else pd.Timestamp(valores).strftime(formato)